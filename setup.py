@@ -12,6 +12,7 @@ setup(
     packages=find_packages(),
     install_requires=[
         "pygame>=2.5.0",
+        "numpy>=1.24",
         "SpeechRecognition>=3.10.0",
         "pyaudio>=0.2.13",
     ],
@@ -19,6 +20,7 @@ setup(
     entry_points={
         "console_scripts": [
             "mage-arena=src.main:main",
+            "mage-arena-bench=src.benchmark:main",
         ],
     },
     classifiers=[
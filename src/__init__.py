@@ -12,6 +12,7 @@ __all__ = [
 	'input',
 	'audio',
 	'utils',
+	'world',
 ]
 
 # No importamos aquí los submódulos directamente para evitar efectos secundarios
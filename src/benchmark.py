@@ -0,0 +1,361 @@
+"""
+Benchmark de renderizado sin ventana
+Recorre caminos de cámara predefinidos sobre varios mapas con el driver de
+video "dummy" de SDL, mide cada etapa de Renderer.render_3d_view (cast,
+shade, draw, blit) más el minimapa y reporta percentiles, frames por
+segundo y memoria asignada por frame en JSON.
+
+Uso:
+    python -m src.benchmark --frames 300 --output bench.json
+    python -m src.benchmark --baseline bench.json --tolerance 0.15
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import tracemalloc
+from time import perf_counter
+from types import SimpleNamespace
+
+import numpy as np
+
+# El banner de pygame va a stdout y rompería el JSON
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+import pygame
+
+from src.game.config import Config
+from src.entities.player import Player
+from src.rendering.raycaster import EXAMPLE_MAP
+from src.rendering.renderer import Renderer
+from src.world.grid_map import GridMap
+from src.world.map_loader import load_map
+
+STAGES = ("cast", "shade", "draw", "blit", "minimap", "frame")
+PERCENTILES = (50, 90, 95, 99)
+
+
+def make_arena_map(size=16):
+    """Sala abierta con borde de paredes (muchas paredes lejanas)"""
+    game_map = [[0] * size for _ in range(size)]
+    for i in range(size):
+        game_map[0][i] = game_map[size - 1][i] = 1
+        game_map[i][0] = game_map[i][size - 1] = 1
+    return game_map
+
+
+def make_pillars_map(size=24):
+    """Sala con columnas cada dos tiles (muchas paredes cercanas y oclusión)"""
+    game_map = make_arena_map(size)
+    for y in range(2, size - 2, 2):
+        for x in range(2, size - 2, 2):
+            game_map[y][x] = 1 + (x + y) // 2 % 3
+    return game_map
+
+
+BENCH_MAPS = {
+    "example": lambda: EXAMPLE_MAP,
+    "arena": make_arena_map,
+    "pillars": make_pillars_map,
+    "open": lambda: make_arena_map(256),
+}
+
+
+def bench_map(name):
+    """
+    (GridMap, Lightmap o None) de un mapa integrado o de
+    assets/maps/{name}.map (los integrados no tienen luces)
+    """
+    if name in BENCH_MAPS:
+        return GridMap(BENCH_MAPS[name]()), None
+    level = load_map(name)
+    return level.grid, level.lightmap
+
+
+def tile_center(tile):
+    return (tile[0] + 0.5) * Config.TILE_SIZE, (tile[1] + 0.5) * Config.TILE_SIZE
+
+
+def path_spin(game_map, frames):
+    """Giro completo en el tile libre más cercano al centro del mapa"""
+    cx, cy = game_map.width / 2, game_map.height / 2
+    tile = min(game_map.free_tiles().tolist(), key=lambda t: (t[0] + 0.5 - cx) ** 2 + (t[1] + 0.5 - cy) ** 2)
+    x, y = tile_center(tile)
+    return [(x, y, 2 * math.pi * i / frames) for i in range(frames)]
+
+
+def path_walk(game_map, frames):
+    """
+    Ida y vuelta por la fila libre más larga, mirando hacia donde camina con
+    un leve balanceo de la cámara
+    """
+    best = None
+    for y, row in enumerate(game_map.to_rows()):
+        start = None
+        for x, tile in enumerate(row + [1]):
+            if tile == 0 and start is None:
+                start = x
+            elif tile != 0 and start is not None:
+                if best is None or x - start > best[2] - best[1]:
+                    best = (y, start, x)
+                start = None
+
+    y, first, last = best
+    y_pos = (y + 0.5) * Config.TILE_SIZE
+    x0 = (first + 0.5) * Config.TILE_SIZE
+    x1 = (last - 0.5) * Config.TILE_SIZE
+    half = max(1, frames // 2)
+    poses = []
+    for i in range(frames):
+        if i < half:
+            x, angle = x0 + (x1 - x0) * i / half, 0.0
+        else:
+            x, angle = x1 - (x1 - x0) * (i - half) / max(1, frames - half), math.pi
+        poses.append((x, y_pos, angle + 0.3 * math.sin(i * 0.1)))
+    return poses
+
+
+CAMERA_PATHS = {
+    "spin": path_spin,
+    "walk": path_walk,
+}
+
+
+def make_entities(game_map, count, seed=0):
+    """Sprites estáticos en tiles libres elegidos con semilla fija"""
+    if count <= 0:
+        return []
+    rng = np.random.default_rng(seed)
+    tiles = game_map.free_tiles().tolist()
+    kinds = ("basic", "fast", "tank", "boss", "fireball", "lightning")
+    entities = []
+    for i in rng.integers(0, len(tiles), size=count).tolist():
+        x, y = tile_center(tiles[i])
+        entities.append(SimpleNamespace(x=x, y=y, type=kinds[len(entities) % len(kinds)]))
+    return entities
+
+
+def make_lights(game_map, count, seed=1):
+    """Bolas de fuego que orbitan tiles libres (luces dinámicas en movimiento)"""
+    if count <= 0:
+        return []
+    rng = np.random.default_rng(seed)
+    tiles = game_map.free_tiles().tolist()
+    lights = []
+    for i in rng.integers(0, len(tiles), size=count).tolist():
+        x, y = tile_center(tiles[i])
+        lights.append(SimpleNamespace(
+            name="fireball", x=x, y=y, cx=x, cy=y, alive=True, phase=rng.uniform(0, 2 * math.pi)
+        ))
+    return lights
+
+
+def move_lights(lights, frame):
+    """Posición de las luces en el frame dado (círculos de 2 tiles de radio)"""
+    radius = 2 * Config.TILE_SIZE
+    for light in lights:
+        angle = light.phase + frame * 0.05
+        light.x = light.cx + radius * math.cos(angle)
+        light.y = light.cy + radius * math.sin(angle)
+
+
+def summarize(samples):
+    """Media, máximo y percentiles (ms) de una lista de muestras"""
+    values = np.asarray(samples, dtype=np.float64)
+    summary = {"mean": float(values.mean()), "max": float(values.max())}
+    for p, value in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+        summary[f"p{p}"] = float(value)
+    return summary
+
+
+def render_frame(renderer, player, pose, entities, lights=(), frame=0):
+    """Renderiza un frame en la pose dada y retorna el tiempo (ms) del minimapa"""
+    player.x, player.y, player.angle = pose
+    if lights:
+        move_lights(lights, frame)
+        renderer.update_lights(lights)
+        renderer.particles.update(1.0 / Config.FPS, lights)
+    renderer.render_3d_view(player, entities)
+    t0 = perf_counter()
+    renderer.render_minimap(player, position=(10, 10), scale=5)
+    return (perf_counter() - t0) * 1000.0
+
+
+def run_case(renderer, game_map, poses, entities, warmup, alloc_frames, lightmap=None, lights=()):
+    """
+    Ejecuta un camino de cámara y retorna el resultado de la corrida.
+    lights: hechizos con luz que se mueven cada frame (ver make_lights)
+    """
+    renderer.set_map(game_map, lightmap=lightmap)
+    player = Player()
+    player.set_map(game_map)
+
+    # Calentamiento: caches, tablas y framebuffer
+    for frame, pose in enumerate(poses[:warmup]):
+        render_frame(renderer, player, pose, entities, lights, frame)
+
+    samples = {stage: [] for stage in STAGES}
+    start = perf_counter()
+    for frame, pose in enumerate(poses):
+        t0 = perf_counter()
+        minimap = render_frame(renderer, player, pose, entities, lights, frame)
+        frame = (perf_counter() - t0) * 1000.0
+        for stage, value in renderer.stage_times.items():
+            samples[stage].append(value)
+        samples["minimap"].append(minimap)
+        samples["frame"].append(frame)
+    elapsed = perf_counter() - start
+
+    result = {
+        "frames": len(poses),
+        "fps": len(poses) / elapsed,
+        "stages": {stage: summarize(values) for stage, values in samples.items() if values},
+    }
+
+    # Memoria: pasada aparte, tracemalloc encarece mucho cada asignación
+    if alloc_frames > 0:
+        peaks = []
+        retained = []
+        tracemalloc.start()
+        for frame, pose in enumerate(poses[:alloc_frames]):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            render_frame(renderer, player, pose, entities, lights, frame)
+            current, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+            retained.append(current - before)
+        tracemalloc.stop()
+        result["alloc"] = {
+            "frames": len(peaks),
+            "peak_bytes_mean": float(np.mean(peaks)),
+            "peak_bytes_max": int(max(peaks)),
+            "retained_bytes_total": int(sum(retained)),
+        }
+    return result
+
+
+def compare(report, baseline, tolerance):
+    """
+    Compara el p95 del frame de cada corrida contra un reporte anterior.
+    Retorna la lista de regresiones mayores a tolerance (fracción)
+    """
+    previous = {(run["map"], run["path"]): run for run in baseline.get("runs", [])}
+    regressions = []
+    for run in report["runs"]:
+        old = previous.get((run["map"], run["path"]))
+        if old is None:
+            continue
+        new_p95 = run["stages"]["frame"]["p95"]
+        old_p95 = old["stages"]["frame"]["p95"]
+        run["baseline_frame_p95"] = old_p95
+        if new_p95 > old_p95 * (1.0 + tolerance):
+            regressions.append(f"{run['map']}/{run['path']}: p95 {old_p95:.2f} -> {new_p95:.2f} ms")
+    return regressions
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Benchmark de renderizado sin ventana")
+    parser.add_argument("--maps", nargs="+", default=list(BENCH_MAPS),
+                        help="mapas integrados (%s) o nombres de assets/maps" % ", ".join(BENCH_MAPS))
+    parser.add_argument("--paths", nargs="+", default=list(CAMERA_PATHS), choices=list(CAMERA_PATHS))
+    parser.add_argument("--frames", type=int, default=240, help="frames medidos por camino")
+    parser.add_argument("--warmup", type=int, default=20, help="frames de calentamiento")
+    parser.add_argument("--alloc-frames", type=int, default=30, help="frames medidos con tracemalloc (0 = no medir)")
+    parser.add_argument("--sprites", type=int, default=8, help="cantidad de sprites en escena")
+    parser.add_argument("--lights", type=int, default=0, help="luces dinámicas en movimiento (hechizos)")
+    parser.add_argument("--width", type=int, default=Config.SCREEN_WIDTH)
+    parser.add_argument("--height", type=int, default=Config.SCREEN_HEIGHT)
+    parser.add_argument("--rays", type=int, default=Config.NUM_RAYS)
+    parser.add_argument("--engine", default=Config.RAYCAST_ENGINE, choices=("grid", "bvh"),
+                        help="motor de raycasting")
+    parser.add_argument("--scale", type=float, default=Config.RENDER_SCALE, help="resolución interna de la vista 3D")
+    parser.add_argument("--output", help="archivo JSON de salida (por defecto stdout)")
+    parser.add_argument("--baseline", help="reporte JSON anterior para comparar")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="regresión de p95 permitida (fracción)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Punto de entrada del benchmark. Retorna 1 si hay regresiones"""
+    args = parse_args(argv)
+
+    # Sin pantalla: driver dummy salvo que se indique otro en el entorno
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+    Config.SCREEN_WIDTH = args.width
+    Config.SCREEN_HEIGHT = args.height
+    Config.NUM_RAYS = args.rays
+    Config.RENDER_SCALE = args.scale
+    Config.RAYCAST_ENGINE = args.engine
+    # Cada frame se renderiza completo aunque la pose se repita
+    Config.DIRTY_RECTS = False
+
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((args.width, args.height))
+    renderer = Renderer(screen)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "video_driver": pygame.display.get_driver(),
+            "width": args.width,
+            "height": args.height,
+            "num_rays": args.rays,
+            "render_scale": args.scale,
+            "engine": Config.RAYCAST_ENGINE,
+            "backend": Config.RAYCAST_BACKEND,
+            "method": Config.RAYCAST_METHOD,
+            "skip_empty": Config.RAYCAST_SKIP_EMPTY,
+            "ray_coherence": Config.RAY_COHERENCE,
+            "workers": Config.RAYCAST_WORKERS,
+            "render_mode": Config.RENDER_MODE,
+            "floor_mode": Config.FLOOR_MODE,
+            "textured_walls": Config.TEXTURED_WALLS,
+            "sprites": args.sprites,
+            "dynamic_lights": args.lights if Config.DYNAMIC_LIGHTS else 0,
+        },
+        "runs": [],
+    }
+
+    try:
+        for map_name in args.maps:
+            game_map, lightmap = bench_map(map_name)
+            entities = make_entities(game_map, args.sprites)
+            lights = make_lights(game_map, args.lights)
+            for path_name in args.paths:
+                poses = CAMERA_PATHS[path_name](game_map, args.frames)
+                result = run_case(
+                    renderer, game_map, poses, entities, args.warmup, args.alloc_frames, lightmap, lights
+                )
+                report["runs"].append({"map": map_name, "path": path_name, **result})
+    finally:
+        renderer.raycaster.close()
+        pygame.quit()
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        report["regressions"] = regressions
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    for line in regressions:
+        print(f"Regresión: {line}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
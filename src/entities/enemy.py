@@ -58,6 +58,18 @@ class Enemy:
             self.state = "attacking"
             self.attack_player(player)
     
+    def update_hidden(self, dt):
+        """
+        Actualización barata para enemigos fuera del PVS del jugador:
+        no pueden verlo, así que no se calcula distancia ni persecución
+        """
+        if not self.alive:
+            return
+        if self.attack_cooldown > 0:
+            self.attack_cooldown -= dt
+        self.state = "idle"
+        self.idle_behavior(dt)
+    
     def idle_behavior(self, dt):
         """Comportamiento cuando está inactivo"""
         # Movimiento aleatorio ocasional
@@ -128,11 +140,42 @@ class EnemyManager:
         self.enemies.append(enemy)
         return enemy
     
-    def update_all(self, dt, player):
-        """Actualiza todos los enemigos"""
-        for enemy in self.enemies:
-            if enemy.alive:
+    def update_all(self, dt, player, pvs=None):
+        """
+        Actualiza todos los enemigos. Con pvs (PotentiallyVisibleSet del
+        nivel), los que están fuera de la vista del jugador solo hacen la
+        actualización barata
+        """
+        if pvs is None:
+            for enemy in self.enemies:
+                if enemy.alive:
+                    enemy.update(dt, player)
+            return
+        
+        visible = self.visible_mask(pvs, player.x, player.y)
+        for enemy, in_view in zip(self.enemies, visible):
+            if not enemy.alive:
+                continue
+            if in_view:
                 enemy.update(dt, player)
+            else:
+                enemy.update_hidden(dt)
+    
+    def visible_mask(self, pvs, x, y):
+        """Lista de booleanos: enemigos que pueden verse desde (x, y)"""
+        count = len(self.enemies)
+        if count == 0:
+            return []
+        xs = [e.x for e in self.enemies]
+        ys = [e.y for e in self.enemies]
+        return pvs.visible_mask(x, y, xs, ys).tolist()
+    
+    def get_visible_enemies(self, pvs, x, y):
+        """Enemigos vivos que pueden verse desde (x, y) según el PVS"""
+        return [
+            e for e, in_view in zip(self.enemies, self.visible_mask(pvs, x, y))
+            if in_view and e.alive
+        ]
     
     def remove_dead(self):
         """Remueve enemigos muertos de la lista"""
@@ -3,6 +3,7 @@ Entidad Player completa con movimiento y colisiones.
 """
 import math
 from src.game.config import Config
+from src.world.grid_map import GridMap
 
 class Player:
     def __init__(self, x=300, y=300, angle=0.0, health=100):
@@ -26,8 +27,8 @@ class Player:
         self.pitch = 0.0
     
     def set_map(self, game_map):
-        """Establece la referencia al mapa para colisiones"""
-        self.game_map = game_map
+        """Establece la referencia al mapa para colisiones (GridMap o matriz 2D)"""
+        self.game_map = GridMap.from_map(game_map) if game_map is not None else None
     
     def check_collision(self, x, y):
         """
@@ -37,18 +38,8 @@ class Player:
         if self.game_map is None:
             return False
         
-        # Convertir posición a coordenadas del mapa
-        map_x = int(x // Config.TILE_SIZE)
-        map_y = int(y // Config.TILE_SIZE)
-        
-        # Verificar límites del mapa
-        if map_y < 0 or map_y >= len(self.game_map):
-            return True
-        if map_x < 0 or map_x >= len(self.game_map[0]):
-            return True
-        
-        # Verificar si hay pared
-        return self.game_map[map_y][map_x] != 0
+        # Fuera del mapa el borde del GridMap cuenta como pared
+        return self.game_map.is_solid_at(x, y)
     
     def check_collision_circle(self, x, y):
         """
@@ -85,8 +76,10 @@ class Player:
             speed = self.move_speed
         
         # Calcular desplazamiento (CORREGIDO: multiplicador ajustado)
-        move_x = (math.cos(self.angle) * forward - math.sin(self.angle) * strafe) * speed * dt * 100
-        move_y = (math.sin(self.angle) * forward + math.cos(self.angle) * strafe) * speed * dt * 100
+        cos_a = math.cos(self.angle)
+        sin_a = math.sin(self.angle)
+        move_x = (cos_a * forward - sin_a * strafe) * speed * dt * 100
+        move_y = (sin_a * forward + cos_a * strafe) * speed * dt * 100
         
         # Nueva posición propuesta
         new_x = self.x + move_x
@@ -1,15 +1,34 @@
 """
 Stub mínimo para hechizos (Spell).
 """
+import math
+from src.game.config import Config
+
 class Spell:
-	def __init__(self, name: str, damage: int = 10, speed: float = 5.0):
+	def __init__(self, name: str, damage: int = 10, speed: float = 5.0, x: float = 0.0, y: float = 0.0, angle: float = 0.0):
 		self.name = name
 		self.damage = int(damage)
 		self.speed = float(speed)
 
+		# Posición y dirección del proyectil (para dibujarlo como sprite)
+		self.x = float(x)
+		self.y = float(y)
+		self.angle = float(angle)
+		self.alive = True
+		self.traveled = 0.0
+
 	def update(self, dt: float):
-		# Placeholder para mover o aplicar efectos
-		pass
+		# Avanzar en línea recta hasta recorrer MAX_DEPTH
+		if not self.alive:
+			return
+		dir_x = math.cos(self.angle)
+		dir_y = math.sin(self.angle)
+		step = self.speed * dt * 60
+		self.x += dir_x * step
+		self.y += dir_y * step
+		self.traveled += step
+		if self.traveled >= Config.MAX_DEPTH:
+			self.alive = False
 
 	def on_hit(self, target):
 		# Aplicar daño al objetivo si tiene `take_damage`
@@ -17,3 +36,4 @@ class Spell:
 			target.take_damage(self.damage)
 		except Exception:
 			pass
+		self.alive = False
@@ -9,6 +9,8 @@ class Config:
     SCREEN_WIDTH = 1280
     SCREEN_HEIGHT = 720
     FPS = 60
+    IDLE_FPS = 10  # Tasa del loop en menú y pausa (solo redibuja ante eventos)
+    DIRTY_RECTS = True  # Si la vista 3D no cambió, actualizar solo los rects del HUD que cambiaron
     
     # Configuración de raycasting
     FOV = math.pi / 3  # 60 grados
@@ -17,9 +19,95 @@ class Config:
     MAX_DEPTH = 800  # Distancia máxima de visión
     DELTA_ANGLE = FOV / NUM_RAYS
     
+    # Resolución dinámica: ajusta Renderer.render_scale (entre RENDER_SCALE_MIN
+    # y RENDER_SCALE_MAX) para sostener FPS
+    DYNAMIC_RESOLUTION = True
+    DYNRES_WINDOW = 30  # Frames promediados antes de decidir
+    DYNRES_COOLDOWN = 30  # Frames de espera tras un cambio
+    DYNRES_DOWN_THRESHOLD = 1.0  # Bajar si el promedio supera el presupuesto
+    DYNRES_UP_THRESHOLD = 0.7  # Subir si el promedio queda por debajo del 70%
+    DYNRES_DOWN_STEP = 0.8  # Factor al bajar
+    DYNRES_UP_STEP = 1.15  # Factor al subir
+    
+    RAYCAST_METHOD = "dda"  # "dda" (tile a tile) o "step" (pixel a pixel, original)
+    RAYCAST_BACKEND = "numpy"  # "numpy" (todos los rayos en lote) o "python" (rayo a rayo)
+    RAYCAST_SKIP_EMPTY = "auto"  # Saltar bloques vacíos (pirámide de ocupación): True, False o "auto"
+    OCCUPANCY_BLOCKS = (4, 16)  # Tamaños de bloque (tiles) de la pirámide de ocupación
+    OCCUPANCY_MIN_SKIP = 8  # "auto": saltar si el bloque vacío medio de los tiles libres es de al menos 8 tiles
+    RAYCAST_ENGINE = "grid"  # "grid" (recorre tiles) o "bvh" (segmentos de pared fusionados en una BVH, admite paredes en ángulo)
+    BVH_LEAF_SIZE = 4  # Segmentos por hoja de la BVH
+    BVH_PACKET_SIZE = 32  # Rayos vecinos que recorren la BVH juntos (descartan cajas fuera de su cuña)
+    RAY_COHERENCE = True  # Reutilizar impactos entre frames al rotar o sin moverse (ángulo alineado a la grilla de rayos)
+    RAYCAST_WORKERS = 0  # Hilos para repartir columnas (0 o 1 = sin paralelismo)
+    RAYCAST_PARALLEL_MIN_RAYS = 256  # Por debajo de esta cantidad no conviene repartir
+    RENDER_MODE = "framebuffer"  # "framebuffer" (arreglo NumPy + un blit) o "rects" (un rect por columna)
+    RENDER_SCALE = 1.0  # Resolución interna de la vista 3D respecto a la ventana (ej: 0.5, 1/3)
+    RENDER_SCALE_MIN = 0.25  # Límites de Renderer.render_scale (lo ajusta la resolución dinámica)
+    RENDER_SCALE_MAX = 1.0
+    RENDER_SMOOTH = False  # Escalado suavizado (smoothscale) en lugar de pixeles duplicados
+    
     # Tamaño del mapa
     TILE_SIZE = 64
     
+    # Texturas de pared
+    TEXTURED_WALLS = True
+    TEXTURE_SIZE = 64  # Las texturas se escalan a TEXTURE_SIZE x TEXTURE_SIZE
+    WALL_TEXTURES = {1: "stone", 2: "wood", 3: "metal"}  # tipo -> assets/textures/{nombre}
+    TEXTURE_CACHE_SIZE = 4096  # Columnas escaladas guardadas en cache (LRU)
+    TEXTURE_HEIGHT_STEP = 2  # Cuantización de la altura de columna (pixeles)
+    
+    # Piso y techo
+    FLOOR_MODE = "gradient"  # "gradient" (fondo precalculado), "textured" (floor casting) o "flat"
+    FLOOR_TEXTURE = "floor"  # assets/textures/{nombre}
+    CEILING_TEXTURE = "ceiling"
+    FLOOR_SHADE_LEVELS = 16  # Niveles de sombreado por distancia del piso/techo
+
+    # Colormap: sombreado por niveles de distancia, niebla y tinte (tablas precalculadas)
+    SHADE_LEVELS = 32  # Niveles de distancia de las paredes
+    MIN_SHADE = 0.3  # Brillo mínimo a MAX_DEPTH
+    PALETTE_SIZE = 4096  # Colores máximos de la paleta de texturas de pared
+    FOG_COLOR = None  # Color de niebla, ej: (60, 60, 80); None = sin niebla
+    FOG_START = 0  # Distancia donde empieza la niebla
+    FLASH_DURATION = 0.3  # Duración (s) de los destellos de color
+    FLASH_STRENGTH = 0.35  # Intensidad inicial de los destellos (0-1)
+    FLASH_STEPS = 4  # Pasos de desvanecimiento (redibujos de la vista 3D)
+    
+    # Luces estáticas del mapa horneadas por tile (ver src/world/lightmap.py)
+    LIGHT_LEVELS = 8  # Niveles de luz de las tablas del colormap
+    LIGHT_AMBIENT = 0.35  # Luz mínima de los mapas con luces (0-1)
+    LIGHT_RADIUS = 6  # Alcance por defecto de una luz (tiles)
+    LIGHT_INTENSITY = 1.0  # Intensidad por defecto de una luz
+    LIGHT_OVERBRIGHT = 0.5  # Brillo extra máximo sobre la luz plena (luces dinámicas)
+    LIGHT_OVERBRIGHT_LEVELS = 2  # Niveles extra de las tablas del colormap para ese brillo
+    
+    # Luces dinámicas de los hechizos en vuelo (ver src/world/dynamic_lights.py)
+    DYNAMIC_LIGHTS = True
+    SPELL_LIGHTS = {"fireball": (3, 0.8), "lightning": (4, 1.0)}  # hechizo -> (radio en tiles, intensidad)
+    
+    # Sprites (enemigos y hechizos)
+    SPRITE_CACHE_SIZE = 512  # Sprites escalados guardados en cache (LRU)
+    SPRITE_SIZE_STEP = 4  # Cuantización del tamaño en pantalla (pixeles)
+    SPRITE_NEAR = 8  # Distancia mínima para dibujar un sprite
+    
+    # Partículas de los hechizos (ver src/rendering/particles.py)
+    PARTICLES_MAX = 8192  # Tamaño del pool (partículas vivas a la vez)
+    PARTICLE_SIZE = 3  # Tamaño en el mundo (pixeles)
+    PARTICLE_MAX_PIXELS = 4  # Tamaño máximo en pantalla (pixeles)
+    PARTICLE_GRAVITY = 240.0  # Aceleración hacia el piso (pixeles/s²)
+    PARTICLE_DRAG = 1.5  # Frenado del aire (fracción de la velocidad por segundo)
+    PARTICLE_BOUNCE = 0.4  # Velocidad conservada al rebotar en el piso o el techo
+    # hechizo -> (color, estela por segundo, ráfaga al terminar, vida en segundos, velocidad en pixeles/s)
+    SPELL_PARTICLES = {
+        "fireball": ((255, 140, 30), 60, 400, 0.8, 160.0),
+        "lightning": ((255, 255, 120), 90, 300, 0.4, 260.0),
+    }
+    
+    # HUD
+    TEXT_CACHE_SIZE = 256  # Textos renderizados guardados en cache (LRU)
+    
+    # Minimapa
+    MINIMAP_VIEW_TILES = None  # Radio en tiles alrededor del jugador (None = mapa completo)
+    
     # Colores
     BLACK = (0, 0, 0)
     WHITE = (255, 255, 255)
@@ -39,6 +127,11 @@ class Config:
     # Spawn del jugador
     # Usar un tile específico (col, row). Si es None, se elegirá automáticamente
     SPAWN_TILE = None  # ejemplo: (1, 1)
+
+    # Niveles (assets/maps/{nombre}.map, compilados a un cache binario)
+    START_LEVEL = "arena"
+    LEVELS = ["arena", "columnas"]  # Orden de rotación con TAB
+    MAP_CACHE = True
     
     # Configuración de voz
     VOICE_LANGUAGE = "es-ES"  # Español
@@ -52,6 +145,10 @@ class Config:
         "trueno": "lightning",
         "relámpago": "lightning"
     }
+    SPELL_KEYS = {"1": "fireball", "2": "lightning"}  # Teclas (pygame.key.name) para lanzar sin voz
+    SPELL_STATS = {"fireball": (25, 6.0), "lightning": (15, 10.0)}  # hechizo -> (daño, velocidad)
+    SPELL_COOLDOWN = 0.3  # Segundos mínimos entre dos hechizos
+    SPELL_HIT_RADIUS = 20  # Distancia de impacto contra enemigos (pixeles)
     
     # Fases del juego
     PHASES = {
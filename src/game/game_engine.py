@@ -9,10 +9,27 @@ from collections import deque
 from .state_manager import StateManager, GameState
 from .config import Config
 from src.rendering.renderer import Renderer
+from src.rendering.hud import Hud, TextCache
+from src.rendering.resolution import DynamicResolution
 from src.entities.player import Player
+from src.entities.spell import Spell
+from src.world.grid_map import GridMap
+from src.world.map_loader import load_map, MapData
+from src.entities.enemy import EnemyManager
 from src.input.keyboard import KeyboardHandler
 from src.input.voice_handler import VoiceHandler
 
+# Eventos que obligan a redibujar las pantallas estáticas (menú/pausa)
+REDRAW_EVENTS = {
+    pygame.KEYDOWN,
+    pygame.VIDEOEXPOSE,
+    pygame.VIDEORESIZE,
+    pygame.WINDOWEXPOSED,
+    pygame.WINDOWSHOWN,
+    pygame.WINDOWRESTORED,
+    pygame.WINDOWFOCUSGAINED,
+}
+
 
 class GameEngine:
     def __init__(self, screen):
@@ -23,6 +40,7 @@ class GameEngine:
         # Inicializar sistemas
         self.state_manager = StateManager()
         self.renderer = Renderer(screen)
+        self.dynamic_resolution = DynamicResolution(self.renderer) if Config.DYNAMIC_RESOLUTION else None
         self.keyboard_handler = KeyboardHandler()
 
         # Reconocimiento de voz (estado y buffer)
@@ -30,21 +48,21 @@ class GameEngine:
         self._voice_lock = threading.Lock()
         self.recognized_words = deque(maxlen=10)
         self._voice_error = None
-
-        # Cargar mapa y generar un punto de spawn seguro (centro de un tile libre)
-        from src.rendering.raycaster import EXAMPLE_MAP
-        tile = getattr(Config, "SPAWN_TILE", None)
-        spawn_x = spawn_y = None
-        if tile is not None and isinstance(tile, tuple) and len(tile) == 2:
-            col, row = int(tile[0]), int(tile[1])
-            if 0 <= row < len(EXAMPLE_MAP) and 0 <= col < len(EXAMPLE_MAP[0]) and EXAMPLE_MAP[row][col] == 0:
-                spawn_x = col * Config.TILE_SIZE + Config.TILE_SIZE // 2
-                spawn_y = row * Config.TILE_SIZE + Config.TILE_SIZE // 2
-        if spawn_x is None:
-            spawn_x, spawn_y = self._find_spawn_center(EXAMPLE_MAP)
-        self.player = Player(x=spawn_x, y=spawn_y, angle=0)
-        # Pasar el mapa al jugador para colisiones
-        self.player.set_map(EXAMPLE_MAP)
+        # Hechizos pedidos por voz, pendientes de lanzar en el hilo del juego
+        self._pending_spells = []
+
+        # Jugador, enemigos y hechizos activos (se dibujan como sprites)
+        self.player = Player(angle=0)
+        self.enemy_manager = EnemyManager()
+        self.spells = []
+        self._spell_cooldown = 0.0
+
+        # Cargar el nivel inicial (un solo GridMap compartido por renderer,
+        # colisiones y minimapa) y ubicar al jugador en su spawn
+        self.level = None
+        self.level_name = None
+        self.game_map = None
+        self.load_level(Config.START_LEVEL)
 
         # Font para UI
         self.font = pygame.font.Font(None, 36)
@@ -59,28 +77,106 @@ class GameEngine:
             self.voice_handler = None
             self._voice_error = str(e)
 
+        # HUD: textos en cache y etiquetas que solo se re-renderizan al cambiar
+        self.text_cache = TextCache()
+        self.hud = self._build_hud()
+
+        # Pantallas estáticas (menú y pausa) compuestas una vez y redibujadas
+        # solo cuando llega un evento o cambia el estado
+        self._menu_screen = None
+        self._pause_screen = None
+        self._needs_redraw = True
+        self._minimap_rect = None
+
+    def load_level(self, name):
+        """Carga un nivel de assets/maps y reinicia jugador, enemigos y hechizos"""
+        try:
+            level = load_map(name, use_cache=Config.MAP_CACHE)
+        except FileNotFoundError:
+            # Sin archivo de mapa se usa el mapa de ejemplo embebido
+            from src.rendering.raycaster import EXAMPLE_MAP
+            print(f"Mapa '{name}' no encontrado, usando el mapa de ejemplo")
+            level = MapData.from_rows(name, EXAMPLE_MAP)
+
+        self.level = level
+        self.level_name = name
+        self.game_map = level.grid
+        self.renderer.set_map(self.game_map, level.pvs, level.lightmap, level.segments)
+        # Pasar el mapa al jugador para colisiones
+        self.player.set_map(self.game_map)
+
+        spawn_x, spawn_y = self._spawn_position(level)
+        self.player.x, self.player.y = float(spawn_x), float(spawn_y)
+        self.player.angle = 0.0
+
+        self.spells.clear()
+        self.enemy_manager.clear_all()
+        for col, row, enemy_type in level.enemy_spawns:
+            x, y = self._tile_center(col, row)
+            self.enemy_manager.add_enemy(x, y, enemy_type)
+
+    def cast_spell(self, name):
+        """
+        Lanza el hechizo name desde el jugador hacia donde mira.
+        Retorna el Spell, o None si está en enfriamiento o no existe
+        """
+        if self._spell_cooldown > 0 or name not in Config.SPELL_STATS:
+            return None
+        damage, speed = Config.SPELL_STATS[name]
+        spell = Spell(name, damage, speed, self.player.x, self.player.y, self.player.angle)
+        self.spells.append(spell)
+        self._spell_cooldown = Config.SPELL_COOLDOWN
+        return spell
+
+    def next_level(self):
+        """Pasa al siguiente nivel de Config.LEVELS"""
+        levels = Config.LEVELS
+        index = levels.index(self.level_name) + 1 if self.level_name in levels else 0
+        self.load_level(levels[index % len(levels)])
+
     def run(self):
         """Loop principal del juego"""
+        last_state = None
         while self.running:
-            dt = self.clock.tick(Config.FPS) / 1000.0
+            # Fuera del juego (menú/pausa) el loop baja a una tasa de espera
+            if self.state_manager.get_state() == GameState.PLAYING:
+                dt = self.clock.tick(Config.FPS) / 1000.0
+            else:
+                dt = self.clock.tick(Config.IDLE_FPS) / 1000.0
 
             # Manejar eventos
             self.handle_events()
 
             # Actualizar según estado
             current_state = self.state_manager.get_state()
+            if current_state != last_state:
+                self.on_state_enter(current_state)
+                last_state = current_state
+
+            if current_state == GameState.PLAYING:
+                # Ajustar resolución con el tiempo real del frame anterior (sin la
+                # espera); los frames sin vista 3D nueva no cuentan
+                if self.dynamic_resolution is not None and self.renderer.view_changed:
+                    self.dynamic_resolution.record(self.clock.get_rawtime())
+
+                # Tras un evento de ventana o un cambio de estado la pantalla
+                # ya no tiene el último frame: se renderiza completa
+                if self._needs_redraw:
+                    self.renderer.invalidate_view()
+                    self._needs_redraw = False
 
-            if current_state == GameState.MENU:
-                self.update_menu()
-            elif current_state == GameState.PLAYING:
                 self.update_game(dt)
-            elif current_state == GameState.PAUSED:
-                self.update_pause()
-
-            # Renderizar
-            self.render(current_state)
-
-            pygame.display.flip()
+                dirty = self.render(current_state)
+                if dirty is None:
+                    pygame.display.flip()
+                elif dirty:
+                    # Solo cambió el HUD: se copian a la ventana esos rects
+                    pygame.display.update(dirty)
+            elif self._needs_redraw:
+                # Pantallas estáticas: solo se redibujan ante eventos o cambios de estado
+                self.render(current_state)
+                pygame.display.flip()
+                self._needs_redraw = False
 
         # Al salir, detener hilo de voz si está activo
         if self.voice_handler is not None:
@@ -89,16 +185,34 @@ class GameEngine:
             except Exception:
                 pass
 
+        # Detener el pool de hilos del raycaster
+        self.renderer.raycaster.close()
+
+    def on_state_enter(self, state):
+        """Prepara la composición al entrar a un estado"""
+        self._needs_redraw = True
+        if self.dynamic_resolution is not None:
+            self.dynamic_resolution.reset()
+        if state == GameState.PAUSED:
+            self.capture_pause_screen()
+        else:
+            self._pause_screen = None
+
     def handle_events(self):
         """Maneja los eventos de pygame"""
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 self.running = False
 
-            # Manejo de estados con ESC
+            # Eventos que invalidan las pantallas estáticas
+            if event.type in REDRAW_EVENTS:
+                self._needs_redraw = True
+
             if event.type == pygame.KEYDOWN:
+                current_state = self.state_manager.get_state()
+
+                # Manejo de estados con ESC
                 if event.key == pygame.K_ESCAPE:
-                    current_state = self.state_manager.get_state()
                     if current_state == GameState.PLAYING:
                         self.state_manager.change_state(GameState.PAUSED)
                         self.keyboard_handler.release_mouse()
@@ -108,12 +222,20 @@ class GameEngine:
                     elif current_state == GameState.MENU:
                         self.running = False
 
-    def update_menu(self):
-        """Actualiza lógica del menú"""
-        keys = pygame.key.get_pressed()
-        if keys[pygame.K_RETURN]:
-            self.state_manager.change_state(GameState.PLAYING)
-            self.keyboard_handler.capture_mouse()
+                # Teclas del menú y la pausa (por evento: el loop corre a IDLE_FPS)
+                elif current_state == GameState.PLAYING and event.key == pygame.K_TAB:
+                    self.next_level()
+                elif current_state == GameState.PLAYING and pygame.key.name(event.key) in Config.SPELL_KEYS:
+                    self.cast_spell(Config.SPELL_KEYS[pygame.key.name(event.key)])
+                elif current_state == GameState.MENU and event.key == pygame.K_RETURN:
+                    self.state_manager.change_state(GameState.PLAYING)
+                    self.keyboard_handler.capture_mouse()
+                elif current_state == GameState.PAUSED and event.key == pygame.K_r:
+                    self.state_manager.change_state(GameState.PLAYING)
+                    self.keyboard_handler.capture_mouse()
+                elif current_state == GameState.PAUSED and event.key == pygame.K_m:
+                    self.state_manager.change_state(GameState.MENU)
+                    self.keyboard_handler.release_mouse()
 
     def update_game(self, dt):
         """Actualiza lógica del juego"""
@@ -123,120 +245,245 @@ class GameEngine:
         # Actualizar jugador
         self.player.update(dt)
 
-    def update_pause(self):
-        """Actualiza lógica de pausa"""
-        keys = pygame.key.get_pressed()
-        if keys[pygame.K_r]:
-            self.state_manager.change_state(GameState.PLAYING)
-            self.keyboard_handler.capture_mouse()
-        if keys[pygame.K_m]:
-            self.state_manager.change_state(GameState.MENU)
-            self.keyboard_handler.release_mouse()
+        # Hechizos pedidos por voz (llegan desde el hilo de reconocimiento)
+        self._spell_cooldown = max(0.0, self._spell_cooldown - dt)
+        with self._voice_lock:
+            pending, self._pending_spells = self._pending_spells, []
+        for name in pending:
+            self.cast_spell(name)
+
+        # Actualizar enemigos y proyectiles
+        health = self.player.health
+        self.enemy_manager.update_all(dt, self.player, self.level.pvs)
+        enemies = self.enemy_manager.get_alive_enemies()
+        hit_radius = Config.SPELL_HIT_RADIUS
+        for spell in self.spells:
+            x, y = spell.x, spell.y
+            spell.update(dt)
+            if spell.alive and self.game_map.is_solid_at(spell.x, spell.y):
+                # Choca contra la pared: la ráfaga sale del último punto libre
+                spell.x, spell.y = x, y
+                spell.alive = False
+            for enemy in enemies:
+                if not spell.alive:
+                    break
+                if enemy.alive and abs(enemy.x - spell.x) < hit_radius and abs(enemy.y - spell.y) < hit_radius:
+                    spell.on_hit(enemy)
+        # Estela de los hechizos y ráfaga de los que terminaron este frame
+        self.renderer.particles.update(dt, self.spells)
+        self.spells = [s for s in self.spells if s.alive]
+        self.renderer.update_lights(self.spells)
+
+        # Destello rojo al recibir daño (tinte posterior de la vista 3D, ver Colormap.flash_blend)
+        if self.player.health < health:
+            self.renderer.colormap.flash(Config.RED)
+        self.renderer.colormap.update(dt)
 
     def render(self, state):
-        """Renderiza el frame actual"""
-        self.screen.fill(Config.BLACK)
-
+        """
+        Renderiza el frame actual. Retorna la lista de rects de pantalla que
+        cambiaron, o None si hay que actualizar la pantalla completa
+        """
         if state == GameState.MENU:
             self.render_menu()
         elif state == GameState.PLAYING:
-            self.render_game()
+            # La vista 3D cubre toda la pantalla: no hace falta limpiarla
+            return self.render_game()
         elif state == GameState.PAUSED:
             self.render_pause()
+        return None
 
     def render_menu(self):
-        """Renderiza el menú principal"""
-        title = self.font.render("MAGE ARENA 3D", True, Config.YELLOW)
-        start = self.small_font.render("Presiona ENTER para jugar", True, Config.WHITE)
-        quit_text = self.small_font.render("Presiona ESC para salir", True, Config.WHITE)
+        """Renderiza el menú principal (pantalla estática en cache)"""
+        if self._menu_screen is None:
+            menu_screen = pygame.Surface(self.screen.get_size())
+            menu_screen.fill(Config.BLACK)
+
+            title = self.text_cache.render(self.font, "MAGE ARENA 3D", Config.YELLOW)
+            start = self.text_cache.render(self.small_font, "Presiona ENTER para jugar", Config.WHITE)
+            quit_text = self.text_cache.render(self.small_font, "Presiona ESC para salir", Config.WHITE)
+
+            menu_screen.blit(title, (Config.SCREEN_WIDTH // 2 - title.get_width() // 2, 200))
+            menu_screen.blit(start, (Config.SCREEN_WIDTH // 2 - start.get_width() // 2, 350))
+            menu_screen.blit(quit_text, (Config.SCREEN_WIDTH // 2 - quit_text.get_width() // 2, 400))
+            self._menu_screen = menu_screen
 
-        self.screen.blit(title, (Config.SCREEN_WIDTH // 2 - title.get_width() // 2, 200))
-        self.screen.blit(start, (Config.SCREEN_WIDTH // 2 - start.get_width() // 2, 350))
-        self.screen.blit(quit_text, (Config.SCREEN_WIDTH // 2 - quit_text.get_width() // 2, 400))
+        self.screen.blit(self._menu_screen, (0, 0))
 
     def render_game(self):
-        """Renderiza el juego"""
-        # Renderizar vista 3D
-        self.renderer.render_3d_view(self.player)
+        """
+        Renderiza el juego. Retorna None si se redibujó la vista 3D o la
+        lista de rects modificados si solo cambió el HUD (ver redraw_overlays)
+        """
+        # Renderizar vista 3D (con Config.DIRTY_RECTS se omite si no cambió)
+        if not self.renderer.render_3d_view(self.player, self.get_render_entities()):
+            dirty = self.redraw_overlays()
+            if dirty is not None:
+                return dirty
 
         # Renderizar minimap (útil para debug)
-        self.renderer.render_minimap(self.player, position=(10, 10), scale=5)
+        self._minimap_rect = self.draw_minimap()
 
-        # Renderizar HUD simple
-        health_text = self.small_font.render(
-            f"Salud: {self.player.health}/{self.player.max_health}",
-            True, Config.GREEN,
-        )
-        position_text = self.small_font.render(
-            f"Pos: ({int(self.player.x)}, {int(self.player.y)})",
-            True, Config.WHITE,
-        )
-        map_pos = self.player.get_map_position()
-        tile_text = self.small_font.render(
-            f"Tile: ({map_pos[0]}, {map_pos[1]})",
-            True, Config.WHITE,
-        )
-        angle_text = self.small_font.render(
-            f"Ángulo: {int(math.degrees(self.player.angle))}°",
-            True, Config.WHITE,
-        )
-        controls_text = self.small_font.render(
-            "WASD: Mover | Mouse: Mirar | ESC: Pausa",
-            True, Config.GRAY,
-        )
+        # Renderizar HUD (solo se rasterizan los textos cuyo valor cambió)
+        self.hud.draw(self.screen)
+        return None
 
-        self.screen.blit(health_text, (Config.SCREEN_WIDTH - 250, 10))
-        self.screen.blit(position_text, (Config.SCREEN_WIDTH - 250, 40))
-        self.screen.blit(tile_text, (Config.SCREEN_WIDTH - 250, 70))
-        self.screen.blit(angle_text, (Config.SCREEN_WIDTH - 250, 100))
-        self.screen.blit(controls_text, (10, Config.SCREEN_HEIGHT - 30))
+    def draw_minimap(self):
+        return self.renderer.render_minimap(self.player, position=(10, 10), scale=5)
 
-        # Mostrar palabras reconocidas por voz (debajo del minimapa)
-        if self.voice_handler is None and self._voice_error:
-            voice_text = self.small_font.render(
-                f"Voz: desactivada ({self._voice_error})", True, Config.RED
-            )
-            self.screen.blit(voice_text, (10, 70))
-        else:
-            with self._voice_lock:
-                words = list(self.recognized_words)
-            txt = "Voz: " + (" ".join(words[-8:]) if words else "(esperando...)")
-            voice_text = self.small_font.render(txt, True, Config.YELLOW)
-            self.screen.blit(voice_text, (10, 70))
+    def redraw_overlays(self):
+        """
+        Con la vista 3D sin cambios redibuja solo las etiquetas del HUD cuyo
+        valor cambió, reponiendo la vista bajo el texto anterior. Minimapa y
+        textos son translúcidos, así que todo lo que se superpone con el área
+        repuesta se repone y redibuja entero. Retorna los rects modificados,
+        o None si hay que redibujar todo
+        """
+        changed = self.hud.refresh()
+        if not changed:
+            return []
+
+        if self._minimap_rect is None or any(label.rect is None for label in changed):
+            # Nunca se dibujaron: se repone la vista entera y se dibuja todo
+            self.renderer.restore_view([self.screen.get_rect()])
+            return None
+
+        dirty = []
+        for label in changed:
+            dirty.append(label.rect)
+            dirty.append(label.bounds())
+
+        # Capas en orden de dibujo: se agregan las que tocan el área sucia
+        # hasta que no crece más
+        layers = [(self._minimap_rect, None)]
+        layers += [(label.rect, label) for label in self.hud.labels]
+        redraw = [False] * len(layers)
+        grew = True
+        while grew:
+            grew = False
+            for i, (rect, _) in enumerate(layers):
+                if not redraw[i] and rect is not None and rect.collidelist(dirty) != -1:
+                    redraw[i] = True
+                    dirty.append(rect)
+                    grew = True
+
+        if not self.renderer.restore_view(dirty):
+            return None
+        for (rect, label), needed in zip(layers, redraw):
+            if not needed:
+                continue
+            if label is None:
+                self._minimap_rect = self.draw_minimap()
+            else:
+                label.draw(self.screen)
+        return dirty
 
     def render_pause(self):
-        """Renderiza menú de pausa"""
+        """Renderiza menú de pausa (compuesto una sola vez al entrar)"""
+        if self._pause_screen is None:
+            self.capture_pause_screen()
+        self.screen.blit(self._pause_screen, (0, 0))
+
+    def capture_pause_screen(self):
+        """
+        Compone la pantalla de pausa una vez: último frame del juego,
+        oscurecido, con los textos encima
+        """
         # Renderizar el juego detrás
-        self.renderer.render_3d_view(self.player)
+        self.screen.fill(Config.BLACK)
+        self.renderer.invalidate_view()
+        self.renderer.render_3d_view(self.player, self.get_render_entities())
+        pause_screen = self.screen.copy()
 
         # Oscurecer fondo
-        overlay = pygame.Surface((Config.SCREEN_WIDTH, Config.SCREEN_HEIGHT))
+        overlay = pygame.Surface(pause_screen.get_size())
         overlay.set_alpha(128)
         overlay.fill(Config.BLACK)
-        self.screen.blit(overlay, (0, 0))
+        pause_screen.blit(overlay, (0, 0))
+
+        pause_text = self.text_cache.render(self.font, "PAUSA", Config.YELLOW)
+        resume = self.text_cache.render(self.small_font, "R - Reanudar", Config.WHITE)
+        menu = self.text_cache.render(self.small_font, "M - Menú Principal", Config.WHITE)
 
-        pause_text = self.font.render("PAUSA", True, Config.YELLOW)
-        resume = self.small_font.render("R - Reanudar", True, Config.WHITE)
-        menu = self.small_font.render("M - Menú Principal", True, Config.WHITE)
+        pause_screen.blit(pause_text, (Config.SCREEN_WIDTH // 2 - pause_text.get_width() // 2, 250))
+        pause_screen.blit(resume, (Config.SCREEN_WIDTH // 2 - resume.get_width() // 2, 350))
+        pause_screen.blit(menu, (Config.SCREEN_WIDTH // 2 - menu.get_width() // 2, 400))
+        self._pause_screen = pause_screen
 
-        self.screen.blit(pause_text, (Config.SCREEN_WIDTH // 2 - pause_text.get_width() // 2, 250))
-        self.screen.blit(resume, (Config.SCREEN_WIDTH // 2 - resume.get_width() // 2, 350))
-        self.screen.blit(menu, (Config.SCREEN_WIDTH // 2 - menu.get_width() // 2, 400))
+    def get_render_entities(self):
+        """Entidades vivas que se dibujan como sprites"""
+        return self.enemy_manager.get_alive_enemies() + self.spells
+
+    def _build_hud(self):
+        """Crea las etiquetas del HUD ligadas al estado del jugador y la voz"""
+        hud = Hud(self.text_cache)
+        player = self.player
+
+        hud.add_label(
+            self.small_font, "Salud: {}/{}", Config.GREEN, (Config.SCREEN_WIDTH - 250, 10),
+            lambda: (player.health, player.max_health),
+        )
+        hud.add_label(
+            self.small_font, "Pos: ({}, {})", Config.WHITE, (Config.SCREEN_WIDTH - 250, 40),
+            lambda: (int(player.x), int(player.y)),
+        )
+        hud.add_label(
+            self.small_font, "Tile: ({}, {})", Config.WHITE, (Config.SCREEN_WIDTH - 250, 70),
+            player.get_map_position,
+        )
+        hud.add_label(
+            self.small_font, "Ángulo: {}°", Config.WHITE, (Config.SCREEN_WIDTH - 250, 100),
+            lambda: int(math.degrees(player.angle)),
+        )
+        hud.add_label(
+            self.small_font, "WASD: Mover | Mouse: Mirar | ESC: Pausa", Config.GRAY,
+            (10, Config.SCREEN_HEIGHT - 30),
+        )
+
+        # Mostrar palabras reconocidas por voz (debajo del minimapa)
+        if self.voice_handler is None and self._voice_error:
+            hud.add_label(
+                self.small_font, "Voz: desactivada ({})", Config.RED, (10, 70),
+                lambda: self._voice_error,
+            )
+        else:
+            hud.add_label(self.small_font, "Voz: {}", Config.YELLOW, (10, 70), self._voice_text)
+        return hud
+
+    def _voice_text(self):
+        """Texto con las últimas palabras reconocidas por voz"""
+        with self._voice_lock:
+            words = list(self.recognized_words)
+        return " ".join(words[-8:]) if words else "(esperando...)"
+
+    def _tile_center(self, col, row):
+        return col * Config.TILE_SIZE + Config.TILE_SIZE // 2, row * Config.TILE_SIZE + Config.TILE_SIZE // 2
+
+    def _spawn_position(self, level):
+        """Spawn del jugador: Config.SPAWN_TILE, luego el del mapa, luego el primer tile libre"""
+        for tile in (getattr(Config, "SPAWN_TILE", None), level.player_spawn):
+            if tile is not None and isinstance(tile, tuple) and len(tile) == 2:
+                col, row = int(tile[0]), int(tile[1])
+                # tile() retorna el borde (pared) fuera del mapa
+                if level.grid.tile(col, row) == 0:
+                    return self._tile_center(col, row)
+
+        free = level.table("free_tiles")
+        if len(free):
+            return self._tile_center(*free[0].tolist())
+        return self._find_spawn_center(level.grid)
 
     def _find_spawn_center(self, game_map):
         """Busca el primer tile libre (valor 0) y retorna su centro en pixeles.
         Evita los bordes para minimizar spawn pegado a paredes.
         """
-        height = len(game_map)
-        width = len(game_map[0]) if height else 0
-
-        # Buscar dentro del contorno (evitar borde)
-        for row in range(1, max(0, height - 1)):
-            for col in range(1, max(0, width - 1)):
-                if game_map[row][col] == 0:
-                    x = col * Config.TILE_SIZE + Config.TILE_SIZE // 2
-                    y = row * Config.TILE_SIZE + Config.TILE_SIZE // 2
-                    return x, y
+        # Buscar dentro del contorno (evitar borde), en orden de filas
+        free = GridMap.from_map(game_map).free_tiles(margin=1)
+        if len(free):
+            col, row = free[0].tolist()
+            x = col * Config.TILE_SIZE + Config.TILE_SIZE // 2
+            y = row * Config.TILE_SIZE + Config.TILE_SIZE // 2
+            return x, y
 
         # Fallback: tile (1,1) centrado si no hay libres detectados
         fallback_x = Config.TILE_SIZE + Config.TILE_SIZE // 2
@@ -248,6 +495,9 @@ class GameEngine:
         parts = [p.strip() for p in text.split() if p.strip()]
         if not parts:
             return
+        spell = self.voice_handler.text_to_spell(text.lower())
         with self._voice_lock:
             for p in parts:
                 self.recognized_words.append(p)
+            if spell is not None:
+                self._pending_spells.append(spell)
@@ -7,11 +7,19 @@ Exporta los módulos principales del paquete rendering.
 from . import renderer
 from . import raycaster
 from . import textures
+from . import tables
+from . import hud
+from . import colormap
+from . import particles
 
 __all__ = [
 	'renderer',
 	'raycaster',
 	'textures',
+	'tables',
+	'hud',
+	'colormap',
+	'particles',
 ]
 """
 Paquete de renderizado.
@@ -24,9 +32,17 @@ si algún archivo aún está vacío.
 from . import renderer
 from . import raycaster
 from . import textures
+from . import tables
+from . import hud
+from . import colormap
+from . import particles
 
 __all__ = [
 	'renderer',
 	'raycaster',
 	'textures',
+	'tables',
+	'hud',
+	'colormap',
+	'particles',
 ]
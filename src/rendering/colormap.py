@@ -0,0 +1,223 @@
+"""
+Colormap de sombreado por distancia
+Al estilo de los motores de 8 bits: la distancia se cuantiza en
+Config.SHADE_LEVELS niveles y para cada nivel se precalcula el color final
+(sombreado, niebla y tinte) de cada entrada de una paleta. Sombrear un pixel
+pasa a ser un índice en una tabla; cambiar la niebla o el tinte solo
+reconstruye las tablas (niveles x colores de paleta), nunca los pixeles.
+Las tablas iluminadas agregan Config.LIGHT_LEVELS niveles de luz del
+lightmap: la fila es nivel_de_luz * niveles + nivel_de_distancia. Encima de
+la luz plena hay Config.LIGHT_OVERBRIGHT_LEVELS niveles más brillantes para
+las luces dinámicas.
+Los destellos (flash) cambian en cada paso de su desvanecimiento: no entran
+en las tablas sino que se aplican como un tinte posterior sobre la vista ya
+dibujada (ver flash_blend).
+"""
+import numpy as np
+from src.game.config import Config
+
+
+def build_palette(images, max_colors=None):
+    """
+    Paleta común para un lote de imágenes RGB (..., 3) uint8.
+    Si hay más de max_colors colores distintos se descartan bits bajos hasta
+    que entren. Retorna (paleta (P, 3) uint8, índices uint16 con la forma de
+    images sin el último eje)
+    """
+    max_colors = max_colors or Config.PALETTE_SIZE
+    images = np.asarray(images, dtype=np.uint8)
+    colors = images.reshape(-1, 3)
+    for dropped in range(8):
+        quantized = (colors >> dropped) << dropped
+        keys = (
+            quantized[:, 0].astype(np.uint32) << 16
+            | quantized[:, 1].astype(np.uint32) << 8
+            | quantized[:, 2]
+        )
+        unique, inverse = np.unique(keys, return_inverse=True)
+        if len(unique) <= max_colors:
+            break
+    palette = np.stack([unique >> 16, (unique >> 8) & 255, unique & 255], axis=1).astype(np.uint8)
+    return palette, inverse.reshape(images.shape[:-1]).astype(np.uint16)
+
+
+class Colormap:
+    def __init__(self, levels=None):
+        self.levels = levels or Config.SHADE_LEVELS
+        self.light_levels = Config.LIGHT_LEVELS
+        self.overbright_levels = Config.LIGHT_OVERBRIGHT_LEVELS
+        self._light_table = None
+        self.fog_color = Config.FOG_COLOR
+        self.fog_start = Config.FOG_START
+
+        # Tinte actual (color, intensidad 0-1) y destello que se desvanece
+        # (intensidad actual en flash_strength, fuera de las tablas)
+        self.tint_color = (0, 0, 0)
+        self.tint_strength = 0.0
+        self._flash_color = None
+        self._flash_time = 0.0
+        self._flash_duration = 0.0
+        self._flash_strength = 0.0
+        self.flash_strength = 0.0
+
+        # Se incrementa en cada cambio: las tablas derivadas se reconstruyen
+        self.version = 0
+
+    def bucket(self, distance):
+        """Nivel de sombreado de un arreglo de distancias"""
+        scale = self.levels / Config.MAX_DEPTH
+        return np.minimum((np.asarray(distance) * scale).astype(np.intp), self.levels - 1)
+
+    def bucket_of(self, distance):
+        """Nivel de sombreado de una distancia escalar"""
+        return min(int(distance * self.levels / Config.MAX_DEPTH), self.levels - 1)
+
+    def light_scales(self):
+        """
+        Brillo de cada nivel de luz de las tablas iluminadas: de 0 a 1 (luz
+        plena) y luego los niveles extra hasta 1 + Config.LIGHT_OVERBRIGHT
+        """
+        base = np.arange(self.light_levels) / max(1, self.light_levels - 1)
+        extra = np.arange(1, self.overbright_levels + 1) / max(1, self.overbright_levels)
+        return np.concatenate((base, 1.0 + extra * Config.LIGHT_OVERBRIGHT))
+    
+    def light_table(self):
+        """
+        Nivel de luz de cada valor del lightmap: 0-255 hasta luz plena y
+        valores mayores (luces dinámicas) hasta 255 * (1 + LIGHT_OVERBRIGHT)
+        """
+        key = (self.light_levels, self.overbright_levels, Config.LIGHT_OVERBRIGHT)
+        if self._light_table is None or self._light_table[0] != key:
+            values = np.arange(int(255 * (1.0 + Config.LIGHT_OVERBRIGHT)) + 1)
+            table = (np.minimum(values, 255) * (self.light_levels - 1) + 127) // 255
+            if self.overbright_levels and Config.LIGHT_OVERBRIGHT > 0:
+                over = np.maximum(values - 255, 0) * self.overbright_levels / (255 * Config.LIGHT_OVERBRIGHT)
+                table += np.minimum((over + 0.5).astype(np.intp), self.overbright_levels)
+            self._light_table = (key, table.astype(np.intp))
+        return self._light_table[1]
+    
+    def light_rows(self, light, levels=None):
+        """
+        Offset de fila de las tablas iluminadas para valores de luz del
+        lightmap (ver light_table): nivel_de_luz * levels
+        """
+        levels = levels or self.levels
+        return np.take(self.light_table(), light, mode='clip') * levels
+
+    def params(self, levels=None, lit=False):
+        """
+        Coeficientes por nivel: color_final = color * mul + add.
+        Retorna (mul, add) de forma (levels, 3), o (niveles_de_luz * levels, 3)
+        si lit (la luz escala el sombreado antes de la niebla y el tinte; ver
+        light_scales)
+        """
+        levels = levels or self.levels
+        # Distancia en el centro de cada nivel
+        distance = (np.arange(levels) + 0.5) / levels * Config.MAX_DEPTH
+        shade = np.maximum(Config.MIN_SHADE, 1 - distance / Config.MAX_DEPTH)
+        if lit:
+            light = self.light_scales()
+            shade = np.outer(light, shade).ravel()
+            distance = np.tile(distance, len(light))
+        mul = np.repeat(shade[:, None], 3, axis=1)
+        add = np.zeros((len(shade), 3))
+
+        if self.fog_color is not None:
+            span = max(1.0, Config.MAX_DEPTH - self.fog_start)
+            fog = np.clip((distance - self.fog_start) / span, 0.0, 1.0)[:, None]
+            mul *= 1 - fog
+            add += np.asarray(self.fog_color, dtype=np.float64) * fog
+
+        strength = self.tint_strength
+        if strength > 0:
+            mul *= 1 - strength
+            add = add * (1 - strength) + np.asarray(self.tint_color, dtype=np.float64) * strength
+        return mul, add
+
+    def shade(self, colors, levels=None, lit=False):
+        """
+        Colores RGB (..., 3) sombreados en todos los niveles.
+        Retorna uint8 (levels, ..., 3), o (niveles_de_luz * levels, ..., 3) si lit
+        """
+        mul, add = self.params(levels, lit)
+        colors = np.asarray(colors, dtype=np.float64)
+        shape = (len(mul),) + (1,) * (colors.ndim - 1) + (3,)
+        shaded = colors[None] * mul.reshape(shape) + add.reshape(shape)
+        return np.clip(shaded + 0.5, 0, 255).astype(np.uint8)
+
+    def shade_list(self, colors, lit=False):
+        """
+        Tabla de tuplas [nivel][índice] para el camino escalar (pygame.draw).
+        colors: lista de colores RGB
+        """
+        shaded = self.shade(colors, lit=lit)
+        return [[tuple(color) for color in level.tolist()] for level in shaded]
+
+    def blend_params(self, bucket, lit=False):
+        """
+        (mul, add) de un nivel como colores 0-255 para blits con
+        BLEND_RGB_MULT y BLEND_RGB_ADD
+        """
+        return self.blend_table(lit)[bucket]
+
+    def blend_table(self, lit=False):
+        """(mul, add) de blit de todos los niveles (ver blend_params)"""
+        mul, add = self.params(lit=lit)
+        mul = np.clip(mul * 255 + 0.5, 0, 255).astype(int).tolist()
+        add = np.clip(add + 0.5, 0, 255).astype(int).tolist()
+        return [(tuple(m), tuple(a)) for m, a in zip(mul, add)]
+
+    def set_fog(self, color, start=0.0):
+        """Activa niebla hacia color a partir de start (None la desactiva)"""
+        self.fog_color = color
+        self.fog_start = start
+        self.version += 1
+
+    def set_tint(self, color, strength):
+        """Tiñe toda la escena hacia color con la intensidad dada (0-1)"""
+        strength = max(0.0, min(1.0, strength))
+        if (tuple(color), strength) != (tuple(self.tint_color), self.tint_strength):
+            self.tint_color = tuple(color)
+            self.tint_strength = strength
+            self.version += 1
+
+    def flash(self, color, strength=None, duration=None):
+        """Destello de color que se desvanece (ver update y flash_blend)"""
+        self._flash_color = tuple(color)
+        self._flash_strength = Config.FLASH_STRENGTH if strength is None else strength
+        self._flash_duration = Config.FLASH_DURATION if duration is None else duration
+        self._flash_time = self._flash_duration
+        self.update(0.0)
+
+    def update(self, dt):
+        """
+        Avanza el destello. La intensidad se cuantiza en Config.FLASH_STEPS
+        para que la vista 3D solo se redibuje unas pocas veces
+        """
+        if self._flash_color is None:
+            return
+        self._flash_time = max(0.0, self._flash_time - dt)
+        steps = Config.FLASH_STEPS
+        fraction = self._flash_time / self._flash_duration if self._flash_duration > 0 else 0.0
+        level = int(fraction * steps + 0.999)
+        self.flash_strength = self._flash_strength * level / steps
+        if self._flash_time <= 0:
+            self._flash_color = None
+
+    @property
+    def flash_key(self):
+        """Estado visible del destello (para la clave de la vista en cache)"""
+        return (self._flash_color, self.flash_strength) if self.flash_strength > 0 else None
+
+    def flash_blend(self):
+        """
+        (mul, add) del destello actual como colores 0-255 para blits con
+        BLEND_RGB_MULT y BLEND_RGB_ADD sobre la vista ya sombreada, o None
+        si no hay destello. Como el tinte de params: color * (1 - s) + flash * s
+        """
+        strength = self.flash_strength
+        if strength <= 0:
+            return None
+        mul = int(255 * (1 - strength) + 0.5)
+        add = tuple(int(c * strength + 0.5) for c in self._flash_color)
+        return (mul, mul, mul), add
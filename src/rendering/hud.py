@@ -0,0 +1,106 @@
+"""
+Capa de HUD
+Cache de superficies de texto y etiquetas ligadas a valores del juego que
+solo se vuelven a rasterizar cuando su valor cambia.
+"""
+from collections import OrderedDict
+from src.game.config import Config
+
+
+class TextCache:
+    """Cache LRU acotada de textos renderizados, con clave (font, texto, color, antialias)"""
+
+    def __init__(self, max_size=None):
+        self.max_size = max_size or Config.TEXT_CACHE_SIZE
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color, antialias=True):
+        """Equivalente a font.render pero reutilizando la Surface si ya existe"""
+        key = (font, text, tuple(color), antialias)
+        surface = self._cache.get(key)
+        if surface is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self._cache[key] = surface
+        if len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self._cache.clear()
+
+
+class HudLabel:
+    """
+    Etiqueta de texto ligada a un valor.
+    source: función sin argumentos que retorna el valor actual; el texto se
+    arma con template.format(*valor) (o format(valor) si no es tupla) y solo
+    se re-renderiza cuando el valor cambia.
+    """
+
+    def __init__(self, font, template, color, position, source=None, text_cache=None):
+        self.font = font
+        self.template = template
+        self.color = color
+        self.position = position
+        self.source = source
+        self.text_cache = text_cache
+        self.surface = None
+        self._value = None
+        # Rect ocupado en pantalla por el último draw
+        self.rect = None
+
+    def refresh(self):
+        """Actualiza la Surface si cambió el valor. Retorna True si cambió"""
+        value = self.source() if self.source is not None else ()
+        if self.surface is not None and value == self._value:
+            return False
+
+        self._value = value
+        if isinstance(value, tuple):
+            text = self.template.format(*value)
+        else:
+            text = self.template.format(value)
+
+        if self.text_cache is not None:
+            self.surface = self.text_cache.render(self.font, text, self.color)
+        else:
+            self.surface = self.font.render(text, True, self.color)
+        return True
+
+    def bounds(self):
+        """Rect que ocupará el texto actual al dibujarlo"""
+        return self.surface.get_rect(topleft=self.position)
+
+    def draw(self, screen):
+        """Dibuja la etiqueta y retorna el rect que ocupa"""
+        self.refresh()
+        self.rect = screen.blit(self.surface, self.position)
+        return self.rect
+
+
+class Hud:
+    """Conjunto de etiquetas que se dibujan juntas"""
+
+    def __init__(self, text_cache=None):
+        self.text_cache = text_cache
+        self.labels = []
+
+    def add_label(self, font, template, color, position, source=None):
+        label = HudLabel(font, template, color, position, source, self.text_cache)
+        self.labels.append(label)
+        return label
+
+    def draw(self, screen):
+        """Dibuja todas las etiquetas. Retorna sus rects"""
+        return [label.draw(screen) for label in self.labels]
+
+    def refresh(self):
+        """Actualiza los textos sin dibujarlos. Retorna las etiquetas que cambiaron"""
+        return [label for label in self.labels if label.refresh()]
@@ -0,0 +1,42 @@
+"""
+Backend paralelo de raycasting
+Reparte las columnas del frame entre un pool de hilos persistente. Cada hilo
+ejecuta el kernel NumPy (RayCaster.cast_batch) sobre su bloque de rayos y
+escribe directo en su tramo del arreglo de salida, así que no hay que
+juntar resultados. Los kernels NumPy liberan el GIL en las operaciones sobre
+arreglos, por lo que los bloques avanzan en paralelo.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from src.game.config import Config
+
+
+class ParallelCaster:
+    def __init__(self, raycaster, workers=None):
+        self.raycaster = raycaster
+        self.workers = workers or Config.RAYCAST_WORKERS
+        # El pool se crea una sola vez y se reutiliza en todos los frames
+        self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="raycast")
+
+    def cast_batch(self, ox, oy, dir_x, dir_y, out):
+        """
+        Igual que RayCaster.cast_batch pero dividiendo los rayos en bloques
+        contiguos, uno por hilo. Escribe el resultado en out y lo retorna
+        """
+        count = len(dir_x)
+        bounds = np.linspace(0, count, self.workers + 1).astype(int)
+        futures = [
+            self.pool.submit(
+                self.raycaster.cast_batch, ox, oy,
+                dir_x[start:end], dir_y[start:end], out[start:end],
+            )
+            for start, end in zip(bounds[:-1], bounds[1:])
+            if end > start
+        ]
+        for future in futures:
+            # Propaga cualquier excepción de los hilos
+            future.result()
+        return out
+
+    def close(self):
+        self.pool.shutdown(wait=True)
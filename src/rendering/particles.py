@@ -0,0 +1,241 @@
+"""
+Partículas de los hechizos
+Todas las partículas viven en un pool preasignado de arreglos por campo
+(estructura de arreglos): posición, velocidad y vida en state, color en
+colors. Las vivas ocupan las primeras count posiciones: emitir escribe a
+continuación y las que mueren se compactan al final de cada update, sin
+crear un objeto por partícula. La simulación y el dibujo son operaciones
+NumPy sobre todo el lote, así una ráfaga de miles de partículas no hace
+llamadas Python por partícula.
+"""
+import math
+import numpy as np
+import pygame
+from src.game.config import Config
+from src.rendering.tables import get_ray_tables
+
+# Filas de ParticleSystem.state (posición y velocidad en pixeles, z = altura sobre el piso)
+X, Y, Z, VX, VY, VZ, LIFE, MAX_LIFE = range(8)
+FIELDS = 8
+
+
+def pack_colors(surface, colors):
+    """Colores RGB (..., 3) al valor de pixel empaquetado de surface (como Surface.map_rgb)"""
+    colors = colors.astype(np.uint32)
+    shifts = surface.get_shifts()
+    losses = surface.get_losses()
+    return (
+        ((colors[..., 0] >> losses[0]) << shifts[0])
+        | ((colors[..., 1] >> losses[1]) << shifts[1])
+        | ((colors[..., 2] >> losses[2]) << shifts[2])
+    )
+
+
+class ParticleSystem:
+    def __init__(self, capacity=None, seed=None):
+        """
+        capacity: partículas vivas a la vez (Config.PARTICLES_MAX por defecto);
+        si el pool está lleno las nuevas se descartan
+        """
+        self.capacity = capacity or Config.PARTICLES_MAX
+        self.state = np.zeros((FIELDS, self.capacity), dtype=np.float32)
+        self.colors = np.zeros((self.capacity, 3), dtype=np.uint8)
+        self.count = 0
+        self.grid = None
+        self.rng = np.random.default_rng(seed)
+        # Se incrementa en cada cambio (invalida la vista en cache del renderer)
+        self.version = 0
+        self.drawn = 0
+
+    def set_map(self, grid):
+        """Cambia el GridMap contra el que chocan las partículas y vacía el pool"""
+        self.grid = grid
+        self.clear()
+
+    def clear(self):
+        self.count = 0
+        self.version += 1
+
+    def emit(self, xs, ys, zs, colors, speed, life):
+        """
+        Emite una partícula por cada origen (xs, ys, zs) en dirección
+        aleatoria. colors, speed y life son por partícula o comunes a todas.
+        Retorna la cantidad emitida (se corta si se llena el pool)
+        """
+        total = len(xs)
+        n = min(total, self.capacity - self.count)
+        if n <= 0:
+            return 0
+        start = self.count
+        end = start + n
+        state = self.state[:, start:end]
+        rng = self.rng
+
+        state[X] = xs[:n]
+        state[Y] = ys[:n]
+        state[Z] = np.broadcast_to(zs, total)[:n]
+
+        # Dirección uniforme en la esfera, con rapidez entre 30% y 100%
+        heading = rng.uniform(0.0, 2.0 * math.pi, n)
+        vertical = rng.uniform(-1.0, 1.0, n)
+        planar = np.sqrt(1.0 - vertical * vertical) * np.broadcast_to(speed, total)[:n] * rng.uniform(0.3, 1.0, n)
+        state[VX] = planar * np.cos(heading)
+        state[VY] = planar * np.sin(heading)
+        state[VZ] = vertical * np.broadcast_to(speed, total)[:n]
+
+        state[MAX_LIFE] = np.broadcast_to(life, total)[:n] * rng.uniform(0.5, 1.0, n)
+        state[LIFE] = state[MAX_LIFE]
+        self.colors[start:end] = np.broadcast_to(colors, (total, 3))[:n]
+        self.count = end
+        return n
+
+    def emit_spells(self, spells, dt):
+        """
+        Estela de los hechizos vivos y ráfaga de los que terminaron (se
+        llama antes de descartarlos), según Config.SPELL_PARTICLES. Junta
+        todos los orígenes y emite en una sola llamada
+        """
+        origins = []
+        for spell in spells:
+            effect = Config.SPELL_PARTICLES.get(getattr(spell, "name", None))
+            if effect is None:
+                continue
+            color, rate, burst, life, speed = effect
+            if spell.alive:
+                # Redondeo aleatorio: la estela promedia rate partículas por segundo
+                count = int(rate * dt + self.rng.random())
+                speed *= 0.25
+            else:
+                count = burst
+            if count:
+                origins.append((spell.x, spell.y, count, color, speed, life))
+        if not origins:
+            return 0
+
+        xs, ys, counts, colors, speeds, lives = zip(*origins)
+        counts = np.array(counts)
+        return self.emit(
+            np.repeat(np.array(xs, dtype=np.float32), counts),
+            np.repeat(np.array(ys, dtype=np.float32), counts),
+            Config.TILE_SIZE / 2,  # Los hechizos flotan a la altura de los ojos
+            np.repeat(np.array(colors, dtype=np.uint8), counts, axis=0),
+            np.repeat(np.array(speeds, dtype=np.float32), counts),
+            np.repeat(np.array(lives, dtype=np.float32), counts),
+        )
+
+    def update(self, dt, spells=()):
+        """
+        Emite las partículas de spells y avanza la simulación dt segundos:
+        gravedad, frenado, rebote en piso y techo. Mueren al agotar su vida
+        o al entrar en una pared, y las vivas se compactan al inicio del pool
+        """
+        if spells:
+            self.emit_spells(spells, dt)
+        count = self.count
+        if not count:
+            return
+        state = self.state[:, :count]
+
+        state[VZ] -= Config.PARTICLE_GRAVITY * dt
+        state[VX:VZ + 1] *= max(0.0, 1.0 - Config.PARTICLE_DRAG * dt)
+        state[X:Z + 1] += state[VX:VZ + 1] * dt
+
+        ceiling = Config.TILE_SIZE
+        bounced = (state[Z] < 0) | (state[Z] > ceiling)
+        state[VZ][bounced] *= -Config.PARTICLE_BOUNCE
+        np.clip(state[Z], 0, ceiling, out=state[Z])
+
+        state[LIFE] -= dt
+        alive = state[LIFE] > 0
+        if self.grid is not None:
+            alive &= self.grid.tiles_at(state[X], state[Y]) == 0
+        if not alive.all():
+            live = int(np.count_nonzero(alive))
+            self.state[:, :live] = state[:, alive]
+            self.colors[:live] = self.colors[:count][alive]
+            self.count = live
+        self.version += 1
+
+    def render(self, surface, player, depth_buffer):
+        """
+        Dibuja las partículas sobre surface como cuadrados de 1 a
+        Config.PARTICLE_MAX_PIXELS pixeles, escribiendo directo en el arreglo
+        de pixeles. Cada columna se recorta contra depth_buffer (distancia
+        perpendicular por rayo) y las más cercanas tapan a las lejanas.
+        Retorna la cantidad de partículas dibujadas
+        """
+        self.drawn = 0
+        count = self.count
+        if not count:
+            return 0
+
+        width, height = surface.get_size()
+        tables = get_ray_tables()
+        state = self.state[:, :count]
+        cos_a = math.cos(player.angle)
+        sin_a = math.sin(player.angle)
+        side = Config.PARTICLE_MAX_PIXELS
+
+        # Proyección como en SpriteRenderer.project
+        dx = state[X] - player.x
+        dy = state[Y] - player.y
+        depth = dx * cos_a + dy * sin_a
+        ahead = np.flatnonzero(depth > Config.SPRITE_NEAR)
+        if ahead.size == 0:
+            return 0
+        depth = depth[ahead]
+        lateral = dy[ahead] * cos_a - dx[ahead] * sin_a
+        scale = height / depth
+        screen_x = (np.arctan2(lateral, depth) + tables.half_fov) * (width / tables.fov)
+        screen_y = (Config.TILE_SIZE / 2 - state[Z][ahead]) * scale + height // 2
+        on_screen = (screen_x > -side) & (screen_x < width + side) & (screen_y > -side) & (screen_y < height + side)
+        visible = np.flatnonzero(on_screen)
+        if visible.size == 0:
+            return 0
+
+        # Del más lejano al más cercano: en la escritura gana la última
+        visible = visible[np.argsort(-depth[visible])]
+        depth = depth[visible]
+        size = np.clip(Config.PARTICLE_SIZE * scale[visible], 1, side).astype(np.intp)
+        left = screen_x[visible].astype(np.intp) - size // 2
+        top = screen_y[visible].astype(np.intp) - size // 2
+
+        # Se apagan hacia el final de su vida
+        slots = ahead[visible]
+        fade = np.clip(state[LIFE][slots] / state[MAX_LIFE][slots] * 2.0, 0.35, 1.0)
+        colors = (self.colors[slots] * fade[:, None]).astype(np.uint8)
+        if surface.get_bytesize() == 4:
+            pixels = pygame.surfarray.pixels2d(surface)
+            colors = pack_colors(surface, colors)
+        else:
+            pixels = pygame.surfarray.pixels3d(surface)
+        # Con filas contiguas (lo habitual) se escribe por índice plano y * ancho + x
+        flat = pixels.T.reshape(-1) if pixels.ndim == 2 and pixels.T.flags.c_contiguous else None
+
+        column_depth = depth_buffer[tables.column_rays(width)]
+        # Por tamaño de menor a mayor: el tamaño crece al acercarse, así que
+        # el orden de dibujo sigue siendo de lejos a cerca
+        for size_px in range(1, side + 1):
+            group = np.flatnonzero(size == size_px)
+            if group.size == 0:
+                continue
+            offsets = np.arange(size_px)
+            px = left[group, None, None] + offsets
+            py = top[group, None, None] + offsets[:, None]
+            front = (px >= 0) & (px < width) & (column_depth[np.clip(px, 0, width - 1)] > depth[group, None, None])
+            mask = front & ((py >= 0) & (py < height))
+            if not mask.any():
+                continue
+            values = np.broadcast_to(colors[group, None, None], mask.shape + colors.shape[1:])[mask]
+            if flat is not None:
+                flat[(py * width + px)[mask]] = values
+            else:
+                px, py = np.broadcast_arrays(px, py)
+                pixels[px[mask], py[mask]] = values
+            self.drawn += int(np.count_nonzero(mask.any(axis=(1, 2))))
+        del pixels, flat  # Libera el lock de la Surface
+        return self.drawn
+
+    @property
+    def nbytes(self):
+        return self.state.nbytes + self.colors.nbytes
@@ -4,58 +4,896 @@ Implementación del algoritmo de raycasting para renderizado pseudo-3D
 Similar al usado en Wolfenstein 3D y DOOM
 """
 import math
+from collections import namedtuple
+import numpy as np
 from src.game.config import Config
+from src.rendering.tables import get_ray_tables
+from src.world.grid_map import GridMap
+from src.world.occupancy import OccupancyPyramid
+from src.world.segments import SegmentBVH
+
+# Cara de la pared golpeada por un rayo
+SIDE_VERTICAL = 0    # Borde vertical del tile (el rayo cruzó una línea x = cte)
+SIDE_HORIZONTAL = 1  # Borde horizontal del tile (el rayo cruzó una línea y = cte)
+
+# Tolerancia (fracción del largo) en los extremos de los segmentos del motor "bvh"
+SEGMENT_EPSILON = 1e-9
+
+# Registro de un rayo tal como lo consume el renderer
+RAY_DTYPE = np.dtype([
+    ('distance', np.float64),
+    ('wall_type', np.int16),
+    ('hit_x', np.float64),
+    ('hit_y', np.float64),
+    ('side', np.int8),
+    ('tex_u', np.float64),
+])
+
+
+# Pose con la que se lanzaron los rayos de un frame (ver RayCaster.view_angle)
+ViewPose = namedtuple('ViewPose', ['x', 'y', 'angle'])
+
+
+class RayCoherence:
+    """
+    Cache de coherencia entre frames: impactos (distancia euclidiana) por
+    ángulo absoluto cuantizado a la separación entre rayos. Son válidos para
+    una posición, un estado del mapa y una configuración (la "pose"); al
+    rotar solo se lanzan los rayos de los ángulos que entran en el FOV
+    """
+    EMPTY = np.iinfo(np.int64).min
+    
+    def __init__(self):
+        self.pose = None
+        # Anillo de impactos: slot = clave de ángulo % tamaño, keys guarda la clave
+        self.keys = np.empty(0, dtype=np.int64)
+        self.rays = np.empty(0, dtype=RAY_DTYPE)
+        # (ángulo base, rayos) del último frame, para poses idénticas
+        self.frame = None
+        self.reused = 0
+        self.cast = 0
+    
+    def prepare(self, pose, size):
+        """Descarta los impactos si cambió la pose"""
+        if pose != self.pose or len(self.keys) != size:
+            self.pose = pose
+            self.keys = np.full(size, self.EMPTY, dtype=np.int64)
+            self.rays = np.empty(size, dtype=RAY_DTYPE)
+            self.frame = None
+    
+    def clear(self):
+        self.pose = None
+        self.frame = None
+
 
 class RayCaster:
     # Inicializa el raycaster con el mapa del juego
-    def __init__(self, game_map):
-        # game_map: matriz 2D donde 0 = espacio vacío, >0 = pared
-        self.map = game_map
-        self.map_width = len(game_map[0])
-        self.map_height = len(game_map)
+    def __init__(self, game_map, segments=()):
+        # game_map: GridMap o matriz 2D donde 0 = espacio vacío, >0 = pared
+        # segments: paredes en ángulo (x0, y0, x1, y1, tipo) en tiles, solo
+        # para el motor "bvh"
+        self.map = GridMap.from_map(game_map)
+        self.map_width = self.map.width
+        self.map_height = self.map.height
+        self.segments = list(segments)
+        
+        # Pirámide de ocupación para saltar bloques vacíos (ver cast_batch_skip)
+        self.occupancy = OccupancyPyramid(self.map)
+        
+        # BVH de segmentos del motor "bvh" (se arma al primer uso, ver segment_bvh)
+        self.bvh = None
+        
+        # Pool de hilos para repartir columnas (se crea una vez, si está activo)
+        self.parallel = None
+        if Config.RAYCAST_WORKERS > 1:
+            from src.rendering.parallel import ParallelCaster
+            self.parallel = ParallelCaster(self)
+        
+        # Coherencia entre frames y ángulo con el que se lanzó el último frame
+        self.coherence = RayCoherence()
+        self.view_angle = 0.0
     
     def cast_rays(self, player_x, player_y, player_angle):
         '''
         Lanza rayos desde la posición del jugador
-        Retorna lista de (distancia, tipo_pared, hit_x, hit_y) para cada rayo
+        Retorna un arreglo estructurado RAY_DTYPE con un registro por rayo
+        (distance, wall_type, hit_x, hit_y, side, tex_u)
+        Con Config.RAY_COHERENCE se reutilizan impactos de frames anteriores
+        (ver cast_rays_coherent). view_angle queda con el ángulo realmente usado
+        '''
+        if Config.RAY_COHERENCE:
+            return self.cast_rays_coherent(player_x, player_y, player_angle)
+        
+        self.view_angle = player_angle
+        if Config.RAYCAST_BACKEND == "python":
+            return self.cast_rays_python(player_x, player_y, player_angle)
+        
+        # Direcciones de todos los rayos del frame a partir de las tablas
+        tables = get_ray_tables()
+        dir_x, dir_y = tables.ray_directions(math.cos(player_angle), math.sin(player_angle))
+        
+        if self.parallel is not None and len(dir_x) >= Config.RAYCAST_PARALLEL_MIN_RAYS:
+            rays = np.empty(len(dir_x), dtype=RAY_DTYPE)
+            self.parallel.cast_batch(player_x, player_y, dir_x, dir_y, rays)
+        else:
+            rays = self.cast_batch(player_x, player_y, dir_x, dir_y)
+        
+        # Corrección de ojo de pez
+        rays['distance'] *= tables.fisheye
+        
+        return rays
+    
+    def cast_rays_coherent(self, player_x, player_y, player_angle):
+        '''
+        cast_rays con cache de coherencia. El ángulo se alinea a la grilla
+        absoluta de separación entre rayos (a lo sumo medio rayo de
+        diferencia), así que al rotar los rayos caen exactamente sobre
+        ángulos ya lanzados desde la misma posición y solo se lanzan los
+        nuevos. Con la pose sin cambios se retorna el mismo arreglo del frame
+        anterior (no debe modificarse). Moverse, editar el mapa o cambiar la
+        resolución invalida el cache
+        '''
+        tables = get_ray_tables()
+        step = tables.delta_angle
+        base = round(player_angle / step)
+        self.view_angle = base * step
+        count = tables.num_rays
+        
+        cache = self.coherence
+        pose = (
+            player_x, player_y, id(self.map), self.map.version, tables.key,
+            Config.MAX_DEPTH, Config.TILE_SIZE, Config.RAYCAST_BACKEND,
+            Config.RAYCAST_METHOD, Config.RAYCAST_SKIP_EMPTY, Config.RAYCAST_ENGINE,
+        )
+        # El anillo cubre una vuelta completa más un FOV
+        cache.prepare(pose, math.ceil(2 * math.pi / step) + count + 1)
+        if cache.frame is not None and cache.frame[0] == base:
+            cache.reused += count
+            return cache.frame[1]
+        
+        # Clave de ángulo absoluto de cada rayo: ángulo = clave * step - half_fov
+        keys = base + np.arange(count)
+        slots = keys % len(cache.keys)
+        missing = np.flatnonzero(cache.keys[slots] != keys)
+        if missing.size:
+            angles = keys[missing] * step - tables.half_fov
+            new_slots = slots[missing]
+            cache.rays[new_slots] = self.cast_directions(
+                player_x, player_y, np.cos(angles), np.sin(angles)
+            )
+            cache.keys[new_slots] = keys[missing]
+        cache.cast += missing.size
+        cache.reused += count - missing.size
+        
+        rays = cache.rays[slots]
+        # Corrección de ojo de pez (el offset de cada rayo es exacto tras alinear)
+        rays['distance'] *= tables.fisheye
+        cache.frame = (base, rays)
+        return rays
+    
+    def cast_directions(self, ox, oy, dir_x, dir_y):
+        """
+        Lanza rayos con direcciones arbitrarias usando el backend configurado.
+        Retorna RAY_DTYPE con distancias euclidianas
+        """
+        if Config.RAYCAST_BACKEND == "python":
+            return np.array([
+                self.cast_single_ray_dir(ox, oy, dx, dy)
+                for dx, dy in zip(dir_x.tolist(), dir_y.tolist())
+            ], dtype=RAY_DTYPE)
+        if self.parallel is not None and len(dir_x) >= Config.RAYCAST_PARALLEL_MIN_RAYS:
+            rays = np.empty(len(dir_x), dtype=RAY_DTYPE)
+            return self.parallel.cast_batch(ox, oy, dir_x, dir_y, rays)
+        return self.cast_batch(ox, oy, dir_x, dir_y)
+    
+    def cast_rays_python(self, player_x, player_y, player_angle):
+        '''
+        Versión escalar de cast_rays: lanza los rayos uno a uno
+        Retorna el mismo arreglo estructurado RAY_DTYPE
         '''
         rays = []
         
-        # Ángulo inicial
-        ray_angle = player_angle - Config.HALF_FOV
+        tables = get_ray_tables()
+        cos_a = math.cos(player_angle)
+        sin_a = math.sin(player_angle)
         
-        for ray in range(Config.NUM_RAYS):
+        for cos_o, sin_o, fisheye in zip(tables.cos_offsets_list, tables.sin_offsets_list, tables.fisheye):
+            # Dirección del rayo = dirección del jugador rotada por el offset
+            dx = cos_a * cos_o - sin_a * sin_o
+            dy = sin_a * cos_o + cos_a * sin_o
+            
             # Lanzar rayo
-            distance, wall_type, hit_x, hit_y = self.cast_single_ray(
-                player_x, player_y, ray_angle
+            distance, wall_type, hit_x, hit_y, side, tex_u = self.cast_single_ray_dir(
+                player_x, player_y, dx, dy
             )
             
             # Corrección de ojo de pez
-            distance *= math.cos(player_angle - ray_angle)
+            distance *= fisheye
+            
+            rays.append((distance, wall_type, hit_x, hit_y, side, tex_u))
+        
+        return np.array(rays, dtype=RAY_DTYPE)
+    
+    def cast_batch(self, ox, oy, dir_x, dir_y, out=None):
+        """
+        Lanza un lote de rayos desde (ox, oy) con direcciones unitarias
+        (dir_x, dir_y). Retorna un arreglo RAY_DTYPE con distancias
+        euclidianas (sin corrección de ojo de pez); si se pasa out, escribe
+        ahí. Con Config.RAYCAST_ENGINE = "bvh" los rayos se intersecan con
+        los segmentos de pared (ver cast_batch_bvh); si no, recorren la
+        grilla y, si conviene (ver skips_empty), saltan los bloques vacíos
+        de la pirámide de ocupación (ver cast_batch_skip)
+        """
+        if Config.RAYCAST_ENGINE == "bvh":
+            return self.cast_batch_bvh(ox, oy, dir_x, dir_y, out)
+        if self.skips_empty():
+            return self.cast_batch_skip(ox, oy, dir_x, dir_y, out)
+        return self.cast_batch_dda(ox, oy, dir_x, dir_y, out)
+    
+    def skips_empty(self):
+        """
+        Indica si se usa el salto de bloques vacíos según
+        Config.RAYCAST_SKIP_EMPTY. Con "auto" solo se usa si el mapa tiene
+        bastante espacio abierto: cada iteración del salto cuesta más que un
+        paso de DDA y solo conviene si reemplaza varios
+        """
+        mode = Config.RAYCAST_SKIP_EMPTY
+        if mode == "auto":
+            self.occupancy.update()
+            return self.occupancy.mean_skip >= Config.OCCUPANCY_MIN_SKIP
+        return bool(mode)
+    
+    def init_rays(self, ox, oy, dir_x, dir_y, out=None):
+        """Arreglo RAY_DTYPE donde ningún rayo golpea pared (hasta MAX_DEPTH)"""
+        max_depth = Config.MAX_DEPTH
+        rays = np.empty(dir_x.shape[0], dtype=RAY_DTYPE) if out is None else out
+        rays['distance'] = max_depth
+        rays['wall_type'] = 0
+        rays['hit_x'] = ox + dir_x * max_depth
+        rays['hit_y'] = oy + dir_y * max_depth
+        rays['side'] = SIDE_VERTICAL
+        rays['tex_u'] = 0.0
+        return rays
+    
+    @staticmethod
+    def store_hits(rays, ids, ox, oy, dx, dy, dist, vertical, cell):
+        """Escribe en rays los impactos de los rayos ids (arreglos ya filtrados)"""
+        tile = Config.TILE_SIZE
+        hit_x = ox + dx * dist
+        hit_y = oy + dy * dist
+        
+        # Coordenada de textura a lo largo de la cara golpeada
+        tex_u = np.where(vertical, hit_y % tile, hit_x % tile) / tile
+        flip = np.where(vertical, dx < 0, dy > 0)
+        tex_u = np.where(flip, 1.0 - tex_u, tex_u)
+        
+        rays['distance'][ids] = dist
+        rays['wall_type'][ids] = cell
+        rays['hit_x'][ids] = hit_x
+        rays['hit_y'][ids] = hit_y
+        rays['side'][ids] = np.where(vertical, SIDE_VERTICAL, SIDE_HORIZONTAL)
+        rays['tex_u'][ids] = tex_u
+    
+    def cast_batch_dda(self, ox, oy, dir_x, dir_y, out=None):
+        """
+        cast_batch con DDA vectorizado: todos los rayos avanzan un borde de
+        tile por iteración, en paralelo, hasta golpear una pared
+        """
+        tile = Config.TILE_SIZE
+        max_depth = Config.MAX_DEPTH
+        grid = self.map.flat
+        stride = self.map.stride
+        
+        dir_x = np.asarray(dir_x, dtype=np.float64)
+        dir_y = np.asarray(dir_y, dtype=np.float64)
+        count = dir_x.shape[0]
+        
+        # Por defecto ningún rayo golpea pared
+        rays = self.init_rays(ox, oy, dir_x, dir_y, out)
+        
+        start_x = int(ox // tile)
+        start_y = int(oy // tile)
+        
+        # Desde fuera del mapa no hay garantía de chocar con el borde
+        if not (0 <= start_x < self.map_width and 0 <= start_y < self.map_height):
+            return rays
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            inv_x = 1.0 / dir_x
+            inv_y = 1.0 / dir_y
+        
+        step_x = np.where(dir_x > 0, 1, -1)
+        step_y = np.where(dir_y > 0, stride, -stride)
+        delta_x = np.abs(tile * inv_x)
+        delta_y = np.abs(tile * inv_y)
+        
+        # Distancia hasta el primer borde de cada eje (inf si el rayo es paralelo)
+        edge_x = np.where(dir_x > 0, (start_x + 1) * tile, start_x * tile)
+        edge_y = np.where(dir_y > 0, (start_y + 1) * tile, start_y * tile)
+        with np.errstate(invalid='ignore'):
+            side_dist_x = np.where(dir_x != 0, (edge_x - ox) * inv_x, np.inf)
+            side_dist_y = np.where(dir_y != 0, (edge_y - oy) * inv_y, np.inf)
+        
+        # Índice plano del tile actual de cada rayo en el mapa con borde
+        cell_index = np.full(count, self.map.flat_index(start_x, start_y), dtype=np.int64)
+        
+        # Índices de los rayos que siguen activos
+        index = np.arange(count)
+        
+        while index.size:
+            # Avanzar cada rayo al siguiente borde más cercano
+            use_x = side_dist_x < side_dist_y
+            distance = np.where(use_x, side_dist_x, side_dist_y)
+            cell_index = cell_index + np.where(use_x, step_x, step_y)
+            side_dist_x = side_dist_x + np.where(use_x, delta_x, 0.0)
+            side_dist_y = side_dist_y + np.where(use_x, 0.0, delta_y)
+            
+            # El borde sólido detiene a todos los rayos antes de salir del
+            # mapa: no hace falta verificar límites, solo la profundidad
+            inside = distance < max_depth
+            cell = grid[cell_index]
+            hit = (cell > 0) & inside
+            
+            if hit.any():
+                self.store_hits(
+                    rays, index[hit], ox, oy, dir_x[hit], dir_y[hit],
+                    distance[hit], use_x[hit], cell[hit],
+                )
+            
+            # Compactar: seguir solo con los rayos que no terminaron
+            alive = inside & ~hit
+            index = index[alive]
+            dir_x = dir_x[alive]
+            dir_y = dir_y[alive]
+            step_x = step_x[alive]
+            step_y = step_y[alive]
+            delta_x = delta_x[alive]
+            delta_y = delta_y[alive]
+            side_dist_x = side_dist_x[alive]
+            side_dist_y = side_dist_y[alive]
+            cell_index = cell_index[alive]
+        
+        return rays
+    
+    def cast_batch_skip(self, ox, oy, dir_x, dir_y, out=None):
+        """
+        cast_batch con salto de espacio vacío: en cada iteración cada rayo
+        sale del mayor bloque vacío que contiene su tile según la pirámide
+        de ocupación (o del tile mismo, que es un paso de DDA común) y se
+        prueba el tile al que entra. Las distancias a los bordes se calculan
+        desde el origen, sin acumular, así que un salto equivale a muchos
+        pasos de DDA
+        """
+        tile = Config.TILE_SIZE
+        max_depth = Config.MAX_DEPTH
+        grid = self.map.flat
+        stride = self.map.stride
+        occupancy = self.occupancy
+        occupancy.update()
+        skip = occupancy.skip
+        
+        dir_x = np.asarray(dir_x, dtype=np.float64)
+        dir_y = np.asarray(dir_y, dtype=np.float64)
+        count = dir_x.shape[0]
+        rays = self.init_rays(ox, oy, dir_x, dir_y, out)
+        
+        start_x = int(ox // tile)
+        start_y = int(oy // tile)
+        if not (0 <= start_x < self.map_width and 0 <= start_y < self.map_height):
+            return rays
+        
+        # Un rayo paralelo a un eje se trata como positivo en ese eje: el
+        # borde queda siempre adelante y la distancia a él es inf (sin NaN)
+        with np.errstate(divide='ignore'):
+            inv_x = 1.0 / dir_x
+            inv_y = 1.0 / dir_y
+        positive_x = (dir_x >= 0).astype(np.int64)
+        positive_y = (dir_y >= 0).astype(np.int64)
+        
+        # Tile actual de cada rayo (y su índice plano) y rayos activos
+        cell_x = np.full(count, start_x, dtype=np.int64)
+        cell_y = np.full(count, start_y, dtype=np.int64)
+        cell_index = np.full(count, self.map.flat_index(start_x, start_y), dtype=np.int64)
+        index = np.arange(count)
+        
+        while index.size:
+            # Bloque vacío más grande que contiene el tile actual (1 = el tile)
+            size = skip[cell_index]
+            block_x = cell_x - cell_x % size
+            block_y = cell_y - cell_y % size
+            
+            # Distancia hasta el borde del bloque en la dirección de cada eje
+            bound_x = block_x + size * positive_x
+            bound_y = block_y + size * positive_y
+            exit_x = (bound_x * tile - ox) * inv_x
+            exit_y = (bound_y * tile - oy) * inv_y
+            use_x = exit_x < exit_y
+            distance = np.where(use_x, exit_x, exit_y)
+            
+            # Tile al que entra: el vecino del bloque sobre el eje de salida y
+            # el que contiene el punto de salida sobre el otro eje
+            size -= 1
+            along_x = np.clip((ox + dir_x * distance) // tile, block_x, block_x + size)
+            along_y = np.clip((oy + dir_y * distance) // tile, block_y, block_y + size)
+            cell_x = np.where(use_x, bound_x + positive_x - 1, along_x).astype(np.int64)
+            cell_y = np.where(use_x, along_y, bound_y + positive_y - 1).astype(np.int64)
+            cell_index = (cell_y + 1) * stride + cell_x + 1
+            
+            inside = distance < max_depth
+            cell = grid[cell_index]
+            hit = (cell > 0) & inside
+            
+            if hit.any():
+                self.store_hits(
+                    rays, index[hit], ox, oy, dir_x[hit], dir_y[hit],
+                    distance[hit], use_x[hit], cell[hit],
+                )
+            
+            alive = inside & ~hit
+            if not alive.all():
+                index = index[alive]
+                dir_x = dir_x[alive]
+                dir_y = dir_y[alive]
+                inv_x = inv_x[alive]
+                inv_y = inv_y[alive]
+                positive_x = positive_x[alive]
+                positive_y = positive_y[alive]
+                cell_x = cell_x[alive]
+                cell_y = cell_y[alive]
+                cell_index = cell_index[alive]
+        
+        return rays
+    
+    def segment_bvh(self):
+        """BVH de segmentos del mapa, actualizada si el mapa cambió"""
+        bvh = self.bvh
+        if bvh is None:
+            bvh = self.bvh = SegmentBVH(self.map, self.segments)
+        bvh.update()
+        return bvh
+    
+    def cast_batch_bvh(self, ox, oy, dir_x, dir_y, out=None):
+        """
+        cast_batch contra la BVH de segmentos, en dos fases:
+        1. Los rayos bajan por la jerarquía en paquetes, un nivel por
+           iteración, y se juntan los pares (rayo, hoja) cuya caja cruza el
+           rayo antes de MAX_DEPTH con la distancia a la que entra.
+        2. Cada rayo prueba sus hojas de la más cercana a la más lejana, una
+           por ronda, hasta que la siguiente empieza después de su impacto.
+        Las paredes largas son un solo segmento, así que el costo no depende
+        de cuántos tiles cruza el rayo, y admite paredes en ángulo
+        """
+        tile = Config.TILE_SIZE
+        max_depth = Config.MAX_DEPTH
+        
+        dir_x = np.asarray(dir_x, dtype=np.float64)
+        dir_y = np.asarray(dir_y, dtype=np.float64)
+        count = dir_x.shape[0]
+        rays = self.init_rays(ox, oy, dir_x, dir_y, out)
+        
+        # Igual que la grilla: desde fuera del mapa no se golpea nada
+        start_x = int(ox // tile)
+        start_y = int(oy // tile)
+        if not (0 <= start_x < self.map_width and 0 <= start_y < self.map_height):
+            return rays
+        
+        tree = self.segment_bvh().tree
+        boxes, lines, leaves = tree.boxes, tree.lines, tree.leaves
+        if not len(boxes) or not count:
+            return rays
+        
+        # Inversas para la prueba de cajas (un eje paralelo usa una inversa
+        # muy grande en lugar de inf, así no aparecen NaN en bordes exactos)
+        inv_x = 1.0 / np.where(dir_x == 0, 1e-12, dir_x)
+        inv_y = 1.0 / np.where(dir_y == 0, 1e-12, dir_y)
+        
+        # Fase 1: hojas que cruza cada rayo (ver bvh_candidates)
+        ray, leaf, enter = self.bvh_candidates(ox, oy, dir_x, dir_y, inv_x, inv_y, tree)
+        
+        # Fase 2: hojas de cada rayo ordenadas por distancia de entrada
+        # (una sola clave: rayo y distancia; mucho más rápido que lexsort)
+        order = np.argsort(ray * (2.0 * max_depth) + np.maximum(enter, 0.0))
+        ray, leaf, enter = ray[order], leaf[order], enter[order]
+        group_count = np.bincount(ray, minlength=count)
+        group_start = np.cumsum(group_count) - group_count
+        
+        best = np.full(count, float(max_depth))
+        best_segment = np.full(count, -1, dtype=np.int64)
+        active = np.flatnonzero(group_count)
+        round_index = 0
+        while active.size:
+            pos = group_start[active] + round_index
+            # Un rayo termina cuando su próxima hoja empieza tras su impacto
+            pending = enter[pos] < best[ray[pos]]
+            active = active[pending]
+            pos = pos[pending]
+            hit_ray = ray[pos]
             
-            rays.append((distance, wall_type, hit_x, hit_y))
+            ids = np.take(leaves, leaf[pos], axis=0)
+            distance = self.intersect_segments(
+                ox, oy, dir_x[hit_ray, None], dir_y[hit_ray, None], np.take(lines, ids, axis=0)
+            )
+            nearest = np.argmin(distance, axis=1)
+            distance = distance[np.arange(pos.size), nearest]
+            closer = distance < best[hit_ray]
+            best[hit_ray[closer]] = distance[closer]
+            best_segment[hit_ray[closer]] = ids[closer, nearest[closer]]
             
-            # Incrementar ángulo para siguiente rayo
-            ray_angle += Config.DELTA_ANGLE
+            round_index += 1
+            active = active[group_count[active] > round_index]
         
+        ids = np.flatnonzero(best_segment >= 0)
+        if ids.size:
+            self.store_segment_hits(
+                rays, ids, ox, oy, dir_x[ids], dir_y[ids],
+                best[ids], np.take(lines, best_segment[ids], axis=0),
+                tree.segments['wall_type'][best_segment[ids]],
+            )
+        if ox % tile == 0 or oy % tile == 0:
+            self.origin_hits(rays, ox, oy, dir_x, dir_y)
         return rays
     
+    def origin_hits(self, rays, ox, oy, dir_x, dir_y):
+        """
+        Origen sobre una cara o esquina de pared: los rayos que la grilla
+        haría chocar a distancia 0 (los que cruzan un borde justo en el
+        origen hacia una pared) se marcan igual que en cast_batch_dda, con
+        el mismo desempate (primero el borde horizontal)
+        """
+        tile = Config.TILE_SIZE
+        start_x = int(ox // tile)
+        start_y = int(oy // tile)
+        # Cruces a distancia 0: solo hacia atrás desde un borde del tile inicial
+        cross_x = (dir_x < 0) if ox % tile == 0 else np.zeros(dir_x.shape, dtype=bool)
+        cross_y = (dir_y < 0) if oy % tile == 0 else np.zeros(dir_y.shape, dtype=bool)
+        # Primero el borde horizontal (si lo cruza), después el vertical
+        row = start_y - cross_y
+        horizontal = self.map.tiles_at_cells(np.full(row.shape, start_x), row) * cross_y
+        vertical = self.map.tiles_at_cells(start_x - cross_x, row) * cross_x
+        cells = np.where(horizontal > 0, horizontal, vertical)
+        ids = np.flatnonzero(cells)
+        if ids.size:
+            self.store_hits(
+                rays, ids, ox, oy, dir_x[ids], dir_y[ids], np.zeros(ids.size),
+                horizontal[ids] == 0, cells[ids],
+            )
+    
+    def bvh_candidates(self, ox, oy, dir_x, dir_y, inv_x, inv_y, tree):
+        """
+        Fase 1 de cast_batch_bvh. Los rayos bajan por la jerarquía en
+        paquetes de Config.BVH_PACKET_SIZE rayos vecinos: cada paquete
+        descarta las cajas que quedan fuera de la cuña entre sus rayos
+        extremos o más lejos que MAX_DEPTH, un nivel por iteración. Solo en
+        las hojas se prueba cada rayo contra la caja. Retorna (rayo, hoja,
+        distancia de entrada) de cada par cuya caja cruza el rayo.
+        Las filas se juntan con np.take: mucho más rápido que indexar
+        arreglos 2D con un arreglo de índices
+        """
+        max_depth = Config.MAX_DEPTH
+        boxes = tree.boxes
+        count = dir_x.shape[0]
+        size = max(1, min(Config.BVH_PACKET_SIZE, count))
+        packets = -(-count // size)
+        
+        # Rayos de cada paquete (el último se completa repitiendo su último rayo)
+        members = np.minimum(np.arange(packets * size), count - 1).reshape(packets, size)
+        packet_x = dir_x[members]
+        packet_y = dir_y[members]
+        
+        # Rayos extremos de cada paquete según el ángulo respecto del primero;
+        # si abarcan media vuelta o más la cuña no descarta nada
+        first_x = packet_x[:, :1]
+        first_y = packet_y[:, :1]
+        relative = np.arctan2(first_x * packet_y - first_y * packet_x, first_x * packet_x + first_y * packet_y)
+        rows = np.arange(packets)
+        low = relative.argmin(axis=1)
+        high = relative.argmax(axis=1)
+        right_x, right_y = packet_x[rows, low], packet_y[rows, low]
+        left_x, left_y = packet_x[rows, high], packet_y[rows, high]
+        wide = relative[rows, high] - relative[rows, low] >= math.pi
+        
+        # Pares (paquete, nodo) de cada nivel, empezando por la raíz
+        packet = rows
+        node = np.zeros(packets, dtype=np.int64)
+        found_packet = []
+        found_node = []
+        while packet.size:
+            box = np.take(boxes, node, axis=0)
+            corner_x = np.take(box, (0, 2, 0, 2), axis=1) - ox
+            corner_y = np.take(box, (1, 1, 3, 3), axis=1) - oy
+            
+            # Fuera de la cuña: las 4 esquinas del lado de afuera de un rayo extremo
+            outside = (
+                ((right_x[packet, None] * corner_y - right_y[packet, None] * corner_x) < 0).all(axis=1)
+                | ((corner_x * left_y[packet, None] - corner_y * left_x[packet, None]) < 0).all(axis=1)
+            )
+            # Distancia del origen a la caja
+            gap_x = np.maximum(np.maximum(box[:, 0] - ox, ox - box[:, 2]), 0.0)
+            gap_y = np.maximum(np.maximum(box[:, 1] - oy, oy - box[:, 3]), 0.0)
+            keep = (gap_x * gap_x + gap_y * gap_y < max_depth * max_depth) & (wide[packet] | ~outside)
+            
+            leaf = tree.leaf[node]
+            at_leaf = keep & (leaf >= 0)
+            found_packet.append(packet[at_leaf])
+            found_node.append(node[at_leaf])
+            
+            inner = keep & (leaf < 0)
+            packet = np.repeat(packet[inner], 2)
+            node = (tree.child[node[inner]][:, None] + (0, 1)).ravel()
+        
+        # Pares (rayo, hoja): prueba de slabs de cada rayo del paquete
+        packet = np.concatenate(found_packet)
+        node = np.concatenate(found_node)
+        ray = members[packet]
+        box = np.take(boxes, node, axis=0)[:, None, :]
+        ray_inv_x = inv_x[ray]
+        ray_inv_y = inv_y[ray]
+        tx0 = (box[..., 0] - ox) * ray_inv_x
+        tx1 = (box[..., 2] - ox) * ray_inv_x
+        ty0 = (box[..., 1] - oy) * ray_inv_y
+        ty1 = (box[..., 3] - oy) * ray_inv_y
+        enter = np.maximum(np.minimum(tx0, tx1), np.minimum(ty0, ty1))
+        leave = np.minimum(np.maximum(tx0, tx1), np.maximum(ty0, ty1))
+        crossed = (leave >= np.maximum(enter, 0.0)) & (enter < max_depth)
+        # Sin repetir los rayos de relleno del último paquete
+        crossed &= np.arange(size) < count - packet[:, None] * size
+        leaf = np.broadcast_to(tree.leaf[node][:, None], ray.shape)
+        return ray[crossed], leaf[crossed], enter[crossed]
+    
+    @staticmethod
+    def intersect_segments(ox, oy, dx, dy, lines):
+        """
+        Distancia a lo largo de cada rayo hasta cada segmento (inf si no lo
+        cruza). lines: (..., 4) con (x0, y0, x1 - x0, y1 - y0); se combina
+        con dx, dy por broadcasting
+        """
+        x0, y0, edge_x, edge_y = np.moveaxis(lines, -1, 0)
+        offset_x = x0 - ox
+        offset_y = y0 - oy
+        with np.errstate(divide='ignore', invalid='ignore'):
+            denom = dx * edge_y - dy * edge_x
+            distance = (offset_x * edge_y - offset_y * edge_x) / denom
+            along = (offset_x * dy - offset_y * dx) / denom
+            # Tolerancia en los extremos: un rayo que pasa justo por la
+            # esquina entre dos segmentos no se escapa entre ellos. Los
+            # cortes en el mismo origen no cuentan (ver origin_hits)
+            valid = (distance > 0) & (along >= -SEGMENT_EPSILON) & (along <= 1 + SEGMENT_EPSILON)
+        return np.where(valid, distance, np.inf)
+    
+    @staticmethod
+    def store_segment_hits(rays, ids, ox, oy, dx, dy, dist, lines, wall_type):
+        """
+        Escribe en rays los impactos de los rayos ids, uno por rayo, contra
+        los segmentos lines (x0, y0, x1 - x0, y1 - y0) de tipo wall_type
+        """
+        tile = Config.TILE_SIZE
+        hit_x = ox + dx * dist
+        hit_y = oy + dy * dist
+        
+        # Lado según el eje dominante del segmento (vertical = casi x = cte)
+        x0, y0, edge_x, edge_y = lines.T
+        vertical = np.abs(edge_y) >= np.abs(edge_x)
+        
+        # Coordenada de textura a lo largo del segmento desde su inicio,
+        # espejada si el rayo lo golpea desde el otro lado
+        length = np.hypot(edge_x, edge_y)
+        along = ((hit_x - x0) * edge_x + (hit_y - y0) * edge_y) / length
+        tex_u = (along % tile) / tile
+        tex_u = np.where(edge_x * dy - edge_y * dx > 0, 1.0 - tex_u, tex_u)
+        
+        rays['distance'][ids] = dist
+        rays['wall_type'][ids] = wall_type
+        rays['hit_x'][ids] = hit_x
+        rays['hit_y'][ids] = hit_y
+        rays['side'][ids] = np.where(vertical, SIDE_VERTICAL, SIDE_HORIZONTAL)
+        rays['tex_u'][ids] = tex_u
+    
     def cast_single_ray(self, ox, oy, angle):
         """
         Lanza un solo rayo desde (ox, oy) en la dirección angle
-        Retorna (distancia, tipo_pared, hit_x, hit_y)
+        usando el método configurado en Config.RAYCAST_METHOD
+        Retorna (distancia, tipo_pared, hit_x, hit_y, lado, tex_u)
+        """
+        return self.cast_single_ray_dir(ox, oy, math.cos(angle), math.sin(angle))
+    
+    def cast_single_ray_dir(self, ox, oy, dx, dy):
+        """
+        Igual que cast_single_ray pero recibe la dirección unitaria (dx, dy)
+        en lugar del ángulo
+        """
+        if Config.RAYCAST_METHOD == "step":
+            return self.trace_step(ox, oy, dx, dy)
+        if Config.RAYCAST_ENGINE == "bvh":
+            return self.trace_bvh(ox, oy, dx, dy)
+        if self.skips_empty():
+            return self.trace_skip(ox, oy, dx, dy)
+        return self.trace_dda(ox, oy, dx, dy)
+    
+    def cast_single_ray_dda(self, ox, oy, angle):
+        """Lanza un rayo con DDA en la dirección angle (ver trace_dda)"""
+        return self.trace_dda(ox, oy, math.cos(angle), math.sin(angle))
+    
+    def trace_dda(self, ox, oy, dx, dy):
+        """
+        Lanza un rayo recorriendo la grilla tile a tile (DDA).
+        Solo visita los tiles que el rayo cruza, por lo que el costo depende
+        de la cantidad de tiles atravesados y no de la distancia en pixeles.
+        Retorna (distancia, tipo_pared, hit_x, hit_y, lado, tex_u) donde
+        lado es SIDE_VERTICAL u SIDE_HORIZONTAL y tex_u está en [0, 1)
+        """
+        tile = Config.TILE_SIZE
+        max_depth = Config.MAX_DEPTH
+        
+        # Tile inicial
+        map_x = int(ox // tile)
+        map_y = int(oy // tile)
+        
+        game_map = self.map
+        if not (0 <= map_x < game_map.width and 0 <= map_y < game_map.height):
+            return (max_depth, 0, ox + dx * max_depth, oy + dy * max_depth, SIDE_VERTICAL, 0.0)
+        
+        # Distancia a lo largo del rayo hasta el primer borde vertical/horizontal
+        # y distancia entre dos bordes consecutivos del mismo tipo
+        if dx > 0:
+            step_x = 1
+            delta_x = tile / dx
+            side_dist_x = ((map_x + 1) * tile - ox) / dx
+        elif dx < 0:
+            step_x = -1
+            delta_x = -tile / dx
+            side_dist_x = (map_x * tile - ox) / dx
+        else:
+            step_x = 0
+            delta_x = side_dist_x = math.inf
+        
+        if dy > 0:
+            step_y = 1
+            delta_y = tile / dy
+            side_dist_y = ((map_y + 1) * tile - oy) / dy
+        elif dy < 0:
+            step_y = -1
+            delta_y = -tile / dy
+            side_dist_y = (map_y * tile - oy) / dy
+        else:
+            step_y = 0
+            delta_y = side_dist_y = math.inf
+        
+        # Recorrido sobre el buffer plano con borde (sin verificar límites)
+        cells = game_map.buffer
+        index = game_map.flat_index(map_x, map_y)
+        row_step = step_y * game_map.stride
+        
+        while True:
+            # Avanzar al siguiente borde más cercano
+            if side_dist_x < side_dist_y:
+                distance = side_dist_x
+                side_dist_x += delta_x
+                index += step_x
+                side = SIDE_VERTICAL
+            else:
+                distance = side_dist_y
+                side_dist_y += delta_y
+                index += row_step
+                side = SIDE_HORIZONTAL
+            
+            if distance >= max_depth:
+                break
+            
+            # Verificar colisión con pared
+            wall_type = cells[index]
+            if wall_type > 0:
+                hit_x = ox + dx * distance
+                hit_y = oy + dy * distance
+                # Coordenada de textura a lo largo de la cara golpeada,
+                # orientada para que no se vea espejada según el lado
+                if side == SIDE_VERTICAL:
+                    tex_u = (hit_y % tile) / tile
+                    if step_x < 0:
+                        tex_u = 1.0 - tex_u
+                else:
+                    tex_u = (hit_x % tile) / tile
+                    if step_y > 0:
+                        tex_u = 1.0 - tex_u
+                return (distance, wall_type, hit_x, hit_y, side, tex_u)
+        
+        # No se encontró pared
+        return (max_depth, 0, ox + dx * max_depth, oy + dy * max_depth, SIDE_VERTICAL, 0.0)
+    
+    def trace_skip(self, ox, oy, dx, dy):
         """
-        sin_a = math.sin(angle)
-        cos_a = math.cos(angle)
+        Versión escalar de cast_batch_skip: como trace_dda, pero desde un
+        tile vacío sale de una vez del mayor bloque vacío que lo contiene.
+        Retorna (distancia, tipo_pared, hit_x, hit_y, lado, tex_u)
+        """
+        tile = Config.TILE_SIZE
+        max_depth = Config.MAX_DEPTH
+        
+        map_x = int(ox // tile)
+        map_y = int(oy // tile)
+        
+        game_map = self.map
+        if not (0 <= map_x < game_map.width and 0 <= map_y < game_map.height):
+            return (max_depth, 0, ox + dx * max_depth, oy + dy * max_depth, SIDE_VERTICAL, 0.0)
         
-        # Convertir posición del jugador a coordenadas del mapa
-        map_x = int(ox // Config.TILE_SIZE)
-        map_y = int(oy // Config.TILE_SIZE)
+        occupancy = self.occupancy
+        occupancy.update()
+        block_size = occupancy.block_size
+        cells = game_map.buffer
+        stride = game_map.stride
+        inv_x = 1.0 / dx if dx != 0 else 0.0
+        inv_y = 1.0 / dy if dy != 0 else 0.0
         
-        # Dirección del rayo
-        dx = cos_a
-        dy = sin_a
+        while True:
+            size = block_size(map_x, map_y)
+            block_x = map_x // size * size
+            block_y = map_y // size * size
+            
+            # Distancia hasta el borde del bloque en la dirección de cada eje
+            if dx > 0:
+                exit_x = ((block_x + size) * tile - ox) * inv_x
+            elif dx < 0:
+                exit_x = (block_x * tile - ox) * inv_x
+            else:
+                exit_x = math.inf
+            if dy > 0:
+                exit_y = ((block_y + size) * tile - oy) * inv_y
+            elif dy < 0:
+                exit_y = (block_y * tile - oy) * inv_y
+            else:
+                exit_y = math.inf
+            
+            # Tile al que entra el rayo al salir del bloque
+            if exit_x < exit_y:
+                distance = exit_x
+                side = SIDE_VERTICAL
+                map_x = block_x + size if dx > 0 else block_x - 1
+                map_y = min(max(int((oy + dy * distance) // tile), block_y), block_y + size - 1)
+            else:
+                distance = exit_y
+                side = SIDE_HORIZONTAL
+                map_y = block_y + size if dy > 0 else block_y - 1
+                map_x = min(max(int((ox + dx * distance) // tile), block_x), block_x + size - 1)
+            
+            if distance >= max_depth:
+                break
+            
+            wall_type = cells[(map_y + 1) * stride + map_x + 1]
+            if wall_type > 0:
+                hit_x = ox + dx * distance
+                hit_y = oy + dy * distance
+                if side == SIDE_VERTICAL:
+                    tex_u = (hit_y % tile) / tile
+                    if dx < 0:
+                        tex_u = 1.0 - tex_u
+                else:
+                    tex_u = (hit_x % tile) / tile
+                    if dy > 0:
+                        tex_u = 1.0 - tex_u
+                return (distance, wall_type, hit_x, hit_y, side, tex_u)
         
+        return (max_depth, 0, ox + dx * max_depth, oy + dy * max_depth, SIDE_VERTICAL, 0.0)
+    
+    def trace_bvh(self, ox, oy, dx, dy):
+        """
+        Versión escalar del motor "bvh": un lote de un solo rayo
+        (ver cast_batch_bvh). Retorna (distancia, tipo_pared, hit_x, hit_y, lado, tex_u)
+        """
+        ray = self.cast_batch_bvh(ox, oy, np.array([dx]), np.array([dy]))[0]
+        return (
+            float(ray['distance']), int(ray['wall_type']), float(ray['hit_x']),
+            float(ray['hit_y']), int(ray['side']), float(ray['tex_u']),
+        )
+    
+    def cast_single_ray_step(self, ox, oy, angle):
+        """Lanza un rayo pixel a pixel en la dirección angle (ver trace_step)"""
+        return self.trace_step(ox, oy, math.cos(angle), math.sin(angle))
+    
+    def trace_step(self, ox, oy, dx, dy):
+        """
+        Lanza un solo rayo avanzando de a un pixel (método original).
+        Se mantiene como referencia para comparar con el DDA.
+        Retorna (distancia, tipo_pared, hit_x, hit_y, lado, tex_u)
+        """
         # Distancia recorrida
         distance = 0
         
@@ -67,30 +905,33 @@ class RayCaster:
             target_x = ox + dx * distance
             target_y = oy + dy * distance
             
-            # Convertir a coordenadas del mapa
-            col = int(target_x // Config.TILE_SIZE)
-            row = int(target_y // Config.TILE_SIZE)
-            
-            # Verificar límites del mapa
-            if not (0 <= col < self.map_width and 0 <= row < self.map_height):
-                return (Config.MAX_DEPTH, 0, target_x, target_y)
-            
-            # Verificar colisión con pared
-            wall_type = self.map[row][col]
+            # Verificar colisión con pared (fuera del mapa cuenta como borde)
+            wall_type = self.map.tile_at(target_x, target_y)
             if wall_type > 0:
-                return (distance, wall_type, target_x, target_y)
+                # Estimar la cara golpeada según el borde del tile más cercano
+                fx = target_x % Config.TILE_SIZE
+                fy = target_y % Config.TILE_SIZE
+                edge_x = min(fx, Config.TILE_SIZE - fx)
+                edge_y = min(fy, Config.TILE_SIZE - fy)
+                if edge_x < edge_y:
+                    side, tex_u = SIDE_VERTICAL, fy / Config.TILE_SIZE
+                else:
+                    side, tex_u = SIDE_HORIZONTAL, fx / Config.TILE_SIZE
+                return (distance, wall_type, target_x, target_y, side, tex_u)
         
         # No se encontró pared
-        return (Config.MAX_DEPTH, 0, ox + dx * Config.MAX_DEPTH, oy + dy * Config.MAX_DEPTH)
+        return (Config.MAX_DEPTH, 0, ox + dx * Config.MAX_DEPTH, oy + dy * Config.MAX_DEPTH, SIDE_VERTICAL, 0.0)
+    
+    def close(self):
+        """Detiene el pool de hilos del backend paralelo, si existe"""
+        if self.parallel is not None:
+            self.parallel.close()
+            self.parallel = None
     
     def get_wall_at(self, x, y):
         """Obtiene el tipo de pared en la posición (x, y)"""
-        col = int(x // Config.TILE_SIZE)
-        row = int(y // Config.TILE_SIZE)
-        
-        if 0 <= col < self.map_width and 0 <= row < self.map_height:
-            return self.map[row][col]
-        return 1  # Fuera de límites = pared
+        # Fuera de límites = pared del borde
+        return self.map.tile_at(x, y)
 
 
 # Mapa de ejemplo para pruebas
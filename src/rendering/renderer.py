@@ -4,8 +4,16 @@ Dibuja la vista 3D usando los resultados del raycasting
 """
 import pygame
 import math
+from time import perf_counter
+import numpy as np
 from src.game.config import Config
-from src.rendering.raycaster import RayCaster, EXAMPLE_MAP
+from src.rendering.raycaster import RayCaster, ViewPose, EXAMPLE_MAP
+from src.rendering.tables import get_ray_tables
+from src.rendering.textures import WallTextures, load_or_make_texture
+from src.rendering.sprites import SpriteRenderer
+from src.rendering.particles import ParticleSystem
+from src.rendering.colormap import Colormap, build_palette
+from src.world.dynamic_lights import DynamicLightmap
 
 class Renderer:
     def __init__(self, screen):
@@ -19,32 +27,272 @@ class Renderer:
             3: (0, 100, 150),    # Azul oscuro
         }
         
+        self.sky_color = (50, 50, 100)  # Azul oscuro
+        self.floor_color = (30, 30, 30)  # Gris oscuro
+        
+        # Texturas de pared (columnas escaladas en cache LRU)
+        self.wall_textures = WallTextures(self.wall_colors)
+        self._texture_stack = None
+        
+        # Sombreado por distancia, niebla y tinte como tablas por nivel
+        self.colormap = Colormap()
+        self._texture_palette = None
+        self._wall_luts = None
+        self._wall_color_tables = None
+        
+        # Piso y techo: texturas sombreadas por nivel de distancia y fondo
+        # degradado (una pila con luz y otra sin luz, ver get_floor_stacks)
+        self._floor_stacks = {}
+        self._index_buffer = None
+        self._tint_buffer = None
+        self._backdrop = None
+        self._backdrop_key = None
+        self._backdrop_surface = None
+        
         # Calcular ancho de cada columna
         self.column_width = Config.SCREEN_WIDTH / Config.NUM_RAYS
+        
+        # Sprites de entidades y depth buffer (distancia por rayo del último frame)
+        self.sprite_renderer = SpriteRenderer()
+        self.depth_buffer = None
+        
+        # Partículas de los hechizos (se simulan en GameEngine.update_game)
+        self.particles = ParticleSystem()
+        
+        # PVS del nivel: descarta entidades que no pueden verse (ver set_map)
+        self.pvs = None
+        
+        # Luz del nivel (None = sin luces, todo a luz plena): la horneada o,
+        # con Config.DYNAMIC_LIGHTS, la combinada con las luces de los hechizos
+        self.lightmap = None
+        self.dynamic_lights = None
+        
+        # Framebuffer (se crea al primer uso y cuando cambia la resolución)
+        self.framebuffer = None
+        self.view_surface = None
+        
+        # Resolución interna de la vista 3D respecto a la ventana (ver
+        # render_scale) y vista escalada a la ventana (si es menor que 1)
+        self._render_scale = None
+        self.render_scale = Config.RENDER_SCALE
+        self._scaled_view = None
+        
+        # Minimapa: capa de tiles en cache y Surface de composición
+        self._minimap_layer = None
+        self._minimap_key = None
+        self._minimap_frame = None
+        
+        # Tiempos (ms) por etapa del último render_3d_view: cast, shade, draw, blit
+        self.stage_times = {}
+        
+        # Actualización parcial de pantalla (Config.DIRTY_RECTS): clave de lo
+        # que determina la vista 3D y Surface con la última vista sin HUD
+        self._view_key = None
+        self._last_view = None
+        self.view_changed = True
     
-    def render_3d_view(self, player):
+    def render_3d_view(self, player, entities=()):
         """
         Renderiza la vista 3D desde la perspectiva del jugador
+        entities: enemigos/hechizos a dibujar como sprites
+        Retorna True si se dibujó; con Config.DIRTY_RECTS retorna False (y
+        deja la pantalla intacta) si nada de lo que se ve cambió desde el
+        frame anterior
         """
-        # Dibujar cielo (mitad superior)
-        pygame.draw.rect(
-            self.screen,
-            (50, 50, 100),  # Azul oscuro
-            (0, 0, Config.SCREEN_WIDTH, Config.SCREEN_HEIGHT // 2)
-        )
+        # Sprites que pueden verse según el PVS del nivel
+        if entities and self.pvs is not None:
+            entities = self.pvs.filter_visible(player.x, player.y, entities)
         
-        # Dibujar piso (mitad inferior)
-        pygame.draw.rect(
-            self.screen,
-            (30, 30, 30),  # Gris oscuro
-            (0, Config.SCREEN_HEIGHT // 2, Config.SCREEN_WIDTH, Config.SCREEN_HEIGHT // 2)
-        )
+        if Config.DIRTY_RECTS:
+            key = self.view_key(player, entities)
+            if key == self._view_key and self._last_view is not None:
+                self.view_changed = False
+                self.stage_times.update(cast=0.0, shade=0.0, draw=0.0, blit=0.0)
+                return False
+            self._view_key = key
+        self.view_changed = True
         
-        # Obtener rayos
+        # Obtener rayos (arreglo estructurado RAY_DTYPE)
+        t0 = perf_counter()
         rays = self.raycaster.cast_rays(player.x, player.y, player.angle)
+        self.depth_buffer = rays['distance']
+        # Piso, luz y sprites usan el ángulo con el que se lanzaron los rayos
+        # (alineado a la grilla de rayos si hay cache de coherencia)
+        view = ViewPose(player.x, player.y, self.raycaster.view_angle)
+        t1 = perf_counter()
+        
+        # Resolución interna de la vista 3D (render_scale)
+        width, height = self.get_view_size()
+        native = (width, height) == self.screen.get_size()
+        
+        # Luz de la cara golpeada por cada rayo como fila de las tablas
+        light_rows = self.wall_light_rows(rays, view)
+        
+        if Config.RENDER_MODE == "framebuffer":
+            framebuffer = self.get_framebuffer(width, height)
+            self.draw_floor_ceiling(framebuffer, view)
+            t2 = perf_counter()
+            self.draw_walls_framebuffer(rays, light_rows)
+            self.apply_flash(framebuffer, self.view_surface)
+            t3 = perf_counter()
+            pygame.surfarray.blit_array(self.view_surface, framebuffer)
+            target = self.view_surface
+            t4 = perf_counter()
+        else:
+            # En modo rects piso, paredes y blit van juntos: se cuentan como draw.
+            # A resolución nativa se dibuja directo en pantalla, salvo que haga
+            # falta una copia limpia de la vista para reponer el HUD
+            t2 = perf_counter()
+            if native and not Config.DIRTY_RECTS:
+                target = self.screen
+            else:
+                target = self.get_view_surface(width, height)
+            self.draw_walls_rects(rays, target, light_rows)
+            self.apply_flash_surface(target)
+            t3 = t4 = perf_counter()
+        
+        # Sprites a la resolución interna, antes de escalar
+        if entities:
+            self.sprite_renderer.render(target, view, entities, self.depth_buffer)
+        if self.particles.count:
+            self.particles.render(target, view, self.depth_buffer)
+        t5 = perf_counter()
+        
+        # Un único escalado (o blit) a la resolución de la ventana; el HUD se
+        # dibuja después sobre la pantalla a resolución nativa
+        if target is not self.screen:
+            self.present_view(target)
+            self._last_view = target
+        else:
+            self._last_view = None
+        t6 = perf_counter()
+        
+        times = self.stage_times
+        times['cast'] = (t1 - t0) * 1000.0
+        times['shade'] = (t2 - t1) * 1000.0
+        times['draw'] = (t3 - t2 + t5 - t4) * 1000.0
+        times['blit'] = (t4 - t3 + t6 - t5) * 1000.0
+        return True
+    
+    def view_key(self, player, entities):
+        """Todo lo que determina la vista 3D de un frame (ver render_3d_view)"""
+        game_map = self.raycaster.map
+        kind_of = self.sprite_renderer.kind_of
+        return (
+            player.x, player.y, player.angle,
+            id(game_map), game_map.version, self.colormap.version, self.colormap.flash_key,
+            (id(self.lightmap), self.lightmap.version) if self.lightmap is not None else None,
+            self.screen.get_size(), self.render_scale, Config.RENDER_MODE,
+            Config.NUM_RAYS, Config.FOV, Config.FLOOR_MODE, Config.TEXTURED_WALLS,
+            Config.RAYCAST_ENGINE, self.particles.version,
+            tuple((e.x, e.y, kind_of(e)) for e in entities),
+        )
+    
+    def invalidate_view(self):
+        """Fuerza a renderizar la vista 3D en el próximo frame"""
+        self._view_key = None
+    
+    def restore_view(self, rects):
+        """
+        Repone la última vista 3D (sin HUD ni minimapa) bajo rects de pantalla.
+        Retorna False si la vista está a otra resolución: en ese caso se
+        vuelve a escalar entera y hay que redibujar todo lo que va encima
+        """
+        view = self._last_view
+        if view is None:
+            return False
+        if view.get_size() != self.screen.get_size():
+            self.present_view(view)
+            return False
+        for rect in rects:
+            self.screen.blit(view, rect, rect)
+        return True
+    
+    @property
+    def render_scale(self):
+        """Resolución interna de la vista 3D respecto a la ventana"""
+        return self._render_scale
+    
+    @render_scale.setter
+    def render_scale(self, scale):
+        """Fija la escala recortada a [Config.RENDER_SCALE_MIN, Config.RENDER_SCALE_MAX]"""
+        self._render_scale = max(Config.RENDER_SCALE_MIN, min(Config.RENDER_SCALE_MAX, float(scale)))
+    
+    def get_view_size(self):
+        """Tamaño interno de la vista 3D: la pantalla por render_scale"""
+        screen_width, screen_height = self.screen.get_size()
+        scale = self.render_scale
+        if scale >= 1:
+            return screen_width, screen_height
+        return max(1, int(screen_width * scale)), max(2, int(screen_height * scale))
+    
+    def present_view(self, view):
+        """Copia la vista interna a pantalla, escalándola si es más chica"""
+        size = self.screen.get_size()
+        if view.get_size() == size:
+            self.screen.blit(view, (0, 0))
+            return
+        scale = pygame.transform.smoothscale if Config.RENDER_SMOOTH else pygame.transform.scale
+        if self.screen.get_masks() == view.get_masks() and self.screen.get_bitsize() == view.get_bitsize():
+            # Mismo formato: se escala directo sobre la pantalla
+            scale(view, size, self.screen)
+            return
+        if self._scaled_view is None or self._scaled_view.get_size() != size:
+            self._scaled_view = pygame.Surface(size, 0, view)
+        scale(view, size, self._scaled_view)
+        self.screen.blit(self._scaled_view, (0, 0))
+    
+    def wall_light_rows(self, rays, player):
+        """
+        Offset de fila de las tablas iluminadas del colormap para cada rayo
+        según la luz de la cara golpeada (escalar si el mapa no tiene luces)
+        """
+        colormap = self.colormap
+        if self.lightmap is None:
+            return (colormap.light_levels - 1) * colormap.levels
+        return colormap.light_rows(self.lightmap.face_light(rays, player.x, player.y))
+    
+    def draw_walls_rects(self, rays, surface=None, light_rows=None):
+        """
+        Dibuja cielo, piso y paredes con un pygame.draw.rect por columna
+        sobre surface (por defecto la pantalla).
+        light_rows: offsets de luz por rayo (ver wall_light_rows)
+        """
+        if surface is None:
+            surface = self.screen
+        if light_rows is None:
+            light_rows = (self.colormap.light_levels - 1) * self.colormap.levels
+        light_rows = np.broadcast_to(light_rows, len(rays)).tolist()
+        width, height = surface.get_size()
+        
+        if Config.FLOOR_MODE == "flat":
+            # Dibujar cielo (mitad superior)
+            pygame.draw.rect(
+                surface,
+                self.sky_color,
+                (0, 0, width, height // 2)
+            )
+            
+            # Dibujar piso (mitad inferior)
+            pygame.draw.rect(
+                surface,
+                self.floor_color,
+                (0, height // 2, width, height - height // 2)
+            )
+        else:
+            # Sin framebuffer no hay floor casting: se usa el fondo degradado
+            self.get_backdrop(width, height)
+            surface.blit(self._backdrop_surface, (0, 0))
+        
+        # El ancho de columna depende de la cantidad de rayos actual
+        self.column_width = width / len(rays)
+        
+        # Colores sombreados [nivel][tipo] y coeficientes de blit por nivel
+        shaded_colors, blend_params = self.get_wall_color_tables()
+        colormap = self.colormap
         
         # Dibujar cada rayo como una columna vertical
-        for i, (distance, wall_type, hit_x, hit_y) in enumerate(rays):
+        for i, (distance, wall_type, hit_x, hit_y, side, tex_u) in enumerate(rays.tolist()):
             if wall_type == 0:
                 continue
             
@@ -52,66 +300,417 @@ class Renderer:
             if distance == 0:
                 distance = 1
             
-            wall_height = (Config.TILE_SIZE * Config.SCREEN_HEIGHT) / distance
+            wall_height = (Config.TILE_SIZE * height) / distance
             
             # Calcular posición vertical
-            top = (Config.SCREEN_HEIGHT - wall_height) // 2
+            top = (height - wall_height) // 2
             bottom = top + wall_height
             
             # Limitar al tamaño de pantalla
             if top < 0:
                 top = 0
-            if bottom > Config.SCREEN_HEIGHT:
-                bottom = Config.SCREEN_HEIGHT
+            if bottom > height:
+                bottom = height
+            
+            # Fila de las tablas según la distancia y la luz de la cara
+            bucket = colormap.bucket_of(distance) + light_rows[i]
             
-            # Obtener color de la pared
-            base_color = self.wall_colors.get(wall_type, Config.GRAY)
+            x = i * self.column_width
+            if Config.TEXTURED_WALLS:
+                self.draw_textured_column(surface, x, wall_type, tex_u, wall_height, blend_params[bucket])
+                continue
             
-            # Aplicar sombreado basado en distancia
-            shade_factor = max(0.3, 1 - (distance / Config.MAX_DEPTH))
-            color = tuple(int(c * shade_factor) for c in base_color)
+            # Color de la pared ya sombreado (tabla)
+            color = shaded_colors[bucket][min(wall_type, 255)]
             
             # Dibujar columna
-            x = i * self.column_width
             pygame.draw.rect(
-                self.screen,
+                surface,
                 color,
                 (x, top, self.column_width + 1, bottom - top)
             )
     
-    def render_minimap(self, player, position=(10, 10), scale=5):
+    def draw_textured_column(self, surface, x, wall_type, tex_u, wall_height, blend):
         """
-        Renderiza un minimapa en 2D con radio de colisión visible
+        Dibuja una columna de pared texturizada usando la cache de columnas
+        escaladas y la sombrea con blend = (mul, add) del colormap
         """
-        minimap_surface = pygame.Surface(
-            (len(self.raycaster.map[0]) * scale, len(self.raycaster.map) * scale)
+        step = Config.TEXTURE_HEIGHT_STEP
+        view_height = surface.get_height()
+        height = max(step, int(wall_height / step + 0.5) * step)
+        width = int(self.column_width) + 1
+        strip = self.wall_textures.get_column(
+            wall_type, tex_u, height, width, view_height
         )
-        minimap_surface.fill(Config.BLACK)
-        minimap_surface.set_alpha(200)  # Semi-transparente
-        
-        # Dibujar mapa
-        for row in range(len(self.raycaster.map)):
-            for col in range(len(self.raycaster.map[0])):
-                if self.raycaster.map[row][col] > 0:
-                    wall_type = self.raycaster.map[row][col]
-                    color = self.wall_colors.get(wall_type, Config.WHITE)
-                    pygame.draw.rect(
-                        minimap_surface,
-                        color,
-                        (col * scale, row * scale, scale, scale)
-                    )
-                else:
-                    # Dibujar piso con color más oscuro
-                    pygame.draw.rect(
-                        minimap_surface,
-                        (20, 20, 20),
-                        (col * scale, row * scale, scale, scale)
-                    )
+        top = max(0, (view_height - height) // 2)
+        surface.blit(strip, (x, top))
+        
+        mul, add = blend
+        rect = (x, top, width, strip.get_height())
+        surface.fill(mul, rect, special_flags=pygame.BLEND_RGB_MULT)
+        if add != (0, 0, 0):
+            # Niebla o tinte
+            surface.fill(add, rect, special_flags=pygame.BLEND_RGB_ADD)
+    
+    def draw_floor_ceiling(self, framebuffer, player):
+        """
+        Dibuja piso y techo en el framebuffer según Config.FLOOR_MODE
+        """
+        width, height = framebuffer.shape
+        
+        if Config.FLOOR_MODE == "textured":
+            self.cast_floor_ceiling(framebuffer, player)
+        elif Config.FLOOR_MODE == "gradient":
+            framebuffer[:] = self.get_backdrop(width, height)
+        else:
+            framebuffer[:, :height // 2] = self.map_colors(self.sky_color)
+            framebuffer[:, height // 2:] = self.map_colors(self.floor_color)
+    
+    def cast_floor_ceiling(self, framebuffer, player):
+        """
+        Floor casting vectorizado: para cada fila bajo el horizonte la
+        distancia al piso sale de las tablas, así que la posición en el mundo
+        de todos los pixeles se obtiene con un producto externo. El techo usa
+        las mismas posiciones en la fila espejada y ambos se muestrean con un
+        único take sobre el framebuffer
+        """
+        width, height = framebuffer.shape
+        horizon = height // 2
+        tables = get_ray_tables()
+        stack, row_levels, ceiling_offset, light_stride = self.get_floor_stacks(height)
+        size = Config.TEXTURE_SIZE
+        
+        # Dirección de cada columna dividida por la corrección de ojo de pez,
+        # para que multiplicada por la distancia perpendicular dé el desplazamiento
+        dir_x, dir_y = tables.ray_directions(math.cos(player.angle), math.sin(player.angle))
+        column_rays = tables.column_rays(width)
+        texel_scale = size / Config.TILE_SIZE
+        step_x = (dir_x / tables.fisheye * texel_scale).astype(np.float32)[column_rays]
+        step_y = (dir_y / tables.fisheye * texel_scale).astype(np.float32)[column_rays]
+        row_distance = tables.row_distances(height).astype(np.float32)
+        
+        # Coordenadas de textura de todos los pixeles del piso (ancho, filas)
+        tex_x = np.multiply.outer(step_x, row_distance)
+        tex_x += np.float32(player.x * texel_scale)
+        tex_y = np.multiply.outer(step_y, row_distance)
+        tex_y += np.float32(player.y * texel_scale)
+        floor_index = self.wrap_texels(tex_x.astype(np.int32), size)
+        floor_index *= size
+        floor_index += self.wrap_texels(tex_y.astype(np.int32), size)
+        # Nivel de sombreado por fila y de luz por tile (tile = texel // size)
+        floor_index += row_levels
+        if light_stride:
+            tiles_x = np.floor_divide(tex_x, size).astype(np.int64)
+            tiles_y = np.floor_divide(tex_y, size).astype(np.int64)
+            floor_index += self.colormap.light_rows(
+                self.lightmap.values_at_cells(tiles_x, tiles_y), light_stride
+            )
+        
+        index = self.get_index_buffer(width, height)
+        index[:, horizon:] = floor_index
+        index[:, :horizon] = floor_index[:, ::-1][:, :horizon]
+        index[:, :horizon] += ceiling_offset
+        np.take(stack, index, out=framebuffer)
+    
+    @staticmethod
+    def wrap_texels(coords, size):
+        """Coordenada de texel módulo size (con máscara si size es potencia de 2)"""
+        if size & (size - 1) == 0:
+            return np.bitwise_and(coords, size - 1, out=coords)
+        return np.remainder(coords, size, out=coords)
+    
+    def apply_flash(self, pixels, surface):
+        """
+        Destello del colormap como tinte posterior sobre pixeles de 32 bits
+        (ancho, alto) ya sombreados en el formato de surface: canal * mul /
+        256 + add. El mul es común a los tres canales, así que se escalan de
+        a dos canales por operación sin desempaquetar (ver Colormap.flash_blend)
+        """
+        blend = self.colormap.flash_blend()
+        if blend is None:
+            return
+        mul, add = blend
+        mul = np.uint32(mul[0])
+        if pixels.T.flags.c_contiguous:
+            # Vista de pixels2d: se recorre en el orden de la memoria
+            pixels = pixels.T
+        if self._tint_buffer is None or self._tint_buffer.shape != pixels.shape:
+            self._tint_buffer = np.empty(pixels.shape, dtype=np.uint32)
+        high = self._tint_buffer
+        np.right_shift(pixels, 8, out=high)
+        high &= 0x00FF00FF
+        high *= mul
+        high &= 0xFF00FF00
+        pixels &= 0x00FF00FF
+        pixels *= mul
+        pixels >>= 8
+        pixels &= 0x00FF00FF
+        pixels |= high
+        pixels += np.uint32(surface.map_rgb(add) & ~surface.get_masks()[3])
+    
+    def apply_flash_surface(self, surface):
+        """apply_flash sobre una Surface (con blits de mezcla si no es de 32 bits)"""
+        blend = self.colormap.flash_blend()
+        if blend is None:
+            return
+        if surface.get_bytesize() == 4:
+            pixels = pygame.surfarray.pixels2d(surface)
+            self.apply_flash(pixels, surface)
+            del pixels  # Libera el lock de la Surface
+        else:
+            mul, add = blend
+            surface.fill(mul, special_flags=pygame.BLEND_RGB_MULT)
+            surface.fill(add, special_flags=pygame.BLEND_RGB_ADD)
+    
+    def get_index_buffer(self, width, height):
+        """Buffer de índices (ancho, alto) reutilizado entre frames"""
+        if self._index_buffer is None or self._index_buffer.shape != (width, height):
+            self._index_buffer = np.empty((width, height), dtype=np.intp)
+        return self._index_buffer
+    
+    def get_floor_stacks(self, height):
+        """
+        Retorna las texturas de piso y techo ya sombreadas para cada nivel de
+        luz y de distancia, aplanadas en un solo arreglo (por nivel de luz:
+        piso primero, luego techo), junto con el offset de nivel de cada
+        fila, el offset del techo y el de cada nivel de luz (0 sin lightmap)
+        """
+        levels = Config.FLOOR_SHADE_LEVELS
+        size = Config.TEXTURE_SIZE
+        lit = self.lightmap is not None
+        key = (height, levels, size, Config.MAX_DEPTH, self.colormap.version)
+        cached = self._floor_stacks.get(lit)
+        if cached is None or cached[0] != key:
+            floor = pygame.surfarray.array3d(
+                load_or_make_texture(Config.FLOOR_TEXTURE, self.floor_color, size, seed=100)
+            )
+            ceiling = pygame.surfarray.array3d(
+                load_or_make_texture(Config.CEILING_TEXTURE, self.sky_color, size, seed=101)
+            )
+            
+            # Se sombrea la paleta de las texturas y luego se indexa:
+            # (luz, piso/techo, nivel, size, size)
+            palette, indices = build_palette(np.stack([floor, ceiling]))
+            lut = self.map_colors(self.colormap.shade(palette, levels, lit))
+            lights = len(lut) // levels
+            stack = lut.reshape(lights, levels, -1)[:, :, indices].transpose(0, 2, 1, 3, 4).ravel()
+            
+            row_distance = get_ray_tables().row_distances(height)
+            level = np.minimum((row_distance / Config.MAX_DEPTH * levels).astype(np.int32), levels - 1)
+            row_levels = level * size * size
+            ceiling_offset = levels * size * size
+            light_stride = 2 * ceiling_offset if lit else 0
+            
+            cached = self._floor_stacks[lit] = (key, stack, row_levels, ceiling_offset, light_stride)
+        return cached[1:]
+    
+    def get_backdrop(self, width, height):
+        """
+        Retorna el fondo precalculado (cielo y piso degradados según la
+        distancia de cada fila) como pixeles empaquetados (ancho, alto)
+        """
+        key = (width, height, Config.MAX_DEPTH, self.colormap.version)
+        if self._backdrop is None or self._backdrop_key != key:
+            self.get_framebuffer(width, height)
+            # Nivel del colormap de cada fila según su distancia
+            bucket = self.colormap.bucket(get_ray_tables().row_distances(height))
+            floor = self.colormap.shade(self.floor_color)[bucket]
+            sky = self.colormap.shade(self.sky_color)[bucket]
+            
+            horizon = height // 2
+            column = np.empty(height, dtype=np.uint32)
+            column[horizon:] = self.map_colors(floor)
+            column[:horizon] = self.map_colors(sky)[::-1][:horizon]
+            
+            self._backdrop = np.repeat(column[None, :], width, axis=0)
+            self._backdrop_surface = pygame.Surface((width, height), 0, 32)
+            pygame.surfarray.blit_array(self._backdrop_surface, self._backdrop)
+            self._backdrop_key = key
+        return self._backdrop
+    
+    def draw_walls_framebuffer(self, rays, light_rows=None):
+        """
+        Dibuja las paredes escribiendo todas las columnas de una vez en el
+        framebuffer NumPy (que luego se copia a pantalla con un único blit).
+        light_rows: offsets de luz por rayo (ver wall_light_rows)
+        """
+        framebuffer = self.framebuffer
+        width, height = framebuffer.shape
+        
+        # Altura, recorte y sombreado de todas las paredes en forma vectorizada
+        distance = np.maximum(rays['distance'], 1)
+        wall_type = rays['wall_type']
+        wall_height = (Config.TILE_SIZE * height) / distance
+        wall_top = (height - wall_height) / 2
+        top = np.floor(wall_top)
+        bottom = np.minimum(top + wall_height, height)
+        top = np.maximum(top, 0)
+        # Rayos sin pared no dibujan nada
+        bottom = np.where(wall_type > 0, bottom, top)
+        
+        # Fila de las tablas del colormap de cada rayo: distancia y luz
+        if light_rows is None:
+            light_rows = (self.colormap.light_levels - 1) * self.colormap.levels
+        bucket = self.colormap.bucket(distance) + light_rows
+        
+        # Expandir de rayos a columnas de pantalla
+        column_rays = get_ray_tables().column_rays(width)
+        rows = np.arange(height)
+        mask = (rows >= top[column_rays, None]) & (rows < bottom[column_rays, None])
+        
+        if Config.TEXTURED_WALLS:
+            pixels = self.sample_wall_textures(
+                rays, wall_height, wall_top, bucket, column_rays, rows
+            )
+        else:
+            color_lut = self.get_wall_luts()[0]
+            pixels = color_lut[bucket, np.minimum(wall_type, 255)][column_rays, None]
+        np.copyto(framebuffer, pixels, where=mask)
+    
+    def sample_wall_textures(self, rays, wall_height, wall_top, bucket, column_rays, rows):
+        """
+        Muestrea las texturas de pared para todas las columnas de pantalla.
+        Las texturas están guardadas como índices de paleta: la columna de
+        textura de cada rayo se sombrea con una búsqueda en la tabla de su
+        nivel y luego se estira verticalmente con un único take
+        """
+        _, texture_lut = self.get_wall_luts()
+        indices = self.get_texture_palette()[1]
+        size = indices.shape[1]
+        
+        wall_type = rays['wall_type']
+        tex_index = np.where(wall_type < len(indices), wall_type, 0)
+        tex_column = np.minimum((rays['tex_u'] * size).astype(np.intp), size - 1)
+        
+        # (rayos, size) pixeles empaquetados ya sombreados
+        texels = texture_lut[bucket[:, None], indices[tex_index, tex_column]]
+        
+        # Fila de textura para cada pixel de cada columna de pantalla, como
+        # índice plano dentro de texels (float32 e in-place para ahorrar memoria)
+        v = rows.astype(np.float32) - wall_top.astype(np.float32)[column_rays, None]
+        v *= (size / wall_height).astype(np.float32)[column_rays, None]
+        np.clip(v, 0, size - 1, out=v)
+        index = v.astype(np.intp)
+        index += (column_rays * size)[:, None]
+        return texels.ravel().take(index)
+    
+    def get_texture_stack(self):
+        """Retorna las texturas de pared apiladas (tipos, size, size, 3)"""
+        if self._texture_stack is None:
+            self._texture_stack = self.wall_textures.texture_array()
+        return self._texture_stack
+    
+    def get_texture_palette(self):
+        """
+        Paleta común de las texturas de pared y texturas como índices de
+        paleta: (paleta (P, 3), índices (tipos, size, size))
+        """
+        if self._texture_palette is None:
+            self._texture_palette = build_palette(self.get_texture_stack())
+        return self._texture_palette
+    
+    def get_wall_luts(self):
+        """
+        Tablas de pixeles empaquetados ya sombreados por nivel de luz y de
+        distancia: (colores planos (luces * niveles, 256), paleta de texturas
+        (luces * niveles, P)). Se reconstruyen solo si cambió el colormap
+        (niebla, tinte)
+        """
+        key = (self.colormap.version, self.colormap.levels, Config.MAX_DEPTH)
+        if self._wall_luts is None or self._wall_luts[0] != key:
+            color_lut = self.map_colors(self.colormap.shade(self.get_wall_palette(), lit=True))
+            texture_lut = None
+            if Config.TEXTURED_WALLS:
+                palette = self.get_texture_palette()[0]
+                texture_lut = self.map_colors(self.colormap.shade(palette, lit=True))
+            self._wall_luts = (key, color_lut, texture_lut)
+        return self._wall_luts[1:]
+    
+    def get_wall_color_tables(self):
+        """
+        Tablas del camino escalar: colores sombreados [fila][tipo] y
+        (mul, add) de blit por fila (fila = nivel de luz y de distancia)
+        """
+        key = (self.colormap.version, self.colormap.levels)
+        if self._wall_color_tables is None or self._wall_color_tables[0] != key:
+            colors = self.colormap.shade_list(self.get_wall_palette().tolist(), lit=True)
+            blend = self.colormap.blend_table(lit=True)
+            self._wall_color_tables = (key, colors, blend)
+        return self._wall_color_tables[1:]
+    
+    def get_framebuffer(self, width, height):
+        """
+        Retorna el framebuffer (ancho, alto) de pixeles empaquetados en uint32,
+        recreándolo si cambió el tamaño
+        """
+        if self.framebuffer is None or self.framebuffer.shape != (width, height):
+            self.get_view_surface(width, height)
+            self.framebuffer = np.zeros((width, height), dtype=np.uint32)
+        return self.framebuffer
+    
+    def get_view_surface(self, width, height):
+        """Surface de 32 bits donde se compone la vista 3D a resolución interna"""
+        if self.view_surface is None or self.view_surface.get_size() != (width, height):
+            self.view_surface = pygame.Surface((width, height), 0, 32)
+        return self.view_surface
+    
+    def map_colors(self, colors):
+        """
+        Convierte colores RGB (..., 3) al valor de pixel empaquetado de
+        view_surface, equivalente vectorizado de Surface.map_rgb
+        """
+        colors = np.asarray(colors, dtype=np.uint32)
+        shifts = self.view_surface.get_shifts()
+        losses = self.view_surface.get_losses()
+        return (
+            ((colors[..., 0] >> losses[0]) << shifts[0])
+            | ((colors[..., 1] >> losses[1]) << shifts[1])
+            | ((colors[..., 2] >> losses[2]) << shifts[2])
+        )
+    
+    def get_wall_palette(self):
+        """Retorna los colores de pared como arreglo (256, 3) indexado por tipo"""
+        palette = np.empty((256, 3), dtype=np.float64)
+        palette[:] = Config.GRAY
+        for wall_type, color in self.wall_colors.items():
+            palette[wall_type] = color
+        return palette
+    
+    def render_minimap(self, player, position=(10, 10), scale=5, view_tiles=None):
+        """
+        Renderiza un minimapa en 2D con radio de colisión visible y retorna
+        el rect que ocupa en pantalla.
+        La capa de tiles se dibuja una sola vez en cache; por frame solo se
+        componen el jugador, su radio de colisión y su dirección.
+        view_tiles: si se indica, muestra solo una ventana de
+        (2 * view_tiles + 1) tiles alrededor del jugador (mapas grandes)
+        """
+        if view_tiles is None:
+            view_tiles = Config.MINIMAP_VIEW_TILES
+        
+        layer = self.get_minimap_layer(scale)
+        layer_width, layer_height = layer.get_size()
         
         # Calcular posición del jugador en el minimap
         player_map_x = int(player.x // Config.TILE_SIZE * scale)
         player_map_y = int(player.y // Config.TILE_SIZE * scale)
         
+        # Ventana visible de la capa de tiles
+        width, height = layer_width, layer_height
+        origin_x = origin_y = 0
+        if view_tiles:
+            size = (2 * view_tiles + 1) * scale
+            width = min(size, layer_width)
+            height = min(size, layer_height)
+            origin_x = max(0, min(player_map_x - width // 2, layer_width - width))
+            origin_y = max(0, min(player_map_y - height // 2, layer_height - height))
+        
+        minimap_surface = self.get_minimap_frame(width, height)
+        minimap_surface.blit(layer, (0, 0), (origin_x, origin_y, width, height))
+        
+        player_map_x -= origin_x
+        player_map_y -= origin_y
+        
         # Dibujar radio de colisión del jugador
         collision_radius_scaled = int(player.collision_radius / Config.TILE_SIZE * scale)
         pygame.draw.circle(
@@ -132,8 +731,10 @@ class Renderer:
         
         # Dibujar dirección del jugador
         dir_length = 15
-        end_x = player_map_x + int(math.cos(player.angle) * dir_length)
-        end_y = player_map_y + int(math.sin(player.angle) * dir_length)
+        dir_x = math.cos(player.angle)
+        dir_y = math.sin(player.angle)
+        end_x = player_map_x + int(dir_x * dir_length)
+        end_y = player_map_y + int(dir_y * dir_length)
         pygame.draw.line(
             minimap_surface,
             Config.RED,
@@ -146,8 +747,83 @@ class Renderer:
         pygame.draw.rect(
             minimap_surface,
             Config.WHITE,
-            (0, 0, minimap_surface.get_width(), minimap_surface.get_height()),
+            (0, 0, width, height),
             2
         )
         
-        self.screen.blit(minimap_surface, position)
\ No newline at end of file
+        return self.screen.blit(minimap_surface, position)
+    
+    def get_minimap_layer(self, scale):
+        """
+        Retorna la capa de tiles del minimapa, dibujándola solo si cambió el
+        mapa o la escala (ver invalidate_minimap)
+        """
+        game_map = self.raycaster.map
+        key = (id(game_map), game_map.version, scale)
+        if self._minimap_layer is not None and self._minimap_key == key:
+            return self._minimap_layer
+        
+        # Color por tipo de tile: piso más oscuro, paredes con su color
+        palette = np.empty((256, 3), dtype=np.uint8)
+        palette[:] = Config.WHITE
+        palette[0] = (20, 20, 20)
+        for wall_type, color in self.wall_colors.items():
+            palette[wall_type] = color
+        
+        # Un pixel por tile (surfarray usa (x, y)) y luego escalar
+        pixels = palette[game_map.tiles.T]
+        layer = pygame.transform.scale(
+            pygame.surfarray.make_surface(pixels),
+            (game_map.width * scale, game_map.height * scale),
+        )
+        
+        self._minimap_layer = layer
+        self._minimap_key = key
+        return layer
+    
+    def get_minimap_frame(self, width, height):
+        """Retorna la Surface semi-transparente reutilizada para componer el minimapa"""
+        if self._minimap_frame is None or self._minimap_frame.get_size() != (width, height):
+            self._minimap_frame = pygame.Surface((width, height))
+            self._minimap_frame.set_alpha(200)  # Semi-transparente
+        return self._minimap_frame
+    
+    def set_map(self, game_map, pvs=None, lightmap=None, segments=()):
+        """
+        Cambia el mapa que se renderiza (GridMap o matriz 2D).
+        pvs: PotentiallyVisibleSet del mapa para descartar sprites ocultos
+        lightmap: Lightmap del mapa (sin luces se ignora)
+        segments: paredes en ángulo del mapa (solo con el motor "bvh")
+        """
+        self.raycaster.close()
+        self.raycaster = RayCaster(game_map, segments)
+        self.particles.set_map(self.raycaster.map)
+        self.pvs = pvs
+        static = lightmap if lightmap is not None and lightmap.lit else None
+        self.dynamic_lights = None
+        if Config.DYNAMIC_LIGHTS:
+            self.dynamic_lights = DynamicLightmap(self.raycaster.map, static)
+        self.lightmap = static
+        self.invalidate_minimap()
+    
+    def update_lights(self, spells):
+        """
+        Mueve las luces dinámicas a la posición de los hechizos vivos con
+        luz en Config.SPELL_LIGHTS. Se llama una vez por frame antes de dibujar
+        """
+        lights = self.dynamic_lights
+        if lights is None:
+            return
+        sources = {}
+        for spell in spells:
+            light = Config.SPELL_LIGHTS.get(getattr(spell, "name", None))
+            if light is not None and spell.alive:
+                sources[id(spell)] = (spell.x, spell.y, *light)
+        if sources or lights.sources:
+            lights.sync(sources)
+        # Sin luces encendidas se usa la luz horneada tal cual
+        self.lightmap = lights if lights.sources else lights.static
+    
+    def invalidate_minimap(self):
+        """Fuerza a redibujar la capa de tiles (ediciones directas a GridMap.tiles, sin version)"""
+        self._minimap_layer = None
@@ -0,0 +1,71 @@
+"""
+Resolución dinámica
+Mide el tiempo de los últimos frames y ajusta la resolución interna de la
+vista 3D (Renderer.render_scale) dentro de los límites configurados para
+sostener Config.FPS. La cantidad de rayos (y con ella el paso angular y la
+cache de coherencia) no cambia: se reduce el costo de piso, paredes y blit.
+Usa una banda muerta entre los umbrales de bajada y subida y un período de
+espera tras cada cambio para no oscilar.
+"""
+from collections import deque
+from src.game.config import Config
+
+
+class DynamicResolution:
+    def __init__(self, renderer, target_fps=None, min_scale=None, max_scale=None):
+        self.renderer = renderer
+        self.target_fps = target_fps or Config.FPS
+        self.min_scale = min_scale or Config.RENDER_SCALE_MIN
+        self.max_scale = max_scale or Config.RENDER_SCALE_MAX
+        self.frame_times = deque(maxlen=Config.DYNRES_WINDOW)
+        self.cooldown = 0
+        self.scale = self.clamp(renderer.render_scale)
+
+    @property
+    def budget_ms(self):
+        return 1000.0 / self.target_fps
+
+    def clamp(self, scale):
+        return max(self.min_scale, min(self.max_scale, scale))
+
+    def record(self, frame_ms):
+        """
+        Registra el tiempo de trabajo de un frame (sin la espera del reloj)
+        y ajusta la escala si corresponde. Retorna True si cambió
+        """
+        self.frame_times.append(frame_ms)
+        if self.cooldown > 0:
+            self.cooldown -= 1
+            return False
+        if len(self.frame_times) < self.frame_times.maxlen:
+            return False
+
+        average = sum(self.frame_times) / len(self.frame_times)
+        budget = self.budget_ms
+
+        if average > budget * Config.DYNRES_DOWN_THRESHOLD:
+            new_scale = self.scale * Config.DYNRES_DOWN_STEP
+        elif average < budget * Config.DYNRES_UP_THRESHOLD:
+            new_scale = self.scale * Config.DYNRES_UP_STEP
+        else:
+            # Dentro de la banda muerta: no tocar nada
+            return False
+
+        new_scale = self.clamp(new_scale)
+        if new_scale == self.scale:
+            return False
+
+        self.apply(new_scale)
+        return True
+
+    def apply(self, scale):
+        """Fija la escala de la vista del renderer (el framebuffer se recrea solo)"""
+        self.renderer.render_scale = scale
+        self.scale = self.renderer.render_scale
+        # Esperar a que los frames reflejen el cambio antes de volver a medir
+        self.frame_times.clear()
+        self.cooldown = Config.DYNRES_COOLDOWN
+
+    def reset(self):
+        self.frame_times.clear()
+        self.cooldown = 0
@@ -0,0 +1,177 @@
+"""
+Sprites billboard (enemigos y hechizos)
+Proyecta todas las entidades vivas a pantalla en un solo lote NumPy,
+descarta las que quedan fuera del FOV o más allá de MAX_DEPTH, las ordena
+por profundidad y recorta sus columnas contra el depth buffer por columna
+que deja el raycaster.
+"""
+import math
+from collections import OrderedDict
+import numpy as np
+import pygame
+from src.game.config import Config
+from src.rendering.tables import get_ray_tables
+from src.rendering.textures import find_texture, load_texture
+
+# Color de transparencia de los sprites
+COLORKEY = (255, 0, 255)
+
+# Apariencia por tipo: (color, escala respecto a TILE_SIZE, flota a la altura de los ojos)
+SPRITE_KINDS = {
+    "basic": ((180, 40, 40), 0.8, False),
+    "fast": ((60, 170, 60), 0.6, False),
+    "tank": ((90, 90, 160), 1.0, False),
+    "boss": ((160, 40, 160), 1.4, False),
+    "fireball": (Config.ORANGE, 0.3, True),
+    "lightning": (Config.YELLOW, 0.3, True),
+}
+
+
+def make_sprite_image(color, size, floating):
+    """Genera una imagen simple para un tipo de sprite sin textura en assets"""
+    surf = pygame.Surface((size, size))
+    surf.fill(COLORKEY)
+    surf.set_colorkey(COLORKEY)
+    center = size // 2
+    if floating:
+        # Proyectil: núcleo claro con halo del color del hechizo
+        pygame.draw.circle(surf, color, (center, center), center)
+        pygame.draw.circle(surf, Config.WHITE, (center, center), max(1, center // 2))
+    else:
+        # Enemigo: cuerpo ovalado con ojos
+        pygame.draw.ellipse(surf, color, (size // 8, 0, size * 3 // 4, size))
+        eye = max(1, size // 12)
+        pygame.draw.circle(surf, Config.WHITE, (center - size // 8, size // 4), eye)
+        pygame.draw.circle(surf, Config.WHITE, (center + size // 8, size // 4), eye)
+    return surf
+
+
+class SpriteRenderer:
+    def __init__(self, cache_size=None):
+        self.images = {}
+        self.cache_size = cache_size or Config.SPRITE_CACHE_SIZE
+        self._cache = OrderedDict()
+        self.drawn = 0
+
+    def kind_of(self, entity):
+        """Tipo de sprite de una entidad (tipo de enemigo o nombre de hechizo)"""
+        return getattr(entity, "type", None) or getattr(entity, "name", "basic")
+
+    def get_image(self, kind):
+        """Imagen base de un tipo, cargada de assets/textures/sprite_{tipo} o generada"""
+        image = self.images.get(kind)
+        if image is None:
+            color, _, floating = SPRITE_KINDS.get(kind, SPRITE_KINDS["basic"])
+            name = f"sprite_{kind}"
+            if find_texture(name):
+                image = load_texture(name)
+            else:
+                image = make_sprite_image(color, Config.TEXTURE_SIZE, floating)
+            self.images[kind] = image
+        return image
+
+    def get_scaled(self, kind, size):
+        """Imagen escalada a size x size, con cache LRU por (tipo, tamaño)"""
+        key = (kind, size)
+        image = self._cache.get(key)
+        if image is not None:
+            self._cache.move_to_end(key)
+            return image
+
+        image = pygame.transform.scale(self.get_image(kind), (size, size))
+        self._cache[key] = image
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return image
+
+    def project(self, player, xs, ys, scales, width, height):
+        """
+        Proyecta un lote de posiciones a pantalla.
+        Retorna (visible, depth, screen_x, size) donde depth es la distancia
+        perpendicular (comparable con el depth buffer) y size el alto en pixeles
+        """
+        tables = get_ray_tables()
+        cos_a = math.cos(player.angle)
+        sin_a = math.sin(player.angle)
+
+        dx = xs - player.x
+        dy = ys - player.y
+        depth = dx * cos_a + dy * sin_a
+        lateral = dy * cos_a - dx * sin_a
+        angle = np.arctan2(lateral, depth)
+
+        # Los rayos están repartidos uniformemente en ángulo sobre el FOV
+        screen_x = (angle + tables.half_fov) / tables.fov * width
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            size = Config.TILE_SIZE * height / depth * scales
+            half_angle = np.arctan2(scales * Config.TILE_SIZE / 2, depth)
+
+        visible = (
+            (depth > Config.SPRITE_NEAR)
+            & (np.hypot(dx, dy) < Config.MAX_DEPTH)
+            & (np.abs(angle) < tables.half_fov + half_angle)
+        )
+        return visible, depth, screen_x, size
+
+    def render(self, surface, player, entities, depth_buffer):
+        """
+        Dibuja las entidades sobre surface, recortadas contra depth_buffer
+        (distancia perpendicular por rayo). Retorna la cantidad dibujada
+        """
+        self.drawn = 0
+        count = len(entities)
+        if count == 0:
+            return 0
+
+        width, height = surface.get_size()
+        kinds = [self.kind_of(e) for e in entities]
+        xs = np.fromiter((e.x for e in entities), dtype=np.float64, count=count)
+        ys = np.fromiter((e.y for e in entities), dtype=np.float64, count=count)
+        kind_info = [SPRITE_KINDS.get(k, SPRITE_KINDS["basic"]) for k in kinds]
+        scales = np.fromiter((info[1] for info in kind_info), dtype=np.float64, count=count)
+
+        visible, depth, screen_x, size = self.project(player, xs, ys, scales, width, height)
+        indices = np.flatnonzero(visible)
+        if indices.size == 0:
+            return 0
+
+        # Del más lejano al más cercano
+        indices = indices[np.argsort(-depth[indices], kind='stable')]
+
+        column_depth = depth_buffer[get_ray_tables().column_rays(width)]
+        step = Config.SPRITE_SIZE_STEP
+        max_size = height * 2
+        horizon = height // 2
+
+        for i in indices.tolist():
+            sprite_size = min(max_size, max(step, int(size[i] / step + 0.5) * step))
+            left = int(screen_x[i]) - sprite_size // 2
+            first = max(0, left)
+            last = min(width, left + sprite_size)
+            if first >= last:
+                continue
+
+            # Columnas donde el sprite está delante de la pared
+            in_front = column_depth[first:last] > depth[i]
+            if not in_front.any():
+                continue
+            edges = np.diff(np.concatenate(([0], in_front.view(np.int8), [0])))
+            starts = np.flatnonzero(edges == 1)
+            ends = np.flatnonzero(edges == -1)
+
+            if kind_info[i][2]:
+                # Flota centrado en el horizonte
+                top = horizon - sprite_size // 2
+            else:
+                # Apoyado en el piso a su distancia
+                floor_y = horizon + Config.TILE_SIZE * height / (2 * depth[i])
+                top = int(floor_y) - sprite_size
+
+            image = self.get_scaled(kinds[i], sprite_size)
+            for start, end in zip(starts.tolist(), ends.tolist()):
+                x = first + start
+                surface.blit(image, (x, top), (x - left, 0, end - start, sprite_size))
+            self.drawn += 1
+
+        return self.drawn
@@ -0,0 +1,83 @@
+"""
+Tablas precalculadas para el raycasting
+Ángulos relativos de cada rayo, offsets del plano de cámara y factores de
+corrección de ojo de pez. Dependen solo de la resolución, el FOV y la
+cantidad de rayos, así que se calculan una vez y se reconstruyen solas
+cuando alguno de esos valores de Config cambia en tiempo de ejecución.
+"""
+import numpy as np
+from src.game.config import Config
+
+
+class RayTables:
+    def __init__(self, screen_width, screen_height, fov, num_rays):
+        self.key = (screen_width, screen_height, fov, num_rays)
+        self.screen_width = screen_width
+        self.screen_height = screen_height
+        self.fov = fov
+        self.num_rays = num_rays
+        self.half_fov = fov / 2
+        self.delta_angle = fov / num_rays
+
+        # Ángulo de cada rayo relativo a la dirección del jugador
+        self.ray_offsets = -self.half_fov + np.arange(num_rays) * self.delta_angle
+        self.cos_offsets = np.cos(self.ray_offsets)
+        self.sin_offsets = np.sin(self.ray_offsets)
+
+        # Offset de cada rayo sobre el plano de cámara (a distancia 1)
+        self.camera_plane = np.tan(self.ray_offsets)
+
+        # Corrección de ojo de pez: cos(ángulo_jugador - ángulo_rayo)
+        self.fisheye = self.cos_offsets
+
+        # Versiones en listas para el backend escalar
+        self.cos_offsets_list = self.cos_offsets.tolist()
+        self.sin_offsets_list = self.sin_offsets.tolist()
+
+        self._column_rays = {}
+        self._row_distances = {}
+
+    def ray_directions(self, cos_a, sin_a):
+        """
+        Retorna (dir_x, dir_y) de todos los rayos a partir del coseno y seno
+        del ángulo del jugador, sin evaluar trigonometría por rayo
+        """
+        dir_x = cos_a * self.cos_offsets - sin_a * self.sin_offsets
+        dir_y = sin_a * self.cos_offsets + cos_a * self.sin_offsets
+        return dir_x, dir_y
+
+    def column_rays(self, width):
+        """Retorna el índice de rayo que corresponde a cada columna de pantalla"""
+        columns = self._column_rays.get(width)
+        if columns is None:
+            columns = np.arange(width) * self.num_rays // width
+            self._column_rays[width] = columns
+        return columns
+
+    def row_distances(self, height):
+        """
+        Distancia perpendicular del punto de piso visible en cada fila desde
+        el horizonte (height // 2) hasta el borde inferior. Por simetría es
+        también la distancia del techo en la fila espejada
+        """
+        distances = self._row_distances.get(height)
+        if distances is None:
+            rows = np.maximum(np.arange(height // 2, height) + 0.5 - height / 2, 0.5)
+            distances = Config.TILE_SIZE * height / (2 * rows)
+            self._row_distances[height] = distances
+        return distances
+
+
+_tables = None
+
+
+def get_ray_tables():
+    """
+    Retorna las tablas para la configuración actual, reconstruyéndolas si
+    cambió la resolución, el FOV o la cantidad de rayos
+    """
+    global _tables
+    key = (Config.SCREEN_WIDTH, Config.SCREEN_HEIGHT, Config.FOV, Config.NUM_RAYS)
+    if _tables is None or _tables.key != key:
+        _tables = RayTables(*key)
+    return _tables
@@ -3,22 +3,29 @@ Funciones simples para cargar texturas.
 Si pygame no encuentra el archivo, se devuelve una Surface de placeholder.
 """
 import os
+from collections import OrderedDict
+import numpy as np
 import pygame
 from src.game.config import Config
 
+def find_texture(name: str):
+	"""Retorna la ruta de `assets/textures/{name}` (probando extensiones
+	comunes) o None si no existe.
+	"""
+	filepath = os.path.join('assets', 'textures', name)
+	if os.path.exists(filepath):
+		return filepath
+	for ext in ('.png', '.jpg', '.bmp'):
+		alt = filepath + ext
+		if os.path.exists(alt):
+			return alt
+	return None
+
 def load_texture(name: str):
 	"""Intenta cargar una textura desde `assets/textures/{name}`.
 	Retorna una `pygame.Surface`.
 	"""
-	assets_dir = os.path.join('assets', 'textures')
-	filepath = os.path.join(assets_dir, name)
-	if not os.path.exists(filepath):
-		# Intentar con extensiones comunes
-		for ext in ('.png', '.jpg', '.bmp'):
-			alt = filepath + ext
-			if os.path.exists(alt):
-				filepath = alt
-				break
+	filepath = find_texture(name) or os.path.join('assets', 'textures', name)
 
 	try:
 		return pygame.image.load(filepath).convert_alpha()
@@ -27,3 +34,129 @@ def load_texture(name: str):
 		surf = pygame.Surface((Config.TILE_SIZE, Config.TILE_SIZE))
 		surf.fill((255, 0, 255))  # magenta para indicar textura faltante
 		return surf
+
+
+def make_wall_texture(color, size=None, seed=0):
+	"""Genera una textura de ladrillos teñida con `color`.
+	Se usa para los tipos de pared que no tienen imagen en assets.
+	"""
+	size = size or Config.TEXTURE_SIZE
+	rng = np.random.default_rng(seed)
+	pixels = np.empty((size, size, 3), dtype=np.float64)
+	pixels[:] = color
+
+	# Variación leve por pixel para que no se vea plano
+	noise = rng.uniform(0.85, 1.1, (size, size))
+	pixels *= noise[:, :, None]
+
+	# Juntas de mortero: filas cada cuarto de textura y juntas verticales alternadas
+	brick_h = max(2, size // 4)
+	brick_w = max(2, size // 2)
+	for y in range(0, size, brick_h):
+		pixels[:, y] *= 0.5
+		offset = 0 if (y // brick_h) % 2 == 0 else brick_w // 2
+		for x in range(offset, size, brick_w):
+			pixels[x, y:y + brick_h] *= 0.5
+
+	surf = pygame.Surface((size, size))
+	pygame.surfarray.blit_array(surf, np.clip(pixels, 0, 255).astype(np.uint8))
+	return surf
+
+
+def load_or_make_texture(name, color, size=None, seed=0):
+	"""Carga la textura `name` escalada a size x size, o genera una con
+	`make_wall_texture` si no existe en assets.
+	"""
+	size = size or Config.TEXTURE_SIZE
+	if name and find_texture(name):
+		surf = load_texture(name)
+	else:
+		surf = make_wall_texture(color, size, seed=seed)
+	if surf.get_size() != (size, size):
+		surf = pygame.transform.scale(surf, (size, size))
+	return surf
+
+
+class WallTextures:
+	"""Texturas de pared por tipo, divididas en columnas de 1 pixel.
+
+	Las columnas escaladas se guardan en una cache LRU acotada con clave
+	(tipo, columna, altura cuantizada, ancho), así las alturas repetidas
+	no vuelven a pasar por `pygame.transform.scale`.
+	"""
+
+	def __init__(self, wall_colors, names=None, size=None, cache_size=None):
+		self.size = size or Config.TEXTURE_SIZE
+		self.names = Config.WALL_TEXTURES if names is None else names
+		self.cache_size = cache_size or Config.TEXTURE_CACHE_SIZE
+		self.textures = {}
+		self.columns = {}
+		self._cache = OrderedDict()
+		self.hits = 0
+		self.misses = 0
+
+		for wall_type, color in wall_colors.items():
+			self.add_texture(wall_type, color)
+
+	def add_texture(self, wall_type, color=Config.GRAY):
+		"""Carga (o genera) la textura de un tipo de pared y la divide en columnas"""
+		surf = load_or_make_texture(self.names.get(wall_type), color, self.size, seed=wall_type)
+		self.textures[wall_type] = surf
+		self.columns[wall_type] = [
+			surf.subsurface((x, 0, 1, self.size)) for x in range(self.size)
+		]
+		return surf
+
+	def get_texture(self, wall_type):
+		"""Retorna la textura completa de un tipo de pared"""
+		if wall_type not in self.textures:
+			self.add_texture(wall_type)
+		return self.textures[wall_type]
+
+	def get_column(self, wall_type, tex_u, height, width, view_height):
+		"""Retorna la columna de textura escalada a (width, height).
+
+		Si la pared es más alta que la vista, solo se escala la parte
+		visible (centrada) y la Surface resultante mide `view_height`.
+		"""
+		column = min(int(tex_u * self.size), self.size - 1)
+		key = (wall_type, column, height, width)
+
+		strip = self._cache.get(key)
+		if strip is not None:
+			self._cache.move_to_end(key)
+			self.hits += 1
+			return strip
+
+		self.misses += 1
+		if wall_type not in self.columns:
+			self.add_texture(wall_type)
+		strip = self.columns[wall_type][column]
+
+		if height > view_height:
+			# Recortar a la porción visible antes de escalar
+			visible = max(1, int(round(self.size * view_height / height)))
+			strip = strip.subsurface((0, (self.size - visible) // 2, 1, visible))
+			height = view_height
+
+		strip = pygame.transform.scale(strip, (width, height))
+		self._cache[key] = strip
+		if len(self._cache) > self.cache_size:
+			self._cache.popitem(last=False)
+		return strip
+
+	def texture_array(self):
+		"""Retorna las texturas apiladas como arreglo (tipos, size, size, 3).
+
+		El índice es el tipo de pared; el índice 0 contiene una textura gris
+		que se usa para tipos desconocidos.
+		"""
+		count = max(self.textures) + 1 if self.textures else 1
+		stack = np.empty((count, self.size, self.size, 3), dtype=np.uint8)
+		stack[0] = pygame.surfarray.array3d(make_wall_texture(Config.GRAY, self.size))
+		for wall_type in range(1, count):
+			stack[wall_type] = pygame.surfarray.array3d(self.get_texture(wall_type))
+		return stack
+
+	def clear_cache(self):
+		self._cache.clear()
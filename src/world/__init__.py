@@ -0,0 +1,27 @@
+"""
+Paquete del mundo.
+
+Exporta la representación de mapas de tiles (grid_map), la carga de
+niveles desde archivos (map_loader), el conjunto potencialmente visible
+(pvs), la luz horneada por tile (lightmap), las luces móviles de los
+hechizos (dynamic_lights), la pirámide de ocupación para saltar espacio
+vacío (occupancy) y los segmentos de pared con su BVH (segments).
+"""
+
+from . import grid_map
+from . import map_loader
+from . import pvs
+from . import lightmap
+from . import dynamic_lights
+from . import occupancy
+from . import segments
+
+__all__ = [
+	'grid_map',
+	'map_loader',
+	'pvs',
+	'lightmap',
+	'dynamic_lights',
+	'occupancy',
+	'segments',
+]
@@ -0,0 +1,148 @@
+"""
+Luces dinámicas
+Las luces que se mueven (hechizos en vuelo) se suman en una grilla de
+acumulación por tile sobre la luz horneada del mapa. Cada luz guarda el
+aporte que hizo en su región: al cambiar de tile se resta el aporte viejo y
+se suma el nuevo, y solo se recompone la luz de esas regiones. Mover una
+luz dentro del mismo tile no cuesta nada, y nunca se recalcula todo el mapa
+por frame aunque haya decenas de proyectiles.
+
+La luz combinada puede pasar de luz plena (LIGHT_MAX) hasta
+Config.LIGHT_OVERBRIGHT más: así los hechizos iluminan también los mapas
+sin luces. El colormap tiene niveles extra para ese rango.
+"""
+import numpy as np
+from src.game.config import Config
+from src.world.lightmap import LIGHT_MAX, Lightmap, light_box, light_contribution, make_light
+
+
+def light_cap():
+    """Valor máximo de la luz combinada (luz plena más el brillo extra)"""
+    return int(LIGHT_MAX * (1.0 + Config.LIGHT_OVERBRIGHT))
+
+
+class DynamicLightmap(Lightmap):
+    """
+    Lightmap con luces móviles: values (uint16) es la luz horneada más el
+    aporte de las luces dinámicas, así que se muestrea igual que un Lightmap
+    """
+
+    def __init__(self, grid, static=None):
+        """
+        grid: GridMap del nivel
+        static: Lightmap horneado del nivel (None = luz plena en todo el mapa)
+        """
+        self.static = static
+        # Aporte de las luces dinámicas por tile (1.0 = luz plena)
+        self.accum = np.zeros((grid.height, grid.width), dtype=np.float32)
+        # clave -> (luz, región, aporte) de cada fuente activa
+        self.sources = {}
+        self._dirty = []
+        self._grid_version = grid.version
+        self._static_version = static.version if static is not None else None
+        super().__init__(
+            grid, static.lights if static is not None else (),
+            np.empty((grid.height, grid.width), dtype=np.uint16),
+            static.ambient if static is not None else None,
+        )
+        self.compose((0, 0, grid.width, grid.height))
+
+    @property
+    def lit(self):
+        """True si hay luz horneada o alguna luz dinámica encendida"""
+        return self.static is not None or bool(self.sources)
+
+    def static_values(self, box):
+        """Luz horneada (float) de la región box"""
+        col0, row0, col1, row1 = box
+        if self.static is None:
+            return np.full((row1 - row0, col1 - col0), float(LIGHT_MAX))
+        return self.static.values[row0:row1, col0:col1].astype(np.float64)
+
+    def compose(self, box):
+        """Recalcula la luz combinada de la región box"""
+        col0, row0, col1, row1 = box
+        total = self.static_values(box) + self.accum[row0:row1, col0:col1] * LIGHT_MAX
+        self.values[row0:row1, col0:col1] = np.clip(total + 0.5, 0, light_cap()).astype(np.uint16)
+
+    def set_light(self, key, x, y, radius=None, intensity=None):
+        """
+        Enciende o mueve la luz key al punto (x, y) en pixeles. Solo se
+        recalcula si cambió de tile, de radio o de intensidad
+        """
+        tile = Config.TILE_SIZE
+        col = min(max(int(x // tile), 0), self.grid.width - 1)
+        row = min(max(int(y // tile), 0), self.grid.height - 1)
+        light = make_light(col, row, radius, intensity)
+        source = self.sources.get(key)
+        if source is not None:
+            if source[0] == light:
+                return
+            self.remove_light(key)
+        self.add_source(key, light)
+
+    def add_source(self, key, light):
+        """Suma el aporte de light (tupla de make_light) en su región"""
+        box = light_box(self.grid, light)
+        contribution = light_contribution(self.grid, light, box).astype(np.float32)
+        self.accum[box[1]:box[3], box[0]:box[2]] += contribution
+        self.sources[key] = (light, box, contribution)
+        self._dirty.append(box)
+
+    def remove_light(self, key):
+        """Apaga la luz key restando su aporte (no hace nada si no existe)"""
+        source = self.sources.pop(key, None)
+        if source is None:
+            return
+        _, box, contribution = source
+        self.accum[box[1]:box[3], box[0]:box[2]] -= contribution
+        if not self.sources:
+            # Sin luces se descarta el error de redondeo acumulado
+            self.accum[:] = 0.0
+        self._dirty.append(box)
+
+    def sync(self, lights):
+        """
+        Deja encendidas exactamente las luces dadas y recompone la luz de
+        las regiones que cambiaron. Se llama una vez por frame.
+        lights: dict clave -> (x, y, radio, intensidad)
+        """
+        for key in [key for key in self.sources if key not in lights]:
+            self.remove_light(key)
+        for key, (x, y, radius, intensity) in lights.items():
+            self.set_light(key, x, y, radius, intensity)
+        self.refresh()
+
+    def refresh(self):
+        """
+        Recompone la luz de las regiones modificadas desde la última vez.
+        Si se editó el mapa o se re-iluminó la luz horneada se recalculan
+        los aportes (la oclusión cambió) y se recompone todo el mapa
+        """
+        static_version = self.static.version if self.static is not None else None
+        if self.grid.version != self._grid_version or static_version != self._static_version:
+            self._grid_version = self.grid.version
+            self._static_version = static_version
+            sources = self.sources
+            self.sources = {}
+            self.accum[:] = 0.0
+            for key, (light, _, _) in sources.items():
+                self.add_source(key, light)
+            self._dirty = [(0, 0, self.grid.width, self.grid.height)]
+        if not self._dirty:
+            return
+        for box in set(self._dirty):
+            self.compose(box)
+        self._dirty = []
+        self.version += 1
+
+    def relight(self, col, row):
+        """
+        Re-ilumina la luz horneada tras editar el tile (col, row) y
+        recompone. Retorna la región re-iluminada
+        """
+        box = (col, row, col + 1, row + 1)
+        if self.static is not None:
+            box = self.static.relight(col, row)
+        self.refresh()
+        return box
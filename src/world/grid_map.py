@@ -0,0 +1,114 @@
+"""
+Mapa de tiles compacto
+Guarda el mapa en un arreglo NumPy contiguo de un byte por tile, rodeado por
+un borde sólido de un tile. Cualquier recorrido que empiece dentro del mapa
+choca con el borde antes de salir, así que las consultas del raycaster y de
+colisiones no necesitan verificar límites.
+"""
+import numpy as np
+from src.game.config import Config
+
+
+class GridMap:
+    def __init__(self, tiles, border=1):
+        """
+        tiles: matriz 2D (lista de listas o arreglo) donde 0 = vacío, >0 = pared
+        border: tipo de pared del borde agregado alrededor del mapa
+        """
+        tiles = np.asarray(tiles, dtype=np.uint8)
+        if tiles.ndim != 2 or 0 in tiles.shape:
+            raise ValueError("El mapa debe ser una matriz 2D no vacía")
+
+        # Arreglo con borde: el tile (col, row) está en padded[row + 1, col + 1]
+        padded = np.full((tiles.shape[0] + 2, tiles.shape[1] + 2), border, dtype=np.uint8)
+        padded[1:-1, 1:-1] = tiles
+        self._bind(padded, border)
+
+    @classmethod
+    def from_padded(cls, padded, border=1):
+        """
+        Construye el mapa sobre un arreglo que ya incluye el borde, sin
+        copiarlo (por ejemplo un .npy abierto con memoria mapeada)
+        """
+        if padded.dtype != np.uint8 or padded.ndim != 2 or not padded.flags.c_contiguous:
+            raise ValueError("Se espera un arreglo uint8 2D contiguo")
+        grid = cls.__new__(cls)
+        grid._bind(padded, border)
+        return grid
+
+    def _bind(self, padded, border):
+        self.padded = padded
+        self.border = border
+        self.height = padded.shape[0] - 2
+        self.width = padded.shape[1] - 2
+
+        # Vista sin copia del interior y vista plana (índice = fila * stride + columna)
+        self.tiles = self.padded[1:-1, 1:-1]
+        self.flat = self.padded.reshape(-1)
+        self.stride = self.width + 2
+
+        # memoryview de bytes: indexarlo retorna int de Python (backend escalar)
+        self.buffer = memoryview(self.flat)
+
+        # Se incrementa en cada edición para invalidar caches derivados
+        self.version = 0
+
+    @classmethod
+    def from_map(cls, game_map):
+        """Retorna game_map si ya es un GridMap, o lo construye a partir de filas"""
+        if isinstance(game_map, cls):
+            return game_map
+        return cls(game_map)
+
+    @property
+    def nbytes(self):
+        return self.padded.nbytes
+
+    def flat_index(self, col, row):
+        """Índice en flat/buffer del tile (col, row); válido de -1 a width/height"""
+        return (row + 1) * self.stride + col + 1
+
+    def tile(self, col, row):
+        """Tipo del tile (col, row); fuera del mapa retorna el borde"""
+        col = min(max(col, -1), self.width)
+        row = min(max(row, -1), self.height)
+        return self.buffer[(row + 1) * self.stride + col + 1]
+
+    def tile_at(self, x, y):
+        """Tipo del tile que contiene el punto (x, y) en pixeles"""
+        return self.tile(int(x // Config.TILE_SIZE), int(y // Config.TILE_SIZE))
+
+    def is_solid_at(self, x, y):
+        return self.tile_at(x, y) != 0
+
+    def tiles_at_cells(self, cols, rows):
+        """Versión vectorizada de tile para arreglos de columnas y filas"""
+        cols = np.clip(cols, -1, self.width) + 1
+        rows = np.clip(rows, -1, self.height) + 1
+        return self.flat[rows * self.stride + cols]
+
+    def tiles_at(self, xs, ys):
+        """Versión vectorizada de tile_at para arreglos de posiciones en pixeles"""
+        cols = np.floor_divide(xs, Config.TILE_SIZE).astype(np.int64)
+        rows = np.floor_divide(ys, Config.TILE_SIZE).astype(np.int64)
+        return self.tiles_at_cells(cols, rows)
+
+    def set_tile(self, col, row, value):
+        """Cambia un tile del interior y marca el mapa como modificado"""
+        if not (0 <= col < self.width and 0 <= row < self.height):
+            raise IndexError(f"Tile fuera del mapa: ({col}, {row})")
+        self.tiles[row, col] = value
+        self.version += 1
+
+    def free_tiles(self, margin=0):
+        """Arreglo (N, 2) de (col, row) de tiles vacíos, omitiendo margin tiles del contorno"""
+        inner = self.tiles[margin:self.height - margin, margin:self.width - margin]
+        rows, cols = np.nonzero(inner == 0)
+        return np.column_stack((cols + margin, rows + margin))
+
+    def to_rows(self):
+        """Copia del interior como lista de listas (formato del mapa original)"""
+        return self.tiles.tolist()
+
+    def __repr__(self):
+        return f"GridMap({self.width}x{self.height}, version={self.version})"
@@ -0,0 +1,194 @@
+"""
+Lightmap por tile
+Las luces estáticas del mapa se hornean al cargar el nivel en una grilla de
+un byte por tile (0 = oscuro, 255 = luz plena) que se guarda con el cache
+del mapa. El piso de un tile usa su propia luz y cada cara de pared usa la
+del tile libre que tiene enfrente, así que la grilla alcanza para iluminar
+todas las caras. El renderer convierte la luz a un nivel de las tablas del
+colormap, sin calcular iluminación por pixel.
+
+Cuando se edita un tile solo se vuelve a calcular la región que cubren las
+luces que llegan a él.
+"""
+import numpy as np
+from src.game.config import Config
+
+LIGHT_MAX = 255
+
+# Puntos de cada tile destino contra los que se prueba la línea de visión
+# (centro y cuatro puntos interiores): la fracción visible suaviza las sombras
+LIGHT_TARGETS = np.array([
+    (0.5, 0.5), (0.25, 0.25), (0.75, 0.25), (0.25, 0.75), (0.75, 0.75),
+])
+
+# Muestras por tile a lo largo de la línea de visión
+LIGHT_STEPS = 4
+
+
+def lightmap_params():
+    """Parámetros de los que depende la tabla (para invalidar el cache)"""
+    return [Config.LIGHT_RADIUS, Config.LIGHT_INTENSITY, Config.LIGHT_AMBIENT]
+
+
+def parse_lights(text, name="map"):
+    """
+    Luces del encabezado: "col,row[,radio[,intensidad]]" separadas por ';'.
+    Retorna una lista de tuplas (col, row, radio, intensidad)
+    """
+    lights = []
+    for item in text.split(';'):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            values = [float(value) for value in item.split(',')]
+        except ValueError:
+            raise ValueError(f"{name}: luz inválida '{item}'")
+        if not 2 <= len(values) <= 4:
+            raise ValueError(f"{name}: luz inválida '{item}'")
+        lights.append(make_light(*values))
+    return lights
+
+
+def make_light(col, row, radius=None, intensity=None):
+    """Luz en el centro del tile (col, row) con radio en tiles"""
+    return (
+        int(col), int(row),
+        float(Config.LIGHT_RADIUS if radius is None else radius),
+        float(Config.LIGHT_INTENSITY if intensity is None else intensity),
+    )
+
+
+def light_box(grid, light):
+    """Región (col0, row0, col1, row1) del mapa que alcanza una luz"""
+    col, row, radius, _ = light
+    reach = int(np.ceil(radius))
+    return (
+        max(0, col - reach), max(0, row - reach),
+        min(grid.width, col + reach + 1), min(grid.height, row + reach + 1),
+    )
+
+
+def boxes_overlap(a, b):
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def light_contribution(grid, light, box):
+    """Luz (float) que aporta una fuente a los tiles de box, con oclusión"""
+    col0, row0, col1, row1 = box
+    col, row, radius, intensity = light
+    rows, cols = np.mgrid[row0:row1, col0:col1]
+    source_x, source_y = col + 0.5, row + 0.5
+
+    # Atenuación lineal con la distancia entre centros
+    distance = np.hypot(cols + 0.5 - source_x, rows + 0.5 - source_y)
+    falloff = np.clip(1.0 - distance / radius, 0.0, None)
+    reached = (falloff > 0) & (grid.tiles[row0:row1, col0:col1] == 0)
+    if not reached.any():
+        return np.zeros(rows.shape)
+
+    # Línea de visión desde la luz a cada punto de prueba de los tiles alcanzados
+    target_x = (cols[reached][:, None] + LIGHT_TARGETS[:, 0]).ravel()
+    target_y = (rows[reached][:, None] + LIGHT_TARGETS[:, 1]).ravel()
+    steps = max(2, int(np.ceil(radius * LIGHT_STEPS)))
+    t = np.linspace(0.0, 1.0, steps)
+    sample_x = source_x + np.multiply.outer(target_x - source_x, t)
+    sample_y = source_y + np.multiply.outer(target_y - source_y, t)
+    solid = grid.tiles_at_cells(
+        np.floor(sample_x).astype(np.int64), np.floor(sample_y).astype(np.int64)
+    ) != 0
+    visible = ~solid.any(axis=1)
+    visibility = visible.reshape(-1, len(LIGHT_TARGETS)).mean(axis=1)
+
+    contribution = np.zeros(rows.shape)
+    contribution[reached] = intensity * falloff[reached] * visibility
+    return contribution
+
+
+def light_region(grid, lights, ambient, box):
+    """Luz total (uint8) de los tiles de box sumando todas las fuentes que llegan"""
+    col0, row0, col1, row1 = box
+    total = np.full((row1 - row0, col1 - col0), ambient)
+    for light in lights:
+        reach = light_box(grid, light)
+        if not boxes_overlap(reach, box):
+            continue
+        overlap = (
+            max(reach[0], col0), max(reach[1], row0),
+            min(reach[2], col1), min(reach[3], row1),
+        )
+        total[overlap[1] - row0:overlap[3] - row0, overlap[0] - col0:overlap[2] - col0] += (
+            light_contribution(grid, light, overlap)
+        )
+    return np.clip(total * LIGHT_MAX + 0.5, 0, LIGHT_MAX).astype(np.uint8)
+
+
+def bake_lightmap(grid, lights, ambient=None):
+    """
+    Hornea la luz de todo el mapa. Retorna uint8 (height, width).
+    Sin luces el mapa queda con luz plena (igual que sin lightmap)
+    """
+    if not lights:
+        return np.full((grid.height, grid.width), LIGHT_MAX, dtype=np.uint8)
+    ambient = Config.LIGHT_AMBIENT if ambient is None else ambient
+    return light_region(grid, lights, ambient, (0, 0, grid.width, grid.height))
+
+
+class Lightmap:
+    """Luz por tile de un GridMap con re-iluminación incremental"""
+
+    def __init__(self, grid, lights, values, ambient=None):
+        self.grid = grid
+        self.lights = list(lights)
+        self.ambient = Config.LIGHT_AMBIENT if ambient is None else ambient
+        self.values = values
+        # Se incrementa en cada re-iluminación para invalidar lo que depende de la luz
+        self.version = 0
+
+    @classmethod
+    def build(cls, grid, lights, ambient=None):
+        return cls(grid, lights, bake_lightmap(grid, lights, ambient), ambient)
+
+    @property
+    def lit(self):
+        """True si el mapa tiene fuentes de luz (si no, todo está a luz plena)"""
+        return bool(self.lights)
+
+    def values_at_cells(self, cols, rows):
+        """Luz de arreglos de columnas y filas (fuera del mapa se usa el borde)"""
+        cols = np.clip(cols, 0, self.grid.width - 1)
+        rows = np.clip(rows, 0, self.grid.height - 1)
+        return self.values[rows, cols]
+
+    def face_light(self, rays, viewer_x, viewer_y):
+        """
+        Luz de la cara golpeada por cada rayo (RAY_DTYPE): la del tile libre
+        del lado del observador, retrocediendo medio pixel desde el impacto
+        """
+        vertical = rays['side'] == 0  # SIDE_VERTICAL del raycaster
+        hit_x = rays['hit_x'] - np.where(vertical, np.sign(rays['hit_x'] - viewer_x) * 0.5, 0.0)
+        hit_y = rays['hit_y'] - np.where(vertical, 0.0, np.sign(rays['hit_y'] - viewer_y) * 0.5)
+        return self.values_at_cells(
+            np.floor_divide(hit_x, Config.TILE_SIZE).astype(np.int64),
+            np.floor_divide(hit_y, Config.TILE_SIZE).astype(np.int64),
+        )
+
+    def relight(self, col, row):
+        """
+        Vuelve a calcular la luz tras editar el tile (col, row): solo la
+        región que cubren las luces cuyo alcance incluye ese tile.
+        Retorna la región (col0, row0, col1, row1) re-iluminada
+        """
+        tile = box = (col, row, col + 1, row + 1)
+        for light in self.lights:
+            reach = light_box(self.grid, light)
+            if boxes_overlap(reach, tile):
+                box = (
+                    min(box[0], reach[0]), min(box[1], reach[1]),
+                    max(box[2], reach[2]), max(box[3], reach[3]),
+                )
+        col0, row0, col1, row1 = box
+        if self.lights:
+            self.values[row0:row1, col0:col1] = light_region(self.grid, self.lights, self.ambient, box)
+        self.version += 1
+        return box
@@ -0,0 +1,320 @@
+"""
+Carga de mapas
+Los niveles se escriben como texto en assets/maps/{nombre}.map y se compilan
+una sola vez a un cache binario en assets/maps/.cache: la grilla con borde y
+las tablas derivadas como .npy (se abren con memoria mapeada) y los datos
+del nivel en un .json. El cache se invalida cuando cambia el hash del
+archivo fuente, el formato del cache o los parámetros de las tablas.
+
+Formato del archivo:
+
+    # Comentario
+    name: Arena
+    border: 1
+    ambient: 0.3
+    lights: 7,2,4,0.8; 3,5
+    segments: 6,1,8,3,2
+    ---
+    1111111111
+    1P...L...1
+    1.2...e..1
+    1111111111
+
+Encabezado opcional de líneas "clave: valor" terminado en "---". En la
+grilla: '.', '0' o espacio = vacío, '1'-'9' = tipo de pared,
+'P' = spawn del jugador, LIGHT_MARKER = luz con radio e intensidad por
+defecto y ENEMY_MARKERS = spawn de enemigos (tiles vacíos). "lights" agrega
+luces "col,row[,radio[,intensidad]]" y "ambient" fija la luz mínima.
+"segments" agrega paredes en ángulo "x0,y0,x1,y1[,tipo]" en tiles separadas
+por ';' (solo las dibuja el motor "bvh", ver src/world/segments.py).
+"""
+import hashlib
+import json
+import os
+import numpy as np
+from src.world.grid_map import GridMap
+from src.world.pvs import compute_pvs, pvs_params, PotentiallyVisibleSet
+from src.world.lightmap import bake_lightmap, lightmap_params, make_light, parse_lights, Lightmap
+from src.world.segments import parse_segments
+
+MAP_DIR = os.path.join('assets', 'maps')
+CACHE_DIR = os.path.join(MAP_DIR, '.cache')
+
+# Se incrementa al cambiar lo que se guarda en el cache
+CACHE_FORMAT = 4
+
+EMPTY_MARKERS = '.0 '
+PLAYER_MARKER = 'P'
+LIGHT_MARKER = 'L'
+ENEMY_MARKERS = {
+    'e': "basic",
+    'f': "fast",
+    't': "tank",
+    'b': "boss",
+}
+
+# Tablas derivadas que se guardan en el cache: nombre -> función(MapData) -> ndarray
+DERIVED_TABLES = {
+    "free_tiles": lambda level: level.grid.free_tiles(margin=1),
+    "pvs": lambda level: compute_pvs(level.grid),
+    "lightmap": lambda level: bake_lightmap(level.grid, level.lights, level.ambient),
+}
+
+# Tablas que MapData.from_rows no calcula de entrada: se calculan al pedirlas
+LAZY_TABLES = ("pvs",)
+
+# Parámetros de Config de los que depende cada tabla (si cambian, se recompila)
+TABLE_PARAMS = {
+    "pvs": pvs_params,
+    "lightmap": lightmap_params,
+}
+
+
+class MapData:
+    """
+    Nivel cargado: grilla, spawns, luces, paredes en ángulo y tablas
+    derivadas (memoria mapeada si vienen del cache)
+    """
+
+    def __init__(self, name, grid, player_spawn=None, enemy_spawns=(), tables=None, source_hash=None,
+                 lights=(), ambient=None, segments=()):
+        self.name = name
+        self.grid = grid
+        self.player_spawn = player_spawn
+        self.enemy_spawns = list(enemy_spawns)
+        self.lights = list(lights)
+        self.ambient = ambient
+        self.segments = list(segments)
+        self.tables = tables if tables is not None else {}
+        self.source_hash = source_hash
+        self.from_cache = False
+        self._pvs = None
+        self._lightmap = None
+
+    @classmethod
+    def from_rows(cls, name, rows, lights=(), segments=()):
+        """
+        Nivel a partir de una matriz 2D en memoria (sin archivo ni cache).
+        Las tablas de LAZY_TABLES se calculan recién al pedirlas (ver table)
+        """
+        level = cls(name, GridMap(rows), lights=lights, segments=segments)
+        level.tables = build_tables(level, skip=LAZY_TABLES)
+        return level
+
+    def table(self, name):
+        """Tabla derivada por nombre, calculándola si el nivel no la trae"""
+        table = self.tables.get(name)
+        if table is None:
+            table = DERIVED_TABLES[name](self)
+            self.tables[name] = table
+        return table
+
+    @property
+    def pvs(self):
+        """PotentiallyVisibleSet del nivel (bitsets de la tabla "pvs")"""
+        if self._pvs is None:
+            self._pvs = PotentiallyVisibleSet(self.grid, self.table("pvs"))
+        return self._pvs
+
+    @property
+    def lightmap(self):
+        """Lightmap del nivel (luz horneada de la tabla "lightmap")"""
+        if self._lightmap is None:
+            self._lightmap = Lightmap(self.grid, self.lights, self.table("lightmap"), self.ambient)
+        return self._lightmap
+
+    def set_tile(self, col, row, value):
+        """
+        Edita un tile del nivel y re-ilumina solo la región afectada.
+        El PVS queda inválido (ver PotentiallyVisibleSet.valid)
+        """
+        self.grid.set_tile(col, row, value)
+        self.lightmap.relight(col, row)
+
+
+def map_path(name):
+    return os.path.join(MAP_DIR, f"{name}.map")
+
+
+def list_maps():
+    """Nombres de los mapas disponibles en MAP_DIR, ordenados"""
+    if not os.path.isdir(MAP_DIR):
+        return []
+    return sorted(
+        filename[:-4]
+        for filename in os.listdir(MAP_DIR)
+        if filename.endswith('.map')
+    )
+
+
+def parse_map(text, name="map"):
+    """
+    Interpreta el texto de un mapa.
+    Retorna (filas, meta, player_spawn, enemy_spawns, luces)
+    """
+    lines = text.splitlines()
+    meta = {}
+    if any(line.strip() == '---' for line in lines):
+        separator = next(i for i, line in enumerate(lines) if line.strip() == '---')
+        for line in lines[:separator]:
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            key, sep, value = line.partition(':')
+            if not sep:
+                raise ValueError(f"{name}: encabezado inválido '{line}'")
+            meta[key.strip()] = value.strip()
+        lines = lines[separator + 1:]
+
+    # Filas de la grilla (se descartan comentarios y líneas vacías)
+    grid_lines = [
+        (number, line.rstrip('\n'))
+        for number, line in enumerate(lines, 1)
+        if line.strip() and not line.lstrip().startswith('#')
+    ]
+    if not grid_lines:
+        raise ValueError(f"{name}: el mapa no tiene filas")
+
+    width = max(len(line) for _, line in grid_lines)
+    rows = []
+    player_spawn = None
+    enemy_spawns = []
+    lights = parse_lights(meta.get('lights', ''), name)
+    for row, (number, line) in enumerate(grid_lines):
+        tiles = []
+        for col, char in enumerate(line.ljust(width)):
+            if char in EMPTY_MARKERS:
+                tiles.append(0)
+            elif char.isdigit():
+                tiles.append(int(char))
+            elif char == PLAYER_MARKER:
+                player_spawn = (col, row)
+                tiles.append(0)
+            elif char == LIGHT_MARKER:
+                lights.append(make_light(col, row))
+                tiles.append(0)
+            elif char in ENEMY_MARKERS:
+                enemy_spawns.append((col, row, ENEMY_MARKERS[char]))
+                tiles.append(0)
+            else:
+                raise ValueError(f"{name}: carácter '{char}' desconocido en la línea {number}")
+        rows.append(tiles)
+
+    return rows, meta, player_spawn, enemy_spawns, lights
+
+
+def build_tables(level, skip=()):
+    return {name: build(level) for name, build in DERIVED_TABLES.items() if name not in skip}
+
+
+def table_params():
+    return {name: params() for name, params in TABLE_PARAMS.items()}
+
+
+def source_hash(data):
+    return hashlib.sha1(data).hexdigest()
+
+
+def cache_paths(name):
+    """Rutas del cache de un mapa: (meta.json, grilla.npy, prefijo de tablas)"""
+    base = os.path.join(CACHE_DIR, name)
+    return base + '.json', base + '.npy', base + '.'
+
+
+def compile_map(name, data, digest):
+    """Interpreta el mapa y escribe su cache. Retorna el MapData"""
+    rows, meta, player_spawn, enemy_spawns, lights = parse_map(data.decode('utf-8'), name)
+    grid = GridMap(rows, border=int(meta.get('border', 1)))
+    ambient = float(meta['ambient']) if 'ambient' in meta else None
+    segments = parse_segments(meta.get('segments', ''), name)
+    level = MapData(
+        meta.get('name', name), grid, player_spawn, enemy_spawns,
+        source_hash=digest, lights=lights, ambient=ambient, segments=segments,
+    )
+    level.tables = build_tables(level)
+
+    meta_path, grid_path, table_prefix = cache_paths(name)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        np.save(grid_path, grid.padded)
+        for table_name, table in level.tables.items():
+            np.save(f"{table_prefix}{table_name}.npy", table)
+        # El .json se escribe al final: si falta, el cache está incompleto
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "format": CACHE_FORMAT,
+                "source_hash": digest,
+                "name": level.name,
+                "border": grid.border,
+                "player_spawn": player_spawn,
+                "enemy_spawns": enemy_spawns,
+                "lights": lights,
+                "ambient": ambient,
+                "segments": segments,
+                "tables": sorted(level.tables),
+                "table_params": table_params(),
+            }, f)
+    except OSError as e:
+        # Sin permisos de escritura el mapa igual se puede usar
+        print(f"No se pudo escribir el cache del mapa {name}: {e}")
+
+    return level
+
+
+def load_cached(name, digest):
+    """Abre el cache de un mapa si coincide con digest. Retorna MapData o None"""
+    meta_path, grid_path, table_prefix = cache_paths(name)
+    try:
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if (
+        meta.get("format") != CACHE_FORMAT
+        or meta.get("source_hash") != digest
+        or set(meta.get("tables", ())) != set(DERIVED_TABLES)
+        or meta.get("table_params") != table_params()
+    ):
+        return None
+
+    try:
+        # mmap_mode 'c': copia en escritura, las ediciones no tocan el archivo
+        padded = np.load(grid_path, mmap_mode='c')
+        tables = {
+            table_name: np.load(f"{table_prefix}{table_name}.npy", mmap_mode='c')
+            for table_name in meta["tables"]
+        }
+    except (OSError, ValueError):
+        return None
+
+    spawn = meta.get("player_spawn")
+    level = MapData(
+        meta.get("name", name),
+        GridMap.from_padded(padded, meta.get("border", 1)),
+        tuple(spawn) if spawn is not None else None,
+        [tuple(enemy) for enemy in meta.get("enemy_spawns", ())],
+        tables=tables,
+        source_hash=digest,
+        lights=[tuple(light) for light in meta.get("lights", ())],
+        ambient=meta.get("ambient"),
+        segments=[tuple(segment) for segment in meta.get("segments", ())],
+    )
+    level.from_cache = True
+    return level
+
+
+def load_map(name, use_cache=True):
+    """
+    Carga assets/maps/{name}.map usando el cache binario si está vigente;
+    si no, lo compila y regenera el cache. Lanza FileNotFoundError si no existe
+    """
+    with open(map_path(name), 'rb') as f:
+        data = f.read()
+    digest = source_hash(data)
+
+    if use_cache:
+        level = load_cached(name, digest)
+        if level is not None:
+            return level
+    return compile_map(name, data, digest)
@@ -0,0 +1,76 @@
+"""
+Pirámide de ocupación
+Para cada tamaño de bloque de Config.OCCUPANCY_BLOCKS (por ejemplo 4x4 y
+16x16 tiles) marca qué bloques contienen alguna pared. Un rayo que está en
+un bloque vacío puede saltar directo al borde del bloque en lugar de
+recorrerlo tile a tile, y solo baja al nivel de tiles cerca de la geometría:
+el costo por rayo depende de cuántas paredes hay cerca y no del tamaño del
+mapa. Los bloques que sobresalen del mapa cuentan como ocupados (el borde
+sólido del GridMap sigue deteniendo a todos los rayos).
+"""
+import numpy as np
+from src.game.config import Config
+
+
+class OccupancyPyramid:
+    def __init__(self, grid, blocks=None):
+        """
+        grid: GridMap
+        blocks: tamaños de bloque en tiles, de menor a mayor
+        """
+        self.grid = grid
+        self.blocks = tuple(sorted(blocks if blocks is not None else Config.OCCUPANCY_BLOCKS))
+        self.version = None
+        self.levels = []
+        self.update()
+
+    def update(self):
+        """Reconstruye los niveles si el mapa cambió desde la última vez"""
+        if self.version == self.grid.version:
+            return
+        tiles = self.grid.tiles
+        height, width = tiles.shape
+        # Se arma aparte y se reemplaza de una vez (los hilos del raycaster leen levels)
+        levels = []
+        # Tabla por tile con el mismo borde e índice plano que GridMap.flat:
+        # tamaño del mayor bloque vacío que contiene al tile (1 si ninguno)
+        skip = np.ones(self.grid.padded.shape, dtype=np.int64)
+        for size in self.blocks:
+            rows = -(-height // size)
+            cols = -(-width // size)
+            padded = np.ones((rows * size, cols * size), dtype=bool)
+            padded[:height, :width] = tiles != 0
+            occupied = padded.reshape(rows, size, cols, size).any(axis=(1, 3))
+            # Vista plana (fila * cols + columna) y memoryview para el camino escalar
+            flat = np.ascontiguousarray(occupied, dtype=np.uint8).reshape(-1)
+            levels.append((size, cols, flat, memoryview(flat)))
+            empty = np.repeat(np.repeat(~occupied, size, axis=0), size, axis=1)[:height, :width]
+            skip[1:-1, 1:-1][empty] = size
+        self.levels = levels
+        self.skip = skip.reshape(-1)
+        # Salto medio (en tiles) desde un tile libre: mide cuánto espacio vacío hay
+        free = skip[1:-1, 1:-1][tiles == 0]
+        self.mean_skip = float(free.mean()) if free.size else 1.0
+        self.version = self.grid.version
+
+    def block_sizes(self, cols, rows):
+        """
+        Tamaño del mayor bloque vacío que contiene cada tile (cols, rows);
+        1 si todos los bloques que lo contienen tienen paredes
+        """
+        sizes = np.ones(np.shape(cols), dtype=np.int64)
+        for size, width, flat, _ in self.levels:
+            empty = flat[(rows // size) * width + cols // size] == 0
+            sizes[empty] = size
+        return sizes
+
+    def block_size(self, col, row):
+        """Versión escalar de block_sizes para un tile"""
+        for size, width, _, buffer in reversed(self.levels):
+            if not buffer[(row // size) * width + col // size]:
+                return size
+        return 1
+
+    @property
+    def nbytes(self):
+        return self.skip.nbytes + sum(flat.nbytes for _, _, flat, _ in self.levels)
@@ -0,0 +1,235 @@
+"""
+Conjunto potencialmente visible (PVS) por tile
+Para cada tile libre se precalcula qué tiles pueden verse desde algún punto
+de él, lanzando rayos desde varios puntos del tile en todas las direcciones
+hasta Config.MAX_DEPTH. El resultado se guarda como bitsets sobre una
+ventana cuadrada centrada en el tile (lo que está más lejos que MAX_DEPTH
+nunca se dibuja), así que el tamaño crece con el área del mapa y no con su
+cuadrado. Las entidades en tiles fuera del PVS del observador se pueden
+descartar sin proyectarlas.
+Los rayos de todos los tiles recorren los mismos desplazamientos relativos:
+se trazan una vez y se evalúan contra la grilla para lotes de tiles, sin
+un DDA por tile.
+"""
+import math
+import numpy as np
+from src.game.config import Config
+
+# Muestreo de la precomputación: puntos por lado dentro del tile y rayos por punto
+PVS_SAMPLES = 3
+PVS_ANGLES = 360
+# Tiles evaluados juntos en compute_pvs (acota la memoria: nodos x tiles booleanos)
+PVS_BATCH = 128
+
+
+def pvs_reach():
+    """Alcance de visión en tiles"""
+    return Config.MAX_DEPTH / Config.TILE_SIZE
+
+
+def pvs_radius():
+    """Radio de la ventana: alcance más un tile de margen para la dilatación"""
+    return math.ceil(pvs_reach()) + 1
+
+
+def pvs_params():
+    """Parámetros de los que depende la tabla (para invalidar el cache)"""
+    return [Config.MAX_DEPTH, Config.TILE_SIZE, PVS_SAMPLES, PVS_ANGLES]
+
+
+def ray_paths(samples, angles, reach, radius):
+    """
+    Recorrido de los rayos de un tile en una ventana vacía: todos los tiles
+    libres lanzan los mismos rayos en coordenadas locales, así que los tiles
+    que atraviesa cada rayo (hasta reach) son los mismos desplazamientos
+    relativos. Retorna los rayos como árbol de prefijos: (padre, celda) por
+    nodo, con celda = dy * W + dx en la ventana y los nodos de cada paso
+    después de los del paso anterior (el nodo 0 es el tile de origen), y los
+    límites de cada paso en el arreglo de nodos
+    """
+    size = 2 * radius + 1
+
+    # Rayos de un tile en coordenadas locales (unidades de tile, tile en [0, 1))
+    offsets = (np.arange(samples) + 0.5) / samples
+    local_x, local_y = np.meshgrid(offsets, offsets)
+    theta = (np.arange(angles) + 0.5) * (2 * math.pi / angles)
+    origin_x = np.repeat(local_x.ravel(), angles)
+    origin_y = np.repeat(local_y.ravel(), angles)
+    dir_x = np.tile(np.cos(theta), samples * samples)
+    dir_y = np.tile(np.sin(theta), samples * samples)
+
+    with np.errstate(divide='ignore'):
+        dx = np.abs(1.0 / dir_x)
+        dy = np.abs(1.0 / dir_y)
+    sx = np.where(dir_x > 0, 1, -1)
+    sy = np.where(dir_y > 0, 1, -1)
+    # Distancia al primer borde de cada eje (el tile local es [0, 1))
+    side_x = np.where(dir_x > 0, 1.0 - origin_x, origin_x) * dx
+    side_y = np.where(dir_y > 0, 1.0 - origin_y, origin_y) * dy
+
+    wx = np.full(origin_x.size, radius)
+    wy = np.full(origin_x.size, radius)
+    node = np.zeros(origin_x.size, dtype=np.int64)
+    parents = [np.zeros(1, dtype=np.int64)]
+    cells = [np.array([radius * size + radius])]
+    levels = [0, 1]
+    while wx.size:
+        # Un paso de DDA de todos los rayos que siguen dentro del alcance
+        use_x = side_x < side_y
+        distance = np.where(use_x, side_x, side_y)
+        wx = wx + np.where(use_x, sx, 0)
+        wy = wy + np.where(use_x, 0, sy)
+        side_x = side_x + np.where(use_x, dx, 0.0)
+        side_y = side_y + np.where(use_x, 0.0, dy)
+
+        near = distance < reach
+        wx, wy, node = wx[near], wy[near], node[near]
+        side_x, side_y = side_x[near], side_y[near]
+        sx, sy, dx, dy = sx[near], sy[near], dx[near], dy[near]
+        if not wx.size:
+            break
+
+        # Rayos con el mismo recorrido hasta acá comparten nodo
+        keys, inverse = np.unique(node * (size * size) + wy * size + wx, return_inverse=True)
+        parents.append(keys // (size * size))
+        cells.append(keys % (size * size))
+        node = levels[-1] + inverse.reshape(-1)
+        levels.append(levels[-1] + keys.size)
+
+    return np.concatenate(parents), np.concatenate(cells), levels
+
+
+def compute_pvs(grid, samples=None, angles=None, batch=None):
+    """
+    Calcula los bitsets del PVS de un GridMap.
+    Retorna un arreglo uint8 (width * height, W, ceil(W / 8)) con W = 2 * radio + 1:
+    fila tile_row * width + tile_col, bit [dy, dx] = tile (col + dx - radio,
+    row + dy - radio) visible. Los tiles sólidos quedan sin bits.
+    Los rayos se recorren una sola vez (ver ray_paths) y se evalúan para
+    batch tiles a la vez: un tile del recorrido se ve si todos los
+    anteriores son libres
+    """
+    samples = samples or PVS_SAMPLES
+    angles = angles or PVS_ANGLES
+    batch = batch or PVS_BATCH
+    reach = pvs_reach()
+    radius = pvs_radius()
+    size = 2 * radius + 1
+    bits = np.zeros((grid.width * grid.height, size, (size + 7) // 8), dtype=np.uint8)
+
+    parents, cells, levels = ray_paths(samples, angles, reach, radius)
+    # Nodos agrupados por celda de la ventana para combinarlos con reduceat
+    order = np.argsort(cells, kind='stable')
+    window_cells, starts = np.unique(cells[order], return_index=True)
+
+    # Grilla sólida con margen de una ventana: ningún recorrido sale de ella
+    # (el borde del GridMap ya detiene los rayos, el margen solo evita índices fuera)
+    margin = radius + 1
+    solid = np.pad(grid.tiles != 0, margin, constant_values=True)
+    stride = solid.shape[1]
+    shifts = (cells // size - radius) * stride + cells % size - radius
+    solid = solid.reshape(-1)
+
+    free = np.argwhere(grid.tiles == 0)
+    for first in range(0, len(free), batch):
+        rows, cols = free[first:first + batch].T
+        count = rows.size
+
+        # open_[n, t]: el tile del nodo n está libre visto desde el tile t
+        bases = (rows + margin) * stride + cols + margin
+        open_ = ~solid[bases + shifts[:, None]]
+        # visible[n, t]: el recorrido llega hasta el nodo n (todos los anteriores libres)
+        visible = np.empty((cells.size, count), dtype=bool)
+        visible[0] = True
+        for start, end in zip(levels[1:-1], levels[2:]):
+            parent = parents[start:end]
+            np.logical_and(visible[parent], open_[parent], out=visible[start:end])
+
+        window = np.zeros((count, size * size), dtype=bool)
+        window[:, window_cells] = np.logical_or.reduceat(visible[order], starts, axis=0).T
+        window = window.reshape(count, size, size)
+
+        # Dilatar un tile: cubre entidades que sobresalen del tile visible
+        dilated = window.copy()
+        dilated[:, 1:] |= window[:, :-1]
+        dilated[:, :-1] |= window[:, 1:]
+        dilated[:, :, 1:] |= dilated[:, :, :-1].copy()
+        dilated[:, :, :-1] |= dilated[:, :, 1:].copy()
+        bits[rows * grid.width + cols] = np.packbits(dilated, axis=2)
+
+    return bits
+
+
+class PotentiallyVisibleSet:
+    """Consultas sobre los bitsets de compute_pvs para un GridMap"""
+
+    def __init__(self, grid, bits):
+        self.grid = grid
+        self.bits = bits
+        self.size = bits.shape[1]
+        self.radius = (self.size - 1) // 2
+        # Si el mapa se edita después de calcular el PVS, deja de ser válido
+        self.version = grid.version
+
+    @classmethod
+    def build(cls, grid):
+        return cls(grid, compute_pvs(grid))
+
+    @property
+    def valid(self):
+        return self.grid.version == self.version
+
+    def viewer_tile(self, x, y):
+        """Tile libre del observador en (x, y), o None si no hay PVS para él"""
+        col = int(x // Config.TILE_SIZE)
+        row = int(y // Config.TILE_SIZE)
+        if not self.valid or self.grid.tile(col, row) != 0:
+            return None
+        return col, row
+
+    def visible_tiles(self, col, row):
+        """Ventana booleana (W, W) de tiles visibles desde (col, row)"""
+        row_bits = self.bits[row * self.grid.width + col]
+        return np.unpackbits(row_bits, axis=1, count=self.size).astype(bool)
+
+    def is_tile_visible(self, from_col, from_row, col, row):
+        dx = col - from_col + self.radius
+        dy = row - from_row + self.radius
+        if not (0 <= dx < self.size and 0 <= dy < self.size):
+            return False
+        byte = self.bits[from_row * self.grid.width + from_col, dy, dx >> 3]
+        return bool(byte >> (7 - (dx & 7)) & 1)
+
+    def visible_mask(self, viewer_x, viewer_y, xs, ys):
+        """
+        Máscara booleana de las posiciones (xs, ys) en pixeles que pueden ser
+        visibles desde (viewer_x, viewer_y). Si no hay PVS válido para el
+        observador retorna todo visible (conservador)
+        """
+        xs = np.asarray(xs, dtype=np.float64)
+        ys = np.asarray(ys, dtype=np.float64)
+        viewer = self.viewer_tile(viewer_x, viewer_y)
+        if viewer is None:
+            return np.ones(xs.shape, dtype=bool)
+
+        col, row = viewer
+        dx = np.floor_divide(xs, Config.TILE_SIZE).astype(np.int64) - col + self.radius
+        dy = np.floor_divide(ys, Config.TILE_SIZE).astype(np.int64) - row + self.radius
+        inside = (dx >= 0) & (dx < self.size) & (dy >= 0) & (dy < self.size)
+
+        mask = np.zeros(xs.shape, dtype=bool)
+        dx = dx[inside]
+        dy = dy[inside]
+        row_bits = self.bits[row * self.grid.width + col]
+        mask[inside] = ((row_bits[dy, dx >> 3] >> (7 - (dx & 7))) & 1).astype(bool)
+        return mask
+
+    def filter_visible(self, viewer_x, viewer_y, entities):
+        """Lista de las entidades (con x, y) que pueden ser visibles"""
+        count = len(entities)
+        if count == 0:
+            return []
+        xs = np.fromiter((e.x for e in entities), dtype=np.float64, count=count)
+        ys = np.fromiter((e.y for e in entities), dtype=np.float64, count=count)
+        mask = self.visible_mask(viewer_x, viewer_y, xs, ys)
+        return [e for e, visible in zip(entities, mask.tolist()) if visible]
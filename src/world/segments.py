@@ -0,0 +1,203 @@
+"""
+Segmentos de pared y BVH
+Para el motor de raycasting "bvh" (Config.RAYCAST_ENGINE) las paredes se
+describen como segmentos en lugar de tiles: las caras de la grilla que dan
+a un tile libre se fusionan en segmentos largos (una pared recta de 40
+tiles es un solo segmento) y se suman las paredes en ángulo del mapa. Los
+segmentos se agrupan en una jerarquía de cajas alineadas a los ejes (BVH)
+para que cada rayo solo pruebe los segmentos cercanos a su recorrido.
+
+Las paredes en ángulo solo las dibuja el motor "bvh": las colisiones, el
+minimapa de tiles y el motor "grid" siguen usando la grilla.
+"""
+from collections import namedtuple
+import numpy as np
+from src.game.config import Config
+
+# Segmento de pared en pixeles, de (x0, y0) a (x1, y1)
+SEGMENT_DTYPE = np.dtype([
+    ('x0', np.float64),
+    ('y0', np.float64),
+    ('x1', np.float64),
+    ('y1', np.float64),
+    ('wall_type', np.int16),
+])
+
+# Jerarquía armada (ver SegmentBVH.build), en arreglos planos para indexarlos rápido:
+# lines: (x0, y0, x1 - x0, y1 - y0) por segmento más un segmento nulo al final (nunca se golpea)
+# boxes: (min_x, min_y, max_x, max_y) por nodo
+# child: primer hijo de cada nodo interno (el segundo es child + 1)
+# leaf: fila de leaves de cada hoja (-1 en nodos internos)
+# leaves: leaf_size índices de lines por hoja, completados con el segmento nulo
+BVHTree = namedtuple('BVHTree', ['segments', 'lines', 'boxes', 'child', 'leaf', 'leaves', 'depth'])
+
+
+def parse_segments(text, name="map"):
+    """
+    Paredes del encabezado: "x0,y0,x1,y1[,tipo]" en tiles separadas por ';'.
+    Retorna una lista de tuplas (x0, y0, x1, y1, tipo)
+    """
+    segments = []
+    for item in text.split(';'):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            values = [float(value) for value in item.split(',')]
+        except ValueError:
+            raise ValueError(f"{name}: segmento inválido '{item}'")
+        if len(values) not in (4, 5) or (len(values) == 5 and not 1 <= values[4] <= 255):
+            raise ValueError(f"{name}: segmento inválido '{item}'")
+        x0, y0, x1, y1 = values[:4]
+        segments.append((x0, y0, x1, y1, int(values[4]) if len(values) == 5 else 1))
+    return segments
+
+
+def make_segments(x0, y0, x1, y1, wall_type):
+    """Arreglo SEGMENT_DTYPE a partir de arreglos de coordenadas en pixeles"""
+    segments = np.empty(len(wall_type), dtype=SEGMENT_DTYPE)
+    segments['x0'] = x0
+    segments['y0'] = y0
+    segments['x1'] = x1
+    segments['y1'] = y1
+    segments['wall_type'] = wall_type
+    return segments
+
+
+def face_runs(faces):
+    """
+    Corridas de caras contiguas del mismo tipo a lo largo de cada fila de
+    faces (0 = sin cara). Retorna (fila, inicio, fin, tipo), fin exclusivo
+    """
+    rows, cols = faces.shape
+    # Una columna vacía al final separa las corridas de filas consecutivas
+    lines = np.zeros((rows, cols + 1), dtype=faces.dtype)
+    lines[:, :cols] = faces
+    flat = lines.reshape(-1)
+    previous = np.concatenate(([0], flat[:-1]))
+    following = np.concatenate((flat[1:], [0]))
+    starts = np.flatnonzero((flat > 0) & (flat != previous))
+    ends = np.flatnonzero((flat > 0) & (flat != following)) + 1
+    return starts // (cols + 1), starts % (cols + 1), ends - starts // (cols + 1) * (cols + 1), flat[starts]
+
+
+def grid_segments(grid):
+    """
+    Caras de pared de un GridMap que dan a un tile libre, fusionadas en
+    segmentos del mismo tipo y orientación. Incluye las caras del borde.
+    Los segmentos van de la coordenada menor a la mayor
+    """
+    tile = Config.TILE_SIZE
+    padded = grid.padded
+    free = padded[1:-1, 1:-1] == 0
+    parts = []
+
+    # Caras verticales (x = cte), pared al oeste y al este del tile libre
+    for offset, neighbor in ((0, padded[1:-1, :-2]), (1, padded[1:-1, 2:])):
+        col, start, end, wall_type = face_runs((neighbor * free).T)
+        x = (col + offset) * tile
+        parts.append(make_segments(x, start * tile, x, end * tile, wall_type))
+
+    # Caras horizontales (y = cte), pared al norte y al sur del tile libre
+    for offset, neighbor in ((0, padded[:-2, 1:-1]), (1, padded[2:, 1:-1])):
+        row, start, end, wall_type = face_runs(neighbor * free)
+        y = (row + offset) * tile
+        parts.append(make_segments(start * tile, y, end * tile, y, wall_type))
+
+    return np.concatenate(parts)
+
+
+class SegmentBVH:
+    def __init__(self, grid, extra=(), leaf_size=None):
+        """
+        grid: GridMap cuyas caras se compilan a segmentos
+        extra: paredes en ángulo (x0, y0, x1, y1, tipo) en tiles
+        leaf_size: segmentos por hoja (Config.BVH_LEAF_SIZE por defecto)
+        """
+        self.grid = grid
+        self.extra = list(extra)
+        self.leaf_size = leaf_size or Config.BVH_LEAF_SIZE
+        self.version = None
+        self.tree = None
+        self.update()
+
+    def update(self):
+        """Reconstruye los segmentos y la jerarquía si el mapa cambió"""
+        if self.version == self.grid.version:
+            return
+        segments = grid_segments(self.grid)
+        if self.extra:
+            extra = np.asarray(self.extra, dtype=np.float64)
+            tile = Config.TILE_SIZE
+            segments = np.concatenate((segments, make_segments(
+                extra[:, 0] * tile, extra[:, 1] * tile, extra[:, 2] * tile, extra[:, 3] * tile,
+                extra[:, 4].astype(np.int16),
+            )))
+        # Se reemplaza de una vez (los hilos del raycaster leen tree)
+        self.tree = self.build(segments)
+        self.version = self.grid.version
+
+    def build(self, segments):
+        """
+        Arma la jerarquía partiendo por la mediana de los centros sobre el
+        eje más largo hasta que quedan leaf_size segmentos. Retorna un BVHTree
+        """
+        count = len(segments)
+        lines = np.zeros((count + 1, 4), dtype=np.float64)
+        start = np.column_stack((segments['x0'], segments['y0']))
+        end = np.column_stack((segments['x1'], segments['y1']))
+        lines[:count, :2] = start
+        lines[:count, 2:] = end - start
+        low = np.minimum(start, end)
+        high = np.maximum(start, end)
+        centers = low + high
+
+        boxes = []
+        links = []
+        leaves = []
+        depth = 0
+
+        def split(node, ids, level):
+            nonlocal depth
+            depth = max(depth, level)
+            boxes[node] = np.concatenate((low[ids].min(axis=0), high[ids].max(axis=0)))
+            if len(ids) <= self.leaf_size:
+                row = np.full(self.leaf_size, count, dtype=np.int64)
+                row[:len(ids)] = ids
+                links[node] = (-1, len(leaves))
+                leaves.append(row)
+                return
+            extent = centers[ids].max(axis=0) - centers[ids].min(axis=0)
+            ids = ids[np.argsort(centers[ids, int(np.argmax(extent))], kind='stable')]
+            half = len(ids) // 2
+            child = len(boxes)
+            links[node] = (child, -1)
+            boxes.extend([None, None])
+            links.extend([None, None])
+            split(child, ids[:half], level + 1)
+            split(child + 1, ids[half:], level + 1)
+
+        if count:
+            boxes.append(None)
+            links.append(None)
+            split(0, np.arange(count), 0)
+
+        links = np.array(links, dtype=np.int64).reshape(-1, 2)
+        return BVHTree(
+            segments=segments,
+            lines=lines,
+            boxes=np.array(boxes, dtype=np.float64).reshape(-1, 4),
+            child=links[:, 0].copy(),
+            leaf=links[:, 1].copy(),
+            leaves=np.array(leaves, dtype=np.int64).reshape(-1, self.leaf_size),
+            depth=depth,
+        )
+
+    @property
+    def segments(self):
+        return self.tree.segments
+
+    @property
+    def nbytes(self):
+        tree = self.tree
+        return sum(array.nbytes for array in tree[:-1])
@@ -0,0 +1,13 @@
+"""
+Configuración común de las pruebas
+Usa los drivers "dummy" de SDL (sin ventana ni audio) e importa primero el
+paquete del juego, que resuelve el orden de importación entre rendering y
+world.
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import src.game  # noqa: E402,F401
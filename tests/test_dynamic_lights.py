@@ -0,0 +1,74 @@
+"""
+Pruebas de las luces dinámicas
+Mover, encender y apagar luces de forma incremental debe dar la misma luz
+que componerlas desde cero, y apagarlas todas debe devolver la luz
+horneada.
+"""
+import numpy as np
+
+from src.game.config import Config
+from src.world.dynamic_lights import DynamicLightmap
+from src.world.lightmap import Lightmap, make_light
+from src.world.grid_map import GridMap
+
+FRAMES = 40
+
+
+def random_grid(rng, size=20, density=0.2):
+    walls = rng.random((size, size)) < density
+    return GridMap(walls * rng.integers(1, 4, (size, size)))
+
+
+def random_lights(rng, grid, count):
+    """dict clave -> (x, y, radio, intensidad) en pixeles, como recibe sync"""
+    tile = Config.TILE_SIZE
+    return {
+        key: (
+            rng.uniform(0, grid.width * tile), rng.uniform(0, grid.height * tile),
+            rng.uniform(1.0, 5.0), rng.uniform(0.2, 1.0),
+        )
+        for key in rng.choice(12, count, replace=False).tolist()
+    }
+
+
+def static_lightmaps(rng, grid):
+    """Sin luz horneada (luz plena) y con luces horneadas"""
+    free = np.argwhere(grid.tiles == 0)
+    lights = [make_light(col, row) for row, col in free[rng.choice(len(free), 4, replace=False)].tolist()]
+    return None, Lightmap.build(grid, lights, 0.2)
+
+
+def test_removing_all_lights_restores_static():
+    rng = np.random.default_rng(0)
+    grid = random_grid(rng)
+    for static in static_lightmaps(rng, grid):
+        dynamic = DynamicLightmap(grid, static)
+        baseline = dynamic.values.copy()
+        for _ in range(FRAMES):
+            dynamic.sync(random_lights(rng, grid, int(rng.integers(1, 8))))
+        assert dynamic.sources
+        dynamic.sync({})
+        np.testing.assert_array_equal(dynamic.values, baseline)
+        assert not dynamic.accum.any()
+
+        # Apagarlas una por una con remove_light también
+        dynamic.sync(random_lights(rng, grid, 5))
+        for key in list(dynamic.sources):
+            dynamic.remove_light(key)
+        dynamic.refresh()
+        np.testing.assert_array_equal(dynamic.values, baseline)
+
+
+def test_incremental_sync_matches_fresh_compose():
+    rng = np.random.default_rng(1)
+    grid = random_grid(rng)
+    for static in static_lightmaps(rng, grid):
+        dynamic = DynamicLightmap(grid, static)
+        for _ in range(FRAMES):
+            lights = random_lights(rng, grid, int(rng.integers(0, 8)))
+            dynamic.sync(lights)
+            fresh = DynamicLightmap(grid, static)
+            fresh.sync(lights)
+            # El aporte acumulado en float32 puede redondear distinto en una unidad
+            np.testing.assert_allclose(dynamic.values, fresh.values, rtol=0, atol=1)
+            np.testing.assert_allclose(dynamic.accum, fresh.accum, rtol=0, atol=1e-5)
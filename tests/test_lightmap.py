@@ -0,0 +1,36 @@
+"""
+Pruebas del lightmap horneado
+Re-iluminar solo la región de un tile editado debe dar lo mismo que volver
+a hornear todo el mapa.
+"""
+import numpy as np
+
+from src.world.lightmap import bake_lightmap, make_light
+from src.world.map_loader import MapData
+
+EDITS = 40
+
+
+def random_level(rng, size=20, density=0.2, lights=6):
+    walls = rng.random((size, size)) < density
+    rows = (walls * rng.integers(1, 4, (size, size))).tolist()
+    free = np.argwhere(~walls)
+    chosen = free[rng.choice(len(free), lights, replace=False)]
+    level_lights = [
+        make_light(col, row, rng.uniform(2.0, 7.0), rng.uniform(0.4, 1.0))
+        for row, col in chosen.tolist()
+    ]
+    return MapData.from_rows("test", rows, lights=level_lights)
+
+
+def test_relight_after_set_tile_matches_full_bake():
+    rng = np.random.default_rng(0)
+    for _ in range(3):
+        level = random_level(rng)
+        lightmap = level.lightmap
+        for _ in range(EDITS):
+            col, row = rng.integers(0, level.grid.width), rng.integers(0, level.grid.height)
+            value = 0 if level.grid.tile(col, row) else int(rng.integers(1, 4))
+            level.set_tile(col, row, value)
+            expected = bake_lightmap(level.grid, level.lights, level.ambient)
+            np.testing.assert_array_equal(lightmap.values, expected)
@@ -0,0 +1,76 @@
+"""
+Pruebas del cache de mapas
+El cache compilado se invalida al cambiar el archivo fuente, el formato o
+los parámetros de las tablas, y lo que se lee con memoria mapeada es igual
+a compilar el nivel en memoria.
+"""
+import numpy as np
+import pytest
+
+from src.game.config import Config
+from src.world import map_loader
+from src.world.map_loader import MapData, compile_map, load_cached, parse_map, source_hash
+
+MAP_TEXT = """\
+lights: 5,4,3,0.9
+---
+11111111
+1P....e1
+1..2...1
+1...L..1
+1.3..1.1
+11111111
+"""
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    """Cache de mapas en un directorio temporal"""
+    monkeypatch.setattr(map_loader, "CACHE_DIR", str(tmp_path / "cache"))
+    return tmp_path / "cache"
+
+
+def compile_text(text, name="test"):
+    data = text.encode("utf-8")
+    digest = source_hash(data)
+    return compile_map(name, data, digest), digest
+
+
+def test_cache_hit(cache_dir):
+    _, digest = compile_text(MAP_TEXT)
+    level = load_cached("test", digest)
+    assert level is not None and level.from_cache
+
+
+def test_cache_invalidated_by_source_hash(cache_dir):
+    compile_text(MAP_TEXT)
+    edited = MAP_TEXT.replace("1..2...1", "1..22..1")
+    assert load_cached("test", source_hash(edited.encode("utf-8"))) is None
+
+
+def test_cache_invalidated_by_format(cache_dir, monkeypatch):
+    _, digest = compile_text(MAP_TEXT)
+    monkeypatch.setattr(map_loader, "CACHE_FORMAT", map_loader.CACHE_FORMAT + 1)
+    assert load_cached("test", digest) is None
+
+
+def test_cache_invalidated_by_table_params(cache_dir, monkeypatch):
+    _, digest = compile_text(MAP_TEXT)
+    monkeypatch.setattr(Config, "LIGHT_AMBIENT", Config.LIGHT_AMBIENT + 0.1)
+    assert load_cached("test", digest) is None
+
+
+def test_cached_tables_match_from_rows(cache_dir):
+    _, digest = compile_text(MAP_TEXT)
+    cached = load_cached("test", digest)
+    rows, _, player_spawn, enemy_spawns, lights = parse_map(MAP_TEXT, "test")
+    fresh = MapData.from_rows("test", rows, lights=lights)
+
+    assert isinstance(cached.grid.padded, np.memmap)
+    np.testing.assert_array_equal(cached.grid.padded, fresh.grid.padded)
+    assert cached.player_spawn == player_spawn
+    assert cached.enemy_spawns == enemy_spawns
+    assert cached.lights == lights
+    for name in map_loader.DERIVED_TABLES:
+        assert isinstance(cached.tables[name], np.memmap), name
+        np.testing.assert_array_equal(cached.table(name), fresh.table(name), err_msg=name)
@@ -0,0 +1,62 @@
+"""
+Pruebas del pool de partículas
+Emitir más allá de la capacidad se recorta, y compactar tras la muerte de
+partículas conserva intactas (y en orden) las que siguen vivas.
+"""
+import numpy as np
+
+from src.rendering.particles import FIELDS, LIFE, MAX_LIFE, ParticleSystem
+from src.world.grid_map import GridMap
+
+DT = 0.05
+
+
+def emit_random(system, rng, count, life=1.0):
+    return system.emit(
+        rng.uniform(100, 500, count), rng.uniform(100, 500, count), 32.0,
+        rng.integers(0, 256, (count, 3)), 80.0, life,
+    )
+
+
+def test_emit_clamps_to_capacity():
+    rng = np.random.default_rng(0)
+    system = ParticleSystem(capacity=100, seed=0)
+    assert emit_random(system, rng, 60) == 60
+    assert emit_random(system, rng, 60) == 40
+    assert system.count == 100
+    assert emit_random(system, rng, 10) == 0
+    assert system.count == 100
+    assert system.state.shape == (FIELDS, 100)
+
+
+def test_compaction_keeps_survivors():
+    rng = np.random.default_rng(1)
+    system = ParticleSystem(capacity=500, seed=1)
+    emit_random(system, rng, 400)
+    # Vidas mezcladas: alrededor de la mitad muere en este update
+    system.state[LIFE, :400] = rng.uniform(0.0, 2 * DT, 400)
+    survivors = np.flatnonzero(system.state[LIFE, :400] > DT)
+
+    # Referencia: un pool con solo las que van a sobrevivir
+    reference = ParticleSystem(capacity=500, seed=1)
+    reference.state[:, :survivors.size] = system.state[:, survivors]
+    reference.colors[:survivors.size] = system.colors[survivors]
+    reference.count = survivors.size
+
+    system.update(DT)
+    reference.update(DT)
+    assert system.count == survivors.size
+    np.testing.assert_array_equal(system.state[:, :system.count], reference.state[:, :reference.count])
+    np.testing.assert_array_equal(system.colors[:system.count], reference.colors[:reference.count])
+    assert (system.state[LIFE, :system.count] > 0).all()
+    assert (system.state[LIFE, :system.count] <= system.state[MAX_LIFE, :system.count]).all()
+
+
+def test_particles_die_in_walls():
+    system = ParticleSystem(capacity=10, seed=2)
+    system.set_map(GridMap([[0, 1], [0, 0]]))
+    # Una partícula dentro de la pared (1, 0) y otra en un tile libre
+    system.emit(np.array([96.0, 32.0]), np.array([32.0, 96.0]), 32.0, (255, 0, 0), 0.0, 10.0)
+    system.update(DT)
+    assert system.count == 1
+    np.testing.assert_allclose(system.state[:2, 0], (32.0, 96.0))
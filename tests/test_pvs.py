@@ -0,0 +1,64 @@
+"""
+Pruebas del PVS
+compute_pvs (recorridos compartidos evaluados por lotes de tiles) debe dar
+los mismos bitsets que lanzar el DDA de cada tile por separado.
+"""
+import math
+
+import numpy as np
+
+from src.world.grid_map import GridMap
+from src.world.pvs import PVS_ANGLES, PVS_SAMPLES, compute_pvs, pvs_radius, pvs_reach
+
+
+def reference_pvs(grid):
+    """PVS tile a tile: DDA de todos los rayos de cada tile libre hasta chocar o salir del alcance"""
+    reach = pvs_reach()
+    radius = pvs_radius()
+    size = 2 * radius + 1
+    bits = np.zeros((grid.width * grid.height, size, (size + 7) // 8), dtype=np.uint8)
+    offsets = (np.arange(PVS_SAMPLES) + 0.5) / PVS_SAMPLES
+    theta = (np.arange(PVS_ANGLES) + 0.5) * (2 * math.pi / PVS_ANGLES)
+
+    for row, col in np.argwhere(grid.tiles == 0).tolist():
+        window = np.zeros((size, size), dtype=bool)
+        window[radius, radius] = True
+        for local_y in offsets.tolist():
+            for local_x in offsets.tolist():
+                for angle in theta.tolist():
+                    dir_x, dir_y = math.cos(angle), math.sin(angle)
+                    delta_x = abs(1.0 / dir_x) if dir_x else math.inf
+                    delta_y = abs(1.0 / dir_y) if dir_y else math.inf
+                    side_x = (1.0 - local_x if dir_x > 0 else local_x) * delta_x
+                    side_y = (1.0 - local_y if dir_y > 0 else local_y) * delta_y
+                    wx = wy = radius
+                    while True:
+                        if side_x < side_y:
+                            distance = side_x
+                            wx += 1 if dir_x > 0 else -1
+                            side_x += delta_x
+                        else:
+                            distance = side_y
+                            wy += 1 if dir_y > 0 else -1
+                            side_y += delta_y
+                        if distance >= reach:
+                            break
+                        window[wy, wx] = True
+                        if grid.tile(col + wx - radius, row + wy - radius) != 0:
+                            break
+
+        dilated = window.copy()
+        dilated[1:] |= window[:-1]
+        dilated[:-1] |= window[1:]
+        dilated[:, 1:] |= dilated[:, :-1].copy()
+        dilated[:, :-1] |= dilated[:, 1:].copy()
+        bits[row * grid.width + col] = np.packbits(dilated, axis=1)
+    return bits
+
+
+def test_compute_pvs_matches_per_tile_rays():
+    rng = np.random.default_rng(0)
+    for density in (0.1, 0.3):
+        walls = rng.random((10, 10)) < density
+        grid = GridMap(walls * rng.integers(1, 4, (10, 10)))
+        np.testing.assert_array_equal(compute_pvs(grid, batch=7), reference_pvs(grid))